@@ -0,0 +1,74 @@
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# seconds to wait for all meters at the minute boundary; 0 disables
+# the barrier and the last polled values are saved
+ACQUISITION_DEADLINE = float(os.environ.get('ACQUISITION_DEADLINE', 10))
+ACQUISITION_WORKERS = int(os.environ.get('ACQUISITION_WORKERS', 32))
+
+log = logging.getLogger()
+
+
+class Acquisition:
+    """
+    started - unix time the barrier was triggered
+    timestamps - {meter: unix time of its last read or None}
+    late - meters that did not finish before the deadline
+    """
+
+    __slots__ = ("started", "timestamps", "late")
+
+    def __init__(self, started: float, meters: list, late: list) -> None:
+        self.started = started
+        self.timestamps = {meter: getattr(meter, "acquired_at", None)
+                           for meter in meters}
+        self.late = late
+
+    @property
+    def fresh(self) -> list:
+        """timestamps of the meters read after the barrier was triggered"""
+        return [timestamp for timestamp in self.timestamps.values()
+                if timestamp is not None and timestamp >= self.started]
+
+    @property
+    def spread(self) -> float | None:
+        """seconds between the first and the last fresh read"""
+        fresh = self.fresh
+        if not fresh:
+            return None
+        return max(fresh) - min(fresh)
+
+
+class AcquisitionBarrier:
+    """
+    Triggers a read of every meter at once and waits until all of them
+    finish or the deadline expires, so the values saved for a minute
+    are taken at almost the same instant.
+    """
+
+    def __init__(self, deadline: float = ACQUISITION_DEADLINE,
+                 workers: int = ACQUISITION_WORKERS) -> None:
+        self._deadline = deadline
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix="acquire")
+
+    @property
+    def deadline(self) -> float:
+        return self._deadline
+
+    def acquire(self, meters: list) -> Acquisition:
+        started = time.time()
+        futures = {self._executor.submit(meter.acquire, started): meter
+                   for meter in meters}
+        done, not_done = wait(futures, timeout=self._deadline)
+        for future in done:
+            exception = future.exception()
+            if exception is not None:
+                log.error(exception, exc_info=exception)
+        late = [futures[future] for future in not_done]
+        for meter in late:
+            log.warning(f"[Acquisition] {meter} missed the deadline "
+                        f"of {self._deadline} s")
+        return Acquisition(started, meters, late)
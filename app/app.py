@@ -1,10 +1,13 @@
+import time
+# taken before the other imports to measure them too
+started = time.monotonic()
 import logging
 import os
 from dotenv import load_dotenv
 from database_scheduler import DatabaseScheduler
+from supervisor import Supervisor, COLLECTOR_WORKERS
 from log_formatter import log_setup
-import time
-import test
+from self_check import run_self_check
 
 pemeg = """
 
@@ -18,20 +21,41 @@ pemeg = """
 """
 
 
+def elapsed_ms(since: float, until: float | None = None) -> int:
+    if until is None:
+        until = time.monotonic()
+    return round((until - since) * 1000)
+
+
 if __name__ == "__main__":
     print(pemeg)
     load_dotenv("../.env")
     log_setup()
     log = logging.getLogger()
+    log.info(f"[Startup] Imports loaded in {elapsed_ms(started)} ms")
     if os.getenv("RUN_TESTS_ON_STARTUP", 1) == '1':
-        log.info("Running tests...")
-        test_status = os.system("python -m unittest -v")
-        if test_status != 0:
-            log.critical("Tests failed. Stopping application...")
-            # app termination if test fails
+        log.info("Running self-check...")
+        check_started = time.monotonic()
+        if run_self_check():
+            log.critical("Self-check failed. Stopping application...")
+            # app termination if self-check fails
             quit(1)
-    log.info("Tests completed. Status: OK. Running application...")
-    database_scheduler = DatabaseScheduler()
+        log.info(f"Self-check completed in {elapsed_ms(check_started)} ms. "
+                 f"Status: OK. Running application...")
+    if COLLECTOR_WORKERS > 1:
+        # meters polled by worker processes, written by this one
+        database_scheduler = DatabaseScheduler(Supervisor(COLLECTOR_WORKERS))
+    else:
+        database_scheduler = DatabaseScheduler()
     database_scheduler.start()
+    log.info(f"[Startup] Schedulers started {elapsed_ms(started)} ms "
+             f"after launch")
+    scheduler = database_scheduler.meter_manager.scheduler
+    first_run_logged = False
     while True:
         time.sleep(.5)
+        if not first_run_logged and scheduler.first_run is not None:
+            first_run_logged = True
+            log.info(f"[Startup] First scheduled job ran "
+                     f"{elapsed_ms(started, scheduler.first_run)} ms "
+                     f"after launch")
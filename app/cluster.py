@@ -0,0 +1,113 @@
+import os
+import hashlib
+import logging
+from bisect import bisect
+
+# index of this instance and number of instances
+CLUSTER_INSTANCE = int(os.environ.get('CLUSTER_INSTANCE', 0))
+CLUSTER_SIZE = int(os.environ.get('CLUSTER_SIZE', 1))
+# optional file with one member name per line; overrides CLUSTER_SIZE
+CLUSTER_MEMBERS_FILE = os.environ.get('CLUSTER_MEMBERS_FILE')
+# name of this instance in the members file
+CLUSTER_MEMBER = os.environ.get('CLUSTER_MEMBER')
+# points of every member on the ring
+CLUSTER_VNODES = int(os.environ.get('CLUSTER_VNODES', 64))
+
+log = logging.getLogger()
+
+
+def ring_hash(key: str) -> int:
+    """stable across processes, unlike hash()"""
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Consistent hash ring: adding or removing a member moves only
+    the keys between its points and their predecessors
+    """
+
+    def __init__(self, members: list, vnodes: int = CLUSTER_VNODES) -> None:
+        self._members = sorted(set(members))
+        self._points = sorted((ring_hash(f"{member}#{vnode}"), member)
+                              for member in self._members
+                              for vnode in range(vnodes))
+        self._hashes = [point for point, _ in self._points]
+
+    @property
+    def members(self) -> list:
+        return self._members
+
+    def owner(self, key: str) -> str | None:
+        if not self._points:
+            return None
+        index = bisect(self._hashes, ring_hash(key)) % len(self._points)
+        return self._points[index][1]
+
+
+class Cluster:
+    """
+    Share of the meters polled by this collector instance: meters are
+    assigned by the host of their converter or gateway, so one
+    connection is never opened by two instances.
+    """
+
+    def __init__(self, instance: int = CLUSTER_INSTANCE,
+                 size: int = CLUSTER_SIZE,
+                 members_file: str | None = CLUSTER_MEMBERS_FILE,
+                 member: str | None = CLUSTER_MEMBER,
+                 vnodes: int = CLUSTER_VNODES) -> None:
+        self._members_file = members_file
+        self._member = member or f"collector-{instance}"
+        self._size = size
+        self._vnodes = vnodes
+        self._members = None
+        self._ring = None
+        self.changed()
+
+    @property
+    def enabled(self) -> bool:
+        return self._members_file is not None or self._size > 1
+
+    @property
+    def member(self) -> str:
+        return self._member
+
+    @property
+    def members(self) -> list:
+        return self._ring.members
+
+    def owns(self, host: str) -> bool:
+        return not self.enabled or self._ring.owner(host) == self._member
+
+    def share(self, models: dict) -> dict:
+        """the {meter_id: MeterModel} polled by this instance"""
+        return {meter_id: model for meter_id, model in models.items()
+                if self.owns(model.host)}
+
+    def changed(self) -> bool:
+        """re-reads the membership; True when it changed"""
+        members = self._read_members()
+        if members == self._members:
+            return False
+        self._members = members
+        self._ring = HashRing(members, self._vnodes)
+        if self.enabled:
+            log.info(f"[Cluster] {self._member} in {len(members)} members")
+            if self._member not in members:
+                log.warning(f"[Cluster] {self._member} is not a member, "
+                            f"no meters will be polled")
+        return True
+
+    def _read_members(self) -> list:
+        if self._members_file is None:
+            return [f"collector-{index}" for index in range(self._size)]
+        try:
+            with open(self._members_file) as file:
+                return sorted({line.strip() for line in file
+                               if line.strip() and
+                               not line.startswith("#")})
+        except OSError as exception:
+            log.debug(exception)
+            # keep the last known membership
+            return self._members or []
@@ -0,0 +1,79 @@
+import os
+import logging
+
+METER_CONFIG = os.environ.get('METER_CONFIG', './data/meter.yaml')
+# seconds between checks of the configuration file
+CONFIG_WATCH_INTERVAL = float(os.environ.get('CONFIG_WATCH_INTERVAL', 1))
+# keys of a meter entry that can change without restarting its poller
+LIVE_KEYS = {"policies"}
+
+log = logging.getLogger()
+
+
+class ConfigDiff:
+    """
+    added, removed, changed - meter ids; changed meters need a new poller
+    updated - meter ids whose change applies without restarting the poller
+    """
+
+    def __init__(self, added: list, removed: list, changed: list,
+                 updated: list) -> None:
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+        self.updated = updated
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed
+                    or self.updated)
+
+    def __repr__(self) -> str:
+        return f"ConfigDiff(added={self.added}, removed={self.removed}, " \
+               f"changed={self.changed}, updated={self.updated})"
+
+
+def diff_models(old: dict, new: dict) -> ConfigDiff:
+    """compares {meter_id: MeterModel} by their meter.yaml entries"""
+    changed = []
+    updated = []
+    for meter_id in old.keys() & new.keys():
+        old_config = old[meter_id].config
+        new_config = new[meter_id].config
+        if old_config == new_config:
+            continue
+        keys = {key for key in old_config.keys() | new_config.keys()
+                if old_config.get(key) != new_config.get(key)}
+        if keys <= LIVE_KEYS:
+            updated.append(meter_id)
+        else:
+            changed.append(meter_id)
+    return ConfigDiff(added=sorted(new.keys() - old.keys()),
+                      removed=sorted(old.keys() - new.keys()),
+                      changed=sorted(changed), updated=sorted(updated))
+
+
+class ConfigWatcher:
+    """detects changes of a file by its modification time and size"""
+
+    def __init__(self, path: str = METER_CONFIG) -> None:
+        self._path = path
+        self._stamp = self._stat()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def changed(self) -> bool:
+        stamp = self._stat()
+        if stamp is None or stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        return True
+
+    def _stat(self) -> tuple | None:
+        try:
+            stat = os.stat(self._path)
+        except OSError as exception:
+            log.debug(exception)
+            return None
+        return stat.st_mtime_ns, stat.st_size
@@ -1,34 +1,61 @@
 from meter_manager import MeterManager
+from meter_registry import MeterRegistry
+from acquisition_barrier import AcquisitionBarrier
+from power_aggregator import aggregate_power
+from rollups import Rollups
+from singleton import Singleton
 import time
 import threading
 from datetime import datetime, timedelta
 from models.active_power_model import ActivePowerModel
 from models.imported_active_energy_model import ImportedActiveEnergyModel
+from models.rollup_model import RollupModel
+from models.wide_model import WideModel
+from models.meter_model import MeterModel
+from models.write_policy import WriteFilter
+from models.sql_sink import SqlSink, SqlSpoolWriter, SQL_SPOOL_DIR, \
+    encode_row
+from models.influx_writer import InfluxWriter, INFLUXDB_SCHEMA
+from models.spool import Spool
+from models.spool_drainer import SpoolDrainer
+from interfaces.snapshot import BAD
 import logging
 
-lock = threading.Lock()
 log = logging.getLogger()
 
 
-class Singleton(type):
-    _instances = {}
-
-    def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
-            with lock:
-                if cls not in cls._instances:
-                    cls._instances[cls] = super(Singleton, cls)\
-                        .__call__(*args, **kwargs)
-        return cls._instances[cls]
+class DatabaseScheduler(threading.Thread, metaclass=Singleton):
+    """
+    Saves the meters data at every full minute of the wall clock on its
+    own thread, so the save never waits for a free poll worker
+    """
 
+    _interval = 60
 
-class DatabaseScheduler(threading.Thread, metaclass=Singleton):
-    def __init__(self) -> None:
+    def __init__(self, meter_manager: object | None = None) -> None:
+        """meter_manager - MeterManager() or a Supervisor of workers"""
         threading.Thread.__init__(self)
         threading.Thread.daemon = True
-        self.meter_manager = MeterManager()
+        self.meter_manager = meter_manager or MeterManager()
         self.meter_manager.start()
+        self.writer = InfluxWriter()
+        self.spool = Spool()
+        self.drainer = SpoolDrainer(self.spool, self.writer)
+        self.barrier = AcquisitionBarrier(
+            self.meter_manager.acquisition_deadline)
+        self.rollups = Rollups()
+        self.write_filter = WriteFilter()
+        # optional relational sink with its own spool, for billing
+        self.sql_sink = SqlSink.mariadb()
+        self.sql_spool = None
+        self.sql_drainer = None
+        if self.sql_sink is not None:
+            self.sql_spool = Spool(SQL_SPOOL_DIR)
+            self.sql_drainer = SpoolDrainer(self.sql_spool,
+                                            SqlSpoolWriter(self.sql_sink))
         self._last_date = None
+        # end of the previous aggregation window (unix time)
+        self._window_end = None
 
     def _round_date(self, date) -> datetime:
         new_date = date
@@ -37,6 +64,9 @@ class DatabaseScheduler(threading.Thread, metaclass=Singleton):
         return new_date
 
     def start(self) -> None:
+        self.drainer.start()
+        if self.sql_drainer is not None:
+            self.sql_drainer.start()
         try:
             super(DatabaseScheduler, self).start()
         except RuntimeError:
@@ -46,35 +76,142 @@ class DatabaseScheduler(threading.Thread, metaclass=Singleton):
         log.debug("Database Scheduler process started")
         self._last_date = self._round_date(datetime.now())
         while True:
-            if self._last_date + timedelta(seconds=60) <= datetime.now():
-                self._last_date += timedelta(seconds=60)
+            next_date = self._last_date + timedelta(seconds=self._interval)
+            delay = (next_date - datetime.now()).total_seconds()
+            if delay > 0:
+                time.sleep(delay)
+                continue
+            # minutes stamped by the wall clock, one after another
+            self._last_date = next_date
+            try:
                 self._save_meters_data()
-            time.sleep(.5)
+            except Exception as exception:
+                log.exception(exception)
 
     def _save_meters_data(self) -> None:
         log.info("[Database Scheduler] Saving meters data")
-        for meter in self.meter_manager.threads:
-            if not meter.data:
+        spread = None
+        if self.barrier.deadline > 0:
+            acquisition = self.meter_manager.acquire(self.barrier)
+            spread = acquisition.spread
+            log.info(f"[Database Scheduler] Acquired "
+                     f"{len(acquisition.fresh)}/{len(acquisition.timestamps)}"
+                     f" meters, spread: {spread} s, "
+                     f"late: {len(acquisition.late)}")
+        window_end = time.time()
+        window_start = self._window_end
+        if window_start is None:
+            window_start = window_end - self._interval
+        self._window_end = window_end
+        lines = []
+        models = []
+        rows = []
+        suppressed = self.write_filter.suppressed
+        for meter in self.meter_manager.meters:
+            # one reference read, the poller may publish a newer snapshot
+            snapshot = meter.snapshot
+            if snapshot is None or snapshot.quality == BAD:
                 log.info(LogFormatter(None, meter))
                 continue
-            for measurement in meter.data:
+            acquired_at = snapshot.acquired_at
+            meter_model = MeterModel.get_meter(meter.meter_id)
+            policies = {} if meter_model is None else meter_model.policies
+            aggregates = aggregate_power(meter.history, window_start,
+                                         window_end)
+            for measurement in snapshot.values:
+                if measurement["value"] is None:
+                    continue
+                model = None
                 if measurement["name"] == "imported_active_energy":
                     model = ImportedActiveEnergyModel(
                         meter_id=meter.meter_id,
                         imported_active_energy=measurement["value"],
                         tariff=measurement["tariff"],
                         phase=measurement["phase"],
-                        date=self._last_date)
-                    model.save()
-                    log.info(LogFormatter(measurement, meter))
+                        date=self._last_date,
+                        acquired_at=acquired_at, spread=spread)
                 if measurement["name"] == "active_power":
                     model = ActivePowerModel(
                         meter_id=meter.meter_id,
                         active_power=measurement["value"],
                         phase=measurement["phase"],
-                        date=self._last_date)
-                    model.save()
-                    log.info(LogFormatter(measurement, meter))
+                        date=self._last_date,
+                        acquired_at=acquired_at, spread=spread,
+                        aggregate=aggregates.get(measurement["phase"]))
+                if model is None:
+                    continue
+                self._update_rollups(model)
+                rows.append(model.to_row())
+                key = (meter.meter_id, measurement["name"],
+                       measurement["phase"], measurement.get("tariff"))
+                # a spike within the minute is written with its aggregates
+                aggregate = getattr(model, "aggregate", None)
+                extremes = () if aggregate is None else \
+                    (aggregate.mean, aggregate.minimum, aggregate.maximum)
+                if not self.write_filter.should_write(
+                        policies.get(measurement["name"]), key,
+                        measurement["value"], self._last_date, extremes):
+                    continue
+                models.append(model)
+                log.info(LogFormatter(measurement, meter))
+        if INFLUXDB_SCHEMA == "wide":
+            models = WideModel.group(models)
+        # straight to line protocol, without building Point objects
+        lines.extend(line for line in (model.to_line() for model in models)
+                     if line)
+        rollups = self.rollups.close(self._last_date)
+        for rollup in rollups:
+            lines.append(RollupModel(rollup).to_line())
+        if rollups:
+            log.info(f"[Database Scheduler] {len(rollups)} rollups closed")
+        if self.sql_spool is not None:
+            self._spool_rows(rows)
+        # the spool is local, so acquisition never waits for the database
+        try:
+            self.spool.append(lines)
+        except Exception as exception:
+            log.exception(exception)
+            log.critical("[Database Scheduler] Spool write failed")
+            return
+        self.drainer.wake()
+        suppressed = self.write_filter.suppressed - suppressed
+        latency = self.writer.last_latency
+        latency = "-" if latency is None else f"{latency * 1000:.0f} ms"
+        log.info(f"[Database Scheduler] Spooled {len(lines)} points, "
+                 f"suppressed {suppressed} "
+                 f"(backlog: {self.spool.size} bytes in "
+                 f"{self.spool.segments} segments, "
+                 f"failed writes: {self.drainer.failures}, "
+                 f"last write: {self.writer.last_count} points "
+                 f"in {latency}, "
+                 f"missed polls: {self.meter_manager.missed}, "
+                 f"overruns: {self.meter_manager.overruns})")
+
+    def _spool_rows(self, rows: list) -> None:
+        try:
+            self.sql_spool.append([encode_row(row) for row in rows])
+        except Exception as exception:
+            log.exception(exception)
+            log.critical(f"[Database Scheduler] SQL spool write of "
+                         f"{len(rows)} rows failed")
+            return
+        self.sql_drainer.wake()
+
+    def _update_rollups(self, model: object) -> None:
+        if isinstance(model, ImportedActiveEnergyModel):
+            self.rollups.add_energy(model.meter_id, model.tariff,
+                                    model.phase, model.date,
+                                    model.imported_active_energy)
+            return
+        aggregate = model.aggregate
+        if aggregate is None:
+            self.rollups.add_power(model.meter_id, model.phase, model.date,
+                                   model.active_power, model.active_power,
+                                   model.active_power)
+            return
+        self.rollups.add_power(model.meter_id, model.phase, model.date,
+                               aggregate.mean, aggregate.minimum,
+                               aggregate.maximum, aggregate.count)
 
 
 class LogFormatter:
@@ -102,7 +239,7 @@ class LogFormatter:
     def _check_length(self) -> None:
         if LogFormatter._max_length > 0:
             return
-        for meter in MeterManager.meters:
+        for meter in MeterRegistry().meters:
             if LogFormatter._max_length < len(meter.name):
                 LogFormatter._max_length = len(meter.name)
 
@@ -1,22 +1,26 @@
 
 # DIF
-DIF1 = "01"
-DIF2 = "02"
-DIF3 = "03"
-DIF4 = "04"
-DIF6 = "06"
-DIF6_E = "86"
+DIF1 = 0x01
+DIF2 = 0x02
+DIF3 = 0x03
+DIF4 = 0x04
+DIF6 = 0x06
+DIF6_E = 0x86
 
-# DIFE
-TOTAL = ["00", "80"]
-TARIFF1 = ["10", "90"]
-TARIFF2 = ["20", "A0"]
+# DIFE (tariff; bits 4-5)
+TOTAL = 0
+TARIFF1 = 1
+TARIFF2 = 2
 
-# VIFE (6 Byte DIF followed by DIFE)
-IMPORTED_ENERGY = "80"
-EXPORTED_ENERGY = "81"
-APPARENT_ENERGY = "91"
-REACTIVE_ENERGY = "93"
+# VIF
+ENERGY = 0x82
+ACTIVE_POWER = 0xA8
 
-# VIF (1 - 6 Byte DIF)
-ACTIVE_POWER = "A8"
\ No newline at end of file
+# VIFE
+MANUFACTURER_SPECIFIC = 0xFF
+
+# Manufacturer specific VIFE (6 Byte DIF followed by DIFE)
+IMPORTED_ENERGY = 0x80
+EXPORTED_ENERGY = 0x81
+APPARENT_ENERGY = 0x91
+REACTIVE_ENERGY = 0x93
@@ -1,35 +1,27 @@
-import time
-from .mbus_socket import MbusSocket
-from .mbus_frame import SendInitFrame, RequestUserData2Frame
+from meter_registry import MeterRegistry
+from ..ring_buffer import SampleHistory
+from .mbus_socket import MbusSocket, MBUS_POLL_INTERVAL
 
 
 class Mbus:
-    _instances = []
-
     def __init__(self, meter_id: int = 0, name: None | str = None,
                  host: str = 'localhost', port: int = 10001,
-                 address: int = 1):
-        self._socket = MbusSocket(host, port)
+                 address: int = 1, interval: float | None = None):
+        self._socket = MeterRegistry().connection("mbus", host, port,
+                                                  MbusSocket)
         self.meter_id = meter_id
         self.name = name
         self.host = host
         self.port = port
         self.address = address
-        self.data = None
-        Mbus._instances.append(self)
+        self.interval = interval or MBUS_POLL_INTERVAL
+        self.acquired_at = None
+        # replaced as a whole by the socket after every response
+        self.snapshot = None
+        # samples of the last HISTORY_MINUTES at full resolution
+        self.history = SampleHistory.for_interval(self.interval)
         self._socket.append(self)
 
-    def __new__(cls, meter_id: int, name: str, host: str, port: int,
-                address: int) -> object:
-        for inst in cls._instances:
-            found = [inst.meter_id == meter_id,
-                     inst.host == host,
-                     inst.port == port,
-                     inst.address == address]
-            if all(found):
-                return inst
-        return object.__new__(Mbus)
-
     def __str__(self) -> str:
         return f"Mbus({self.host}:{self.port} [{self.address}])"
 
@@ -39,22 +31,34 @@ class Mbus:
     @classmethod
     def from_model(cls, model):
         return cls(meter_id=model.meter_id, name=model.name, host=model.host,
-                   port=model.port, address=model.address)
+                   port=model.port, address=model.address,
+                   interval=model.interval)
 
     @property
     def socket(self):
         return self._socket
 
+    @property
+    def data(self) -> tuple:
+        snapshot = self.snapshot
+        return () if snapshot is None else snapshot.values
+
+    def acquire(self, since: float) -> None:
+        """meters of one converter are read together in a bus cycle"""
+        self._socket.acquire(since)
+
+    def stop(self) -> None:
+        """
+        leaves the bus cycle; the socket is closed with the last meter
+        of the converter
+        """
+        self._socket.remove(self)
+        if self._socket.empty:
+            MeterRegistry().remove_connection("mbus", self.host, self.port)
+            self._socket.stop()
+
     def send(self, msg) -> None:
         self._socket.send(msg)
 
-    def send_commands(self) -> None:
-        init_frame = SendInitFrame(self.address)
-        req_data_frame = RequestUserData2Frame(self.address)
-        self.send(init_frame.frame)
-        time.sleep(0.5)
-        self.send(req_data_frame.frame)
-        time.sleep(0.5)
-
-    def start(self) -> None:
-        self._socket.start()
+    def start(self, scheduler: object) -> None:
+        self._socket.start(scheduler)
@@ -1,4 +1,5 @@
 from . import constants as const
+from .mbus_records import MbusRecord, decode_records
 import logging
 
 log = logging.getLogger()
@@ -212,26 +213,23 @@ class MbusFrame:
 
     def _slice_data(self) -> None:
         data_field = self._data_field
-        data_list = bytes_to_str_list(data_field)
-        while True:
-            length = 0
-            if data_list[0] == const.DIF6_E:
-                if data_list[4] == const.IMPORTED_ENERGY:
-                    length = ImportedActiveEnergyFrame.length()
-                    data = data_field[:length]
-                    frame = ImportedActiveEnergyFrame(data)
-                    self._data.append(frame)
-            if data_list[0] == const.DIF6:
-                if data_list[1] == const.ACTIVE_POWER:
-                    length = ActivePowerFrame.length()
-                    data = data_field[:length]
-                    frame = ActivePowerFrame(data)
-                    self._data.append(frame)
-            if len(data_field) - length > 0:
-                data_field = data_field[length:]
-                data_list = bytes_to_str_list(data_field)
-            else:
-                break
+        for record in decode_records(data_field):
+            frame_class = self._frame_class(record)
+            if frame_class is None:
+                continue
+            frame = data_field[record.start:record.end]
+            self._data.append(frame_class(frame, record))
+
+    @staticmethod
+    def _frame_class(record: MbusRecord) -> type | None:
+        vife = record.vife
+        if record.dif == const.DIF6_E and len(vife) > 1 and \
+                vife[0] == const.MANUFACTURER_SPECIFIC and \
+                vife[1] == const.IMPORTED_ENERGY:
+            return ImportedActiveEnergyFrame
+        if record.dif == const.DIF6 and record.vif == const.ACTIVE_POWER:
+            return ActivePowerFrame
+        return None
 
     def _verify_checksum(self) -> None:
         val = self._calculate_checksum()
@@ -248,13 +246,7 @@ class MbusFrame:
             raise LFieldRepetitionError
 
     def _calculate_checksum(self) -> bytes:
-        sum_frame = self._frame[4:-2]
-        int_val = 0
-        for i in range(len(sum_frame)):
-            int_val += int.from_bytes(sum_frame[i:i+1], "big")
-        hex_val = hex(int_val)
-        str_val = f'{hex_val[-2:].zfill(2)}'.upper()
-        return str_to_bytes(str_val)
+        return bytes((sum(self._frame[4:-2]) & 0xFF,))
 
 
 class EnergyFrame:
@@ -286,8 +278,11 @@ class EnergyFrame:
     Value
     """
 
-    def __init__(self, frame: bytes) -> None:
+    def __init__(self, frame: bytes, record: MbusRecord | None = None) -> None:
+        if record is None:
+            record = decode_records(frame)[0]
         self._frame = frame
+        self._record = record
         self._dif = frame[:1]
         self._dife = frame[1:2]
         self._vif = frame[2:3]
@@ -366,37 +361,17 @@ class EnergyFrame:
                 return "tariff_2"
 
     def _set_phase(self) -> int:
-        val = bytes_to_str(self._spec_vife)
-        match val[-1]:
-            case "0":
-                self._phase = 0
-                return 0
-            case "1":
-                self._phase = 1
-                return 1
-            case "2":
-                self._phase = 2
-                return 2
-            case "3":
-                self._phase = 3
-                return 3
+        self._phase = self._record.vife[-1] & 0x0F
+        return self._phase
 
     def _set_tariff(self) -> int:
-        val = bytes_to_str(self._dife)
-        if val in const.TOTAL:
-            self._tariff = 0
-            return 0
-        if val in const.TARIFF1:
-            self._tariff = 1
-            return 1
-        if val in const.TARIFF2:
-            self._tariff = 2
-            return 2
+        self._tariff = self._record.tariff
+        return self._tariff
 
     def _set_value(self) -> float:
-        int_val = int.from_bytes(self._value_field, "little")
         # kWh conversion
-        final_val = int_val / 10000
+        record = self._record
+        final_val = record.value / 10 ** (3 - record.exponent)
         self._value = final_val
         return final_val
 
@@ -444,8 +419,8 @@ class ImportedActiveEnergyFrame(EnergyFrame):
     Value
     """
 
-    def __init__(self, frame: bytes) -> None:
-        super().__init__(frame)
+    def __init__(self, frame: bytes, record: MbusRecord | None = None) -> None:
+        super().__init__(frame, record)
         self._name = "imported_active_energy"
 
 
@@ -469,8 +444,11 @@ class ActivePowerFrame:
     Signed Value
     """
 
-    def __init__(self, frame: bytes) -> None:
+    def __init__(self, frame: bytes, record: MbusRecord | None = None) -> None:
+        if record is None:
+            record = decode_records(frame)[0]
         self._frame = frame
+        self._record = record
         self._dif = frame[:1]
         self._vif = frame[1:2]
         self._spec_vife = frame[3:4]
@@ -524,25 +502,12 @@ class ActivePowerFrame:
                 return "phase_3"
 
     def _set_phase(self) -> int:
-        match bytes_to_str(self._spec_vife):
-            case "00":
-                self._phase = 0
-                return 0
-            case "01":
-                self._phase = 1
-                return 1
-            case "02":
-                self._phase = 2
-                return 2
-            case "03":
-                self._phase = 3
-                return 3
+        self._phase = self._record.vife[-1] & 0x0F
+        return self._phase
 
     def _set_value(self) -> float:
-        int_val = abs(int.from_bytes(self._value_field,
-                                     "little", signed=True))
-        watts_val = int_val / 1000
-        kilowatts_val = watts_val / 1000
+        record = self._record
+        kilowatts_val = abs(record.value) / 10 ** (3 - record.exponent)
         self._value = kilowatts_val
         return kilowatts_val
 
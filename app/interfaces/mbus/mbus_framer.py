@@ -0,0 +1,85 @@
+ACK = 0xE5
+SHORT_START = 0x10
+LONG_START = 0x68
+STOP = 0x16
+# L-field (255) + start, L, L, start, checksum and stop characters
+MAX_TELEGRAM_LENGTH = 261
+
+
+class MbusFramer:
+    """
+    Incremental M-Bus telegram framer
+
+    Takes chunks of any size and returns complete, checksum-verified
+    telegrams as soon as they have arrived:
+
+    ACK: E5
+    short telegram: 10 C A CS 16
+    long telegram: 68 L L 68 C A CI ... CS 16
+
+    Bytes that do not start a valid telegram are skipped until the next
+    valid header. Only the beginning of a single incomplete telegram is
+    kept between calls, so the buffer never exceeds MAX_TELEGRAM_LENGTH
+    bytes plus the last chunk.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._discarded = 0
+
+    @property
+    def pending(self) -> int:
+        """bytes of an incomplete telegram waiting for the next chunk"""
+        return len(self._buffer)
+
+    @property
+    def discarded(self) -> int:
+        """bytes skipped while resynchronising"""
+        return self._discarded
+
+    def clear(self) -> None:
+        self._discarded += len(self._buffer)
+        self._buffer.clear()
+
+    def feed(self, chunk: bytes | bytearray | memoryview) -> list:
+        buffer = self._buffer
+        buffer += chunk
+        frames = []
+        size = len(buffer)
+        pos = 0
+        with memoryview(buffer) as view:
+            while pos < size:
+                start = buffer[pos]
+                if start == ACK:
+                    frames.append(bytes(view[pos:pos + 1]))
+                    pos += 1
+                    continue
+                if start == SHORT_START:
+                    if size - pos < 5:
+                        break
+                    if buffer[pos + 4] == STOP and \
+                            (buffer[pos + 1] + buffer[pos + 2]) & 0xFF \
+                            == buffer[pos + 3]:
+                        frames.append(bytes(view[pos:pos + 5]))
+                        pos += 5
+                        continue
+                elif start == LONG_START:
+                    if size - pos < 4:
+                        break
+                    length = buffer[pos + 1]
+                    if buffer[pos + 2] == length and \
+                            buffer[pos + 3] == LONG_START and length >= 3:
+                        end = pos + length + 6
+                        if end > size:
+                            break
+                        checksum = sum(view[pos + 4:end - 2]) & 0xFF
+                        if buffer[end - 1] == STOP and \
+                                buffer[end - 2] == checksum:
+                            frames.append(bytes(view[pos:end]))
+                            pos = end
+                            continue
+                # no valid telegram starts here
+                self._discarded += 1
+                pos += 1
+        del buffer[:pos]
+        return frames
@@ -0,0 +1,158 @@
+import struct
+
+# length of the data field by DIF bits 0-3; None = variable length (LVAR)
+_CODING_LENGTH = (0, 1, 2, 3, 4, 4, 6, 8, 0, 1, 2, 3, 4, None, 6, None)
+DIF_LENGTH = tuple(_CODING_LENGTH[dif & 0x0F] for dif in range(256))
+
+IDLE_FILLER = 0x2F
+PLAIN_TEXT_VIF = 0x7C
+
+# DIF bits 0-3
+_INTEGER = (0x01, 0x02, 0x03, 0x04, 0x06, 0x07)
+_BCD = (0x09, 0x0A, 0x0B, 0x0C, 0x0E)
+_REAL = 0x05
+
+
+def _vif_table() -> tuple:
+    """VIF (without extension bit) -> (name, unit, exponent)"""
+    table = [(None, None, 0)] * 128
+    for n in range(8):
+        table[0x00 | n] = ("energy", "Wh", n - 3)
+        table[0x08 | n] = ("energy", "J", n)
+        table[0x10 | n] = ("volume", "m3", n - 6)
+        table[0x18 | n] = ("mass", "kg", n - 3)
+        table[0x28 | n] = ("power", "W", n - 3)
+        table[0x30 | n] = ("power", "J/h", n)
+        table[0x38 | n] = ("volume_flow", "m3/h", n - 6)
+    for n in range(4):
+        table[0x58 | n] = ("flow_temperature", "C", n - 3)
+        table[0x5C | n] = ("return_temperature", "C", n - 3)
+        table[0x60 | n] = ("temperature_difference", "K", n - 3)
+        table[0x64 | n] = ("external_temperature", "C", n - 3)
+    table[0x78] = ("fabrication_number", None, 0)
+    table[0x79] = ("enhanced_identification", None, 0)
+    table[0x7A] = ("bus_address", None, 0)
+    table[0x7F] = ("manufacturer_specific", None, 0)
+    return tuple(table)
+
+
+VIF_UNITS = _vif_table()
+
+
+class MbusRecordError(Exception):
+    def __str__(self) -> str:
+        return "The data record exceeds the data field"
+
+
+class MbusRecord:
+    """
+    Variable data record
+
+    start, end - position of the record in the data field
+    dif, vif - raw DIF and VIF bytes
+    vife - tuple of raw VIFE bytes
+    storage, tariff, subunit - collected from DIF and all DIFE
+    value - int (integer and BCD coding), float (real) or bytes
+    name, unit, exponent - VIF lookup; value * 10 ** exponent = unit
+    """
+
+    __slots__ = ("start", "end", "dif", "vif", "vife", "storage", "tariff",
+                 "subunit", "value", "name", "unit", "exponent")
+
+    def __init__(self, start: int, end: int, dif: int, vif: int,
+                 vife: tuple, storage: int, tariff: int, subunit: int,
+                 value: int | float | bytes | None) -> None:
+        self.start = start
+        self.end = end
+        self.dif = dif
+        self.vif = vif
+        self.vife = vife
+        self.storage = storage
+        self.tariff = tariff
+        self.subunit = subunit
+        self.value = value
+        self.name, self.unit, self.exponent = VIF_UNITS[vif & 0x7F]
+
+    def __repr__(self) -> str:
+        return f"MbusRecord({self.name}: {self.value} " \
+               f"(tariff: {self.tariff}, storage: {self.storage}))"
+
+    @property
+    def coding(self) -> int:
+        """DIF bits 0-3"""
+        return self.dif & 0x0F
+
+
+def _decode_value(coding: int, data: bytes | memoryview, start: int,
+                  length: int) -> int | float | bytes | None:
+    if coding in _INTEGER:
+        return int.from_bytes(data[start:start + length], "little",
+                              signed=True)
+    if coding in _BCD:
+        value = 0
+        for byte in reversed(data[start:start + length]):
+            value = value * 100 + (byte >> 4) * 10 + (byte & 0x0F)
+        return value
+    if coding == _REAL:
+        return struct.unpack_from("<f", data, start)[0]
+    if length:
+        return bytes(data[start:start + length])
+    return None
+
+
+def decode_records(data: bytes | memoryview) -> list:
+    """
+    Decodes all variable data records of a data field in a single pass.
+    Any number of DIFE/VIFE is walked; records of unknown type are kept
+    with their raw value, so they are skipped by their encoded length.
+    Decoding stops at manufacturer specific data (DIF 0F/1F).
+    """
+    records = []
+    size = len(data)
+    pos = 0
+    try:
+        while pos < size:
+            dif = data[pos]
+            if dif == IDLE_FILLER:
+                pos += 1
+                continue
+            if dif & 0x0F == 0x0F:
+                break
+            start = pos
+            pos += 1
+            storage = (dif >> 6) & 0x01
+            tariff = 0
+            subunit = 0
+            extension = dif & 0x80
+            index = 0
+            while extension:
+                dife = data[pos]
+                storage |= (dife & 0x0F) << (1 + 4 * index)
+                tariff |= ((dife >> 4) & 0x03) << (2 * index)
+                subunit |= ((dife >> 6) & 0x01) << index
+                extension = dife & 0x80
+                index += 1
+                pos += 1
+            vif = data[pos]
+            pos += 1
+            if vif & 0x7F == PLAIN_TEXT_VIF:
+                pos += data[pos] + 1
+            vife = []
+            extension = vif & 0x80
+            while extension:
+                vife.append(data[pos])
+                extension = data[pos] & 0x80
+                pos += 1
+            length = DIF_LENGTH[dif]
+            if length is None:
+                length = data[pos]
+                pos += 1
+            if pos + length > size:
+                raise MbusRecordError
+            value = _decode_value(dif & 0x0F, data, pos, length)
+            pos += length
+            records.append(MbusRecord(start, pos, dif, vif, tuple(vife),
+                                      storage, tariff, subunit, value))
+    except IndexError:
+        raise MbusRecordError
+    return records
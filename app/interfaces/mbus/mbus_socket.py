@@ -1,169 +1,246 @@
+import os
 import socket
+import selectors
 import threading
 import time
 import logging
-from .mbus_frame import MbusFrame
+from collections import deque
+from ..snapshot import Snapshot, BAD
+from .mbus_frame import MbusFrame, SendInitFrame, RequestUserData2Frame, \
+    bytes_to_str
+from .mbus_framer import MbusFramer, ACK, LONG_START, MAX_TELEGRAM_LENGTH
+
+MBUS_BAUDRATE = int(os.environ.get('MBUS_BAUDRATE', 2400))
+MBUS_NETWORK_DELAY = float(os.environ.get('MBUS_NETWORK_DELAY', 0.3))
+MBUS_POLL_INTERVAL = float(os.environ.get('MBUS_POLL_INTERVAL', 30))
 
 log = logging.getLogger()
 
-def bytes_to_str(data: bytes) -> str:
-    string = ""
-    if len(data) < 2:
-        h = hex(data[0])
-        string += f'{h[2:].zfill(2)}'.upper()
-        return string
-    for i in data:
-        h = hex(i)
-        string += f'{h[2:].zfill(2)} '.upper()
-    return string
-
-
-class QuasiSingleton(type):
-    _instances = {}
-    _lock = threading.Lock()
-
-    def __call__(cls, host: str, port: int):
-        key = f"{host}:{port}"
-        if key not in cls._instances:
-            with cls._lock:
-                if key not in cls._instances:
-                    inst = super().__call__(host, port)
-                    cls._instances[key] = inst
-                    return inst
-        return cls._instances[key]
-
-
-class MbusSocket(threading.Thread, metaclass=QuasiSingleton):
-    _socket_instances = []
-
-    @classmethod
-    def exists(cls, host: str, port: int) -> bool:
-        for inst in cls._instances:
-            if inst.host == host and inst.port == port:
-                return True
-        return False
-
-    @classmethod
-    def get_instances(cls) -> object:
-        return cls._socket_instances
+
+def response_timeout(length: int, baudrate: int = MBUS_BAUDRATE) -> float:
+    """
+    Time to wait for a response of `length` bytes: the slave answers
+    within 330 bit times + 50 ms, every byte takes 11 bit times on the bus,
+    plus the delay of the ethernet converter
+    """
+    return (330 + length * 11) / baudrate + 0.05 + MBUS_NETWORK_DELAY
+
+
+class MbusSocket:
+    """
+    Connection to one mbus-ethernet converter, shared by its meters
+    (see MeterRegistry.connection)
+    """
 
     def __init__(self, host: str = 'localhost', port: int = 10001) -> None:
         self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self._meters = []
+        # {address: meter}
+        self._meters = {}
+        self._selector = selectors.DefaultSelector()
         self._connected = False
-        self._buffer = b""
+        self._framer = MbusFramer()
+        self._frames = deque()
+        self._cycle_time = None
+        self._last_poll = {}
+        # unix time the last forced cycle started
+        self._forced_at = None
+        self._scheduler = None
+        self._job = None
+        self._bus_lock = threading.Lock()
         self.host = host
         self.port = port
-        threading.Thread.__init__(self)
-        threading.Thread.daemon = True
-        MbusSocket._socket_instances.append(self)
         log.debug(f"[Mbus Socket] Socket created ({self})")
 
     def __str__(self) -> str:
         return f"MbusSocket({self.host}:{self.port})"
 
+    @property
+    def cycle_time(self) -> float | None:
+        """duration of the last bus cycle in seconds"""
+        return self._cycle_time
+
+    @property
+    def interval(self) -> float:
+        """bus cycle period: the shortest polling interval of its meters"""
+        return min((meter.interval for meter in self._meters.values()),
+                   default=MBUS_POLL_INTERVAL)
+
     def connect(self) -> None:
         try:
             self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._socket.settimeout(5)
             self._socket.connect((self.host, self.port))
         except Exception as exception:
             log.debug(exception)
             log.error(f"[Mbus] Socket can't connect to "
                       f"{self.host}:{self.port}")
         else:
-            self._socket.settimeout(5)
+            self._selector.register(self._socket, selectors.EVENT_READ)
+            self._framer.clear()
+            self._frames.clear()
             self._connected = True
             log.debug(f"[Mbus] Socket connected to {self.host}:{self.port}")
 
     def close(self) -> None:
         try:
+            if self._selector.get_map().get(self._socket) is not None:
+                self._selector.unregister(self._socket)
             self._socket.close()
         except Exception as exception:
             log.exception(exception)
         else:
             self._connected = False
 
-    def receive(self) -> None:
-        try:
-            data = self.recv(1024)
-        except socket.timeout:
-            log.warning(f"[Mbus] Request timed out ({self.host}:{self.port})")
-            pass
-        else:
-            self._buffer += data
+    def receive(self, start: int, timeout: float) -> bytes | None:
+        """
+        returns the first telegram beginning with `start`
+        or None when the timeout expires
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            while self._frames:
+                telegram = self._frames.popleft()
+                if telegram[0] == start:
+                    return telegram
+                if telegram[0] == LONG_START:
+                    # late response to an earlier request
+                    self._dispatch(telegram)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                log.warning(f"[Mbus] Request timed out "
+                            f"({self.host}:{self.port})")
+                return None
+            if self._selector.select(remaining):
+                self._read()
+
+    def _read(self) -> None:
+        chunk = self.recv(1024)
+        if not chunk:
+            raise ConnectionError("connection closed by the converter")
+        self._frames.extend(self._framer.feed(chunk))
+
+    def _discard_input(self) -> None:
+        while self._selector.select(0):
+            self._read()
+        while self._frames:
+            telegram = self._frames.popleft()
+            if telegram[0] == LONG_START:
+                self._dispatch(telegram)
 
     def recv(self, bufsize: int | None) -> bytes:
         return self._socket.recv(bufsize)
 
-    def send(self, data: bytes | bytearray) -> int:
-        return self._socket.send(data)
+    def send(self, data: bytes | bytearray) -> None:
+        self._socket.sendall(data)
 
-    def _update_meters_data(self) -> None:
-        if not self._buffer:
+    def _dispatch(self, telegram: bytes) -> None:
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(f"[MbusSocket] {bytes_to_str(telegram)}")
+        try:
+            frame = MbusFrame(telegram)
+        except Exception as exception:
+            log.exception(exception)
             return
-        slicer = _DataSlicer(self._buffer)
-        for frame in slicer.frames:
-            meter = self.get_meter(frame.address)
-            if meter is None:
-                continue
-            meter.data = frame.export_data()
-        log.debug(f"[MbusSocket._buffer] {bytes_to_str(self._buffer)}")
-        self._buffer = b""
+        meter = self.get_meter(frame.address)
+        if meter is None:
+            return
+        snapshot = Snapshot.following(meter.snapshot, frame.export_data(),
+                                      time.time())
+        meter.snapshot = snapshot
+        meter.history.record(snapshot)
+        if snapshot.quality != BAD:
+            meter.acquired_at = snapshot.acquired_at
 
     def append(self, meter: object) -> None:
-        self._meters.append(meter)
-
-    def get_meter(self, address: int) -> object | None:
-        for meter in self._meters:
-            if meter.address == address:
-                return meter
-        return None
-
-    def start(self):
-        try:
-            super(MbusSocket, self).start()
-        except RuntimeError:
-            pass
+        self._meters[meter.address] = meter
+        if self._job is not None:
+            self._job.interval = self.interval
 
-    def run(self):
-        while True:
-            while not self._connected:
-                self.connect()
-                time.sleep(1)
-            for meter in self._meters:
-                meter.send_commands()
-                time.sleep(1)
-                self.receive()
-                time.sleep(1)
-            self._update_meters_data()
-            time.sleep(30)
-
-
-class _DataSlicer:
-    def __init__(self, data: bytes) -> None:
-        self.data = data
-        self._frames = self._find_frames()
+    def remove(self, meter: object) -> None:
+        if self._meters.get(meter.address) is meter:
+            del self._meters[meter.address]
+            self._last_poll.pop(meter.address, None)
+        if self._job is not None and self._meters:
+            self._job.interval = self.interval
 
     @property
-    def frames(self):
-        if self._frames:
-            return self._frames
-        else:
-            self._find_frames()
+    def empty(self) -> bool:
+        return not self._meters
 
-    def _find_frames(self):
-        frames = []
-        for i in range(len(self.data)):
-            if i + 1 > len(self.data):
-                break
-            str_val = bytes_to_str(self.data[i:i+1])
-            if str_val != "68":
-                continue
-            if self.data[i+1:i+2] != self.data[i+2:i+3]:
+    def get_meter(self, address: int) -> object | None:
+        return self._meters.get(address)
+
+    def start(self, scheduler: object) -> None:
+        """scheduler - PollScheduler running the bus cycles"""
+        if self._job is None:
+            self._scheduler = scheduler
+            self._job = scheduler.add(str(self), self.poll, self.interval)
+        scheduler.start()
+
+    def stop(self) -> None:
+        if self._job is not None:
+            self._scheduler.cancel(self._job)
+            self._job = None
+        with self._bus_lock:
+            if self._connected:
+                self.close()
+
+    def poll(self) -> None:
+        """one bus cycle; meters with a longer interval are skipped
+        until they are due"""
+        with self._bus_lock:
+            self._cycle(force=False)
+
+    def acquire(self, since: float) -> None:
+        """
+        reads every meter in one cycle unless all of them were read
+        after `since` or a forced cycle started after it, e.g. for
+        another meter of this converter; a meter that does not answer
+        is not asked again in the same acquisition
+        """
+        with self._bus_lock:
+            if self._forced_at is not None and self._forced_at >= since:
+                return
+            if all(meter.acquired_at is not None
+                   and meter.acquired_at >= since
+                   for meter in self._meters.values()):
+                return
+            self._forced_at = time.time()
+            self._cycle(force=True)
+
+    def _cycle(self, force: bool) -> None:
+        if not self._connected:
+            self.connect()
+            if not self._connected:
+                return
+        cycle_start = time.monotonic()
+        # tolerance for the jitter of the cycle start
+        tolerance = self.interval / 2
+        for meter in list(self._meters.values()):
+            last_poll = self._last_poll.get(meter.address)
+            if not force and last_poll is not None and \
+                    cycle_start - last_poll < meter.interval - tolerance:
                 continue
-            length = int.from_bytes(self.data[i+1:i+2], "big") + 6
-            frame = MbusFrame(self.data[i:i+length])
-            frames.append(frame)
-            self.data = self.data[length:]
-            log.debug(f"[MbusSocket._find_frames]: {bytes_to_str(self.data)}")
-        return frames
+            try:
+                self._request(meter)
+            except OSError as exception:
+                log.debug(exception)
+                log.error(f"[Mbus] Connection lost "
+                          f"({self.host}:{self.port})")
+                self.close()
+                break
+            self._last_poll[meter.address] = cycle_start
+        self._cycle_time = time.monotonic() - cycle_start
+        log.debug(f"[Mbus] Bus cycle of {self} took "
+                  f"{self._cycle_time:.2f} s")
+
+    def _request(self, meter: object) -> None:
+        """SND_NKE, wait for ACK, REQ_UD2, wait for RSP_UD"""
+        self._discard_input()
+        self.send(SendInitFrame(meter.address).frame)
+        self.receive(ACK, response_timeout(1))
+        self.send(RequestUserData2Frame(meter.address).frame)
+        telegram = self.receive(LONG_START,
+                                response_timeout(MAX_TELEGRAM_LENGTH))
+        if telegram is not None:
+            self._dispatch(telegram)
@@ -1,24 +1,41 @@
-from pyModbusTCP.client import ModbusClient
 import threading
 import time
 import logging
-from .modbus_frame import ImportedActiveEnergyFrame, ActivePowerFrame
+from meter_registry import MeterRegistry
+from ..snapshot import Snapshot, BAD
+from ..ring_buffer import SampleHistory
+from .modbus_frame import create_frames
+from .modbus_gateway import ModbusGateway
+from .read_plan import ReadPlan
 
 log = logging.getLogger()
 
 
-class Modbus(threading.Thread):
+class Modbus:
+    _default_interval = 1
+
     def __init__(self, meter_id: int = 0, name: None | str = None,
-                 host: str = 'localhost', port: int = 502):
-        threading.Thread.__init__(self)
-        threading.Thread.daemon = True
-        self._client = None
+                 host: str = 'localhost', port: int = 502,
+                 address: int | None = None, interval: float | None = None):
+        self._gateway = MeterRegistry().connection("modbus", host, port,
+                                                   ModbusGateway)
         self._connected = False
         self._meter_id = meter_id
         self._name = name
         self._host = host
         self._port = port
-        self._data = []
+        self._address = address
+        self._interval = interval or self._default_interval
+        self._scheduler = None
+        self._job = None
+        self._poll_lock = threading.Lock()
+        self._acquired_at = None
+        self._snapshot = None
+        self._history = SampleHistory.for_interval(self._interval)
+        self._plan = ReadPlan(create_frames())
+
+    def __str__(self) -> str:
+        return f"Modbus({self._host}:{self._port} [{self.unit_id}])"
 
     @property
     def meter_id(self):
@@ -37,56 +54,96 @@ class Modbus(threading.Thread):
         return self._port
 
     @property
-    def data(self):
-        return self._data
+    def address(self):
+        return self._address
+
+    @property
+    def unit_id(self) -> int:
+        """address of the meter behind a gateway; 1 for direct connection"""
+        return 1 if self._address is None else self._address
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    @property
+    def snapshot(self) -> Snapshot | None:
+        """result of the last poll"""
+        return self._snapshot
+
+    @property
+    def history(self) -> SampleHistory:
+        """samples of the last HISTORY_MINUTES at full resolution"""
+        return self._history
+
+    @property
+    def data(self) -> tuple:
+        snapshot = self._snapshot
+        return () if snapshot is None else snapshot.values
+
+    @property
+    def acquired_at(self) -> float | None:
+        """unix time of the last successful read"""
+        return self._acquired_at
 
     @classmethod
     def from_model(cls, model):
         return cls(meter_id=model.meter_id, name=model.name,
-                   host=model.host, port=model.port)
+                   host=model.host, port=model.port, address=model.address,
+                   interval=model.interval)
 
-    def run(self) -> None:
-        while True:
-            while not self._connected:
-                self._connect()
-                time.sleep(1)
+    def start(self, scheduler: object) -> None:
+        """scheduler - PollScheduler running the polls"""
+        if self._job is None:
+            self._scheduler = scheduler
+            self._job = scheduler.add(f"meter_{self._meter_id}", self.poll,
+                                      self._interval)
+        scheduler.start()
+
+    def stop(self) -> None:
+        """
+        stops polling; the gateway connection is closed with the last
+        meter behind it (the meter is already out of the registry)
+        """
+        if self._job is not None:
+            self._scheduler.cancel(self._job)
+            self._job = None
+        registry = MeterRegistry()
+        if not registry.by_endpoint(self._host, self._port):
+            registry.remove_connection("modbus", self._host, self._port)
+            self._gateway.close()
+
+    def poll(self) -> None:
+        with self._poll_lock:
+            if not self._connected and not self._connect():
+                return
             self._get_data()
-            time.sleep(1)
-
-    def _create_client(self) -> bool:
-        try:
-            self._client = ModbusClient()
-            self._client.host(self._host)
-            self._client.port(self._port)
-            self._client.unit_id(1)
-            # self._client.auto_open(True)
-            self._client.timeout(3)
-        except Exception as exception:
-            log.exception(exception)
-            return False
-        else:
-            log.debug(f"[meter_{self._meter_id}][Modbus] Client created")
-            return True
+
+    def acquire(self, since: float) -> None:
+        """reads the meter now unless it was read after `since`"""
+        if self._acquired_at is not None and self._acquired_at >= since:
+            return
+        self.poll()
 
     def _connect(self) -> bool:
-        if self._client is None:
-            if not self._create_client():
-                self._connected = False
-                return False
-        if not self._client.is_open():
-            if not self._client.open():
-                self._connected = False
-                return False
-        log.debug(f"[meter_{self._meter_id}][Modbus] "
-                  f"Connected to {self._host}:{self._port}")
-        self._connected = True
-        return True
+        self._connected = self._gateway.connect()
+        if self._connected:
+            log.debug(f"[meter_{self._meter_id}][Modbus] "
+                      f"Connected to {self._host}:{self._port}")
+        return self._connected
+
+    def _read_registers(self, address: int, count: int) -> list | None:
+        return self._gateway.read_holding_registers(self.unit_id, address,
+                                                    count)
 
     def _get_data(self):
-        self._data = []
-        imported_active_energy = ImportedActiveEnergyFrame(self._client)
-        active_power = ActivePowerFrame(self._client)
-        imported_active_energy.read_registers()
-        active_power.read_registers()
-        self._data.append(imported_active_energy.export())
-        self._data.append(active_power.export())
+        self._plan.read(self._read_registers)
+        snapshot = Snapshot.following(
+            self._snapshot, [frame.export() for frame in self._plan.frames],
+            time.time())
+        self._snapshot = snapshot
+        self._history.record(snapshot)
+        if snapshot.quality != BAD:
+            self._acquired_at = snapshot.acquired_at
+        if not self._gateway.is_open():
+            self._connected = False
@@ -0,0 +1,445 @@
+import os
+import time
+import random
+import asyncio
+import struct
+import threading
+import logging
+from meter_registry import MeterRegistry
+from singleton import Singleton
+from ..snapshot import Snapshot, BAD
+from ..ring_buffer import SampleHistory
+from .modbus_frame import create_frames
+from .read_plan import ReadPlan
+
+MODBUS_HOST_CONCURRENCY = int(os.environ.get('MODBUS_HOST_CONCURRENCY', 4))
+# requests in flight per connection
+MODBUS_PIPELINE_WINDOW = int(os.environ.get('MODBUS_PIPELINE_WINDOW', 1))
+# the first poll of a meter is delayed by up to this part of its interval
+POLL_JITTER = float(os.environ.get('POLL_JITTER', 0.1))
+
+log = logging.getLogger()
+
+
+class ModbusExceptionResponse(Exception):
+    def __init__(self, function: int, code: int) -> None:
+        self.function = function
+        self.code = code
+
+    def __str__(self) -> str:
+        return f"Modbus exception {self.code} for function {self.function}"
+
+
+class AsyncModbusClient:
+    """
+    Modbus TCP client (Read Holding Registers) on asyncio streams
+
+    MBAP header: transaction id (2), protocol id (2), length (2), unit id (1)
+
+    One client is shared by every meter behind a gateway: requests are
+    addressed by unit id, and a lost connection is reopened once for the
+    whole group. Up to `window` requests are kept in flight on the
+    connection and the responses are matched by transaction id;
+    window = 1 sends the next request only after the previous response.
+    """
+
+    _read_holding_registers = 0x03
+    _reconnect_interval = 1
+
+    def __init__(self, host: str = 'localhost', port: int = 502,
+                 unit_id: int = 1, timeout: float = 3,
+                 window: int = MODBUS_PIPELINE_WINDOW) -> None:
+        self._host = host
+        self._port = port
+        self._unit_id = unit_id
+        self._timeout = timeout
+        self._window = window
+        self._reader = None
+        self._writer = None
+        self._receiver = None
+        self._transaction_id = 0
+        self._pending = {}
+        self._slots = asyncio.Semaphore(window)
+        self._connect_lock = asyncio.Lock()
+        self._last_attempt = 0.0
+
+    @property
+    def host(self) -> str:
+        return self._host
+
+    @property
+    def port(self) -> int:
+        return self._port
+
+    @property
+    def window(self) -> int:
+        return self._window
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    def is_open(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def open(self) -> bool:
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self._host, self._port),
+                self._timeout)
+        except (OSError, asyncio.TimeoutError) as exception:
+            log.debug(exception)
+            self._reader = self._writer = None
+            return False
+        self._receiver = asyncio.create_task(self._receive(self._reader))
+        return True
+
+    async def ensure_open(self) -> bool:
+        async with self._connect_lock:
+            if self.is_open():
+                return True
+            if time.monotonic() - self._last_attempt < \
+                    self._reconnect_interval:
+                return False
+            self._last_attempt = time.monotonic()
+            if not await self.open():
+                return False
+            log.debug(f"[Modbus] Connected to {self._host}:{self._port}")
+            return True
+
+    async def close(self) -> None:
+        if self._writer is None:
+            return
+        writer = self._writer
+        self._reader = self._writer = None
+        if self._receiver is not None:
+            self._receiver.cancel()
+            self._receiver = None
+        self._fail_pending(ConnectionError("connection closed"))
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+    async def read_holding_registers(self, address: int, count: int,
+                                     unit_id: int | None = None
+                                     ) -> list | None:
+        """returns list of registers or None on error (like pyModbusTCP)"""
+        if unit_id is None:
+            unit_id = self._unit_id
+        async with self._slots:
+            try:
+                pdu = await self._request(unit_id, address, count)
+            except ModbusExceptionResponse as exception:
+                log.debug(f"[Modbus] {self._host}:{self._port} "
+                          f"[{unit_id}] {exception}")
+                return None
+            except (OSError, asyncio.TimeoutError) as exception:
+                log.debug(f"[Modbus] {self._host}:{self._port} "
+                          f"[{unit_id}] {exception!r}")
+                await self.close()
+                return None
+        if len(pdu) < 2 or pdu[0] != self._read_holding_registers \
+                or pdu[1] != len(pdu) - 2 or pdu[1] != 2 * count:
+            log.debug(f"[Modbus] {self._host}:{self._port} [{unit_id}] "
+                      f"malformed response {pdu.hex()}")
+            return None
+        return list(struct.unpack(f">{count}H", pdu[2:]))
+
+    async def _request(self, unit_id: int, address: int,
+                       count: int) -> bytes:
+        if not self.is_open():
+            raise ConnectionError("client is not connected")
+        transaction_id = self._next_transaction_id()
+        response = asyncio.get_running_loop().create_future()
+        self._pending[transaction_id] = response
+        try:
+            self._writer.write(struct.pack(
+                ">HHHBBHH", transaction_id, 0, 6, unit_id,
+                self._read_holding_registers, address, count))
+            await self._writer.drain()
+            return await asyncio.wait_for(response, self._timeout)
+        finally:
+            self._pending.pop(transaction_id, None)
+
+    def _next_transaction_id(self) -> int:
+        while True:
+            self._transaction_id = (self._transaction_id + 1) & 0xFFFF
+            if self._transaction_id not in self._pending:
+                return self._transaction_id
+
+    async def _receive(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                header = await reader.readexactly(7)
+                transaction_id, _, length, _ = struct.unpack(">HHHB",
+                                                             header)
+                pdu = await reader.readexactly(length - 1)
+                # responses to requests abandoned after a timeout
+                # are not pending anymore and are skipped
+                response = self._pending.get(transaction_id)
+                if response is None or response.done():
+                    continue
+                if len(pdu) > 1 and pdu[0] & 0x80:
+                    response.set_exception(
+                        ModbusExceptionResponse(pdu[0] & 0x7F, pdu[1]))
+                else:
+                    response.set_result(pdu)
+        except (OSError, asyncio.IncompleteReadError) as exception:
+            self._fail_pending(ConnectionError(repr(exception)))
+            if self._reader is reader:
+                self._writer.close()
+
+    def _fail_pending(self, exception: Exception) -> None:
+        for response in self._pending.values():
+            if not response.done():
+                response.set_exception(exception)
+
+
+class AsyncModbus:
+    """Modbus meter polled by the shared ModbusEngine event loop"""
+
+    _default_interval = 1
+
+    def __init__(self, meter_id: int = 0, name: None | str = None,
+                 host: str = 'localhost', port: int = 502,
+                 address: int | None = None, interval: float | None = None):
+        self._engine = ModbusEngine()
+        self._meter_id = meter_id
+        self._name = name
+        self._host = host
+        self._port = port
+        self._address = address
+        self._interval = interval or self._default_interval
+        self._missed = 0
+        self._acquired_at = None
+        self._snapshot = None
+        self._history = SampleHistory.for_interval(self._interval)
+        self._plan = ReadPlan(create_frames())
+        self._engine.append(self)
+
+    def __str__(self) -> str:
+        return f"AsyncModbus({self._host}:{self._port} [{self.unit_id}])"
+
+    @property
+    def meter_id(self):
+        return self._meter_id
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def host(self):
+        return self._host
+
+    @property
+    def port(self):
+        return self._port
+
+    @property
+    def address(self):
+        return self._address
+
+    @property
+    def unit_id(self) -> int:
+        """address of the meter behind a gateway; 1 for direct connection"""
+        return 1 if self._address is None else self._address
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    @property
+    def missed(self) -> int:
+        """deadlines skipped because a poll took longer than the interval"""
+        return self._missed
+
+    @property
+    def snapshot(self) -> Snapshot | None:
+        """result of the last poll"""
+        return self._snapshot
+
+    @property
+    def history(self) -> SampleHistory:
+        """samples of the last HISTORY_MINUTES at full resolution"""
+        return self._history
+
+    @property
+    def data(self) -> tuple:
+        snapshot = self._snapshot
+        return () if snapshot is None else snapshot.values
+
+    @property
+    def acquired_at(self) -> float | None:
+        """unix time of the last successful read"""
+        return self._acquired_at
+
+    @classmethod
+    def from_model(cls, model):
+        return cls(meter_id=model.meter_id, name=model.name,
+                   host=model.host, port=model.port, address=model.address,
+                   interval=model.interval)
+
+    def start(self, scheduler: object | None = None) -> None:
+        """polled by the event loop of ModbusEngine, not by scheduler"""
+        self._engine.start()
+
+    def stop(self) -> None:
+        """
+        stops polling; the client of the endpoint is closed with the last
+        meter behind it (the meter is already out of the registry)
+        """
+        self._engine.remove(self)
+        if not MeterRegistry().by_endpoint(self._host, self._port):
+            self._engine.drop_client(self._host, self._port)
+
+    async def poll(self) -> None:
+        loop = asyncio.get_running_loop()
+        client = self._engine.client(self._host, self._port)
+        deadline = loop.time() + random.uniform(0, POLL_JITTER
+                                                * self._interval)
+        await asyncio.sleep(deadline - loop.time())
+        while True:
+            while not await client.ensure_open():
+                await asyncio.sleep(1)
+                deadline = loop.time()
+            try:
+                async with self._engine.host_limit(self._host):
+                    await self._get_data(client)
+            except Exception as exception:
+                # the task is never restarted, so it must not end here
+                log.error(exception, exc_info=exception)
+            deadline += self._interval
+            late = loop.time() - deadline
+            if late >= 0:
+                skipped = int(late // self._interval) + 1
+                self._missed += skipped
+                deadline += skipped * self._interval
+                log.warning(f"[meter_{self._meter_id}][Modbus] Poll overran "
+                            f"its interval of {self._interval} s")
+            await asyncio.sleep(deadline - loop.time())
+
+    def acquire(self, since: float) -> None:
+        """
+        reads the meter now on the engine loop unless it was read
+        after `since`; blocks the calling thread
+        """
+        loop = self._engine.loop
+        if loop is None or (self._acquired_at is not None
+                            and self._acquired_at >= since):
+            return
+        asyncio.run_coroutine_threadsafe(self._acquire(), loop).result()
+
+    async def _acquire(self) -> None:
+        client = self._engine.client(self._host, self._port)
+        if not await client.ensure_open():
+            return
+        async with self._engine.host_limit(self._host):
+            await self._get_data(client)
+
+    async def _get_data(self, client: AsyncModbusClient) -> None:
+        # with a pipeline window > 1 the blocks are requested at once
+        blocks_regs = await asyncio.gather(*[
+            client.read_holding_registers(block.start, block.count,
+                                          self.unit_id)
+            for block in self._plan.blocks])
+        self._plan.decode(blocks_regs)
+        snapshot = Snapshot.following(
+            self._snapshot, [frame.export() for frame in self._plan.frames],
+            time.time())
+        self._snapshot = snapshot
+        self._history.record(snapshot)
+        if snapshot.quality != BAD:
+            self._acquired_at = snapshot.acquired_at
+
+
+class ModbusEngine(threading.Thread, metaclass=Singleton):
+    """
+    Single event loop driving every AsyncModbus meter,
+    with a limit of concurrent requests per host.
+    """
+
+    def __init__(self, host_concurrency: int = MODBUS_HOST_CONCURRENCY):
+        threading.Thread.__init__(self)
+        threading.Thread.daemon = True
+        self._meters_lock = threading.Lock()
+        self._host_concurrency = host_concurrency
+        self._meters = []
+        self._host_limits = {}
+        # {meter: its polling task}
+        self._tasks = {}
+        self._loop = None
+
+    def __str__(self) -> str:
+        return f"ModbusEngine({len(self._meters)} meters)"
+
+    @property
+    def meters(self) -> list:
+        return self._meters
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop | None:
+        return self._loop
+
+    def append(self, meter: AsyncModbus) -> None:
+        with self._meters_lock:
+            self._meters.append(meter)
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._spawn, meter)
+
+    def remove(self, meter: AsyncModbus) -> None:
+        with self._meters_lock:
+            if meter in self._meters:
+                self._meters.remove(meter)
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._cancel, meter)
+
+    def client(self, host: str, port: int) -> AsyncModbusClient:
+        """connection shared by every meter behind host:port"""
+        return MeterRegistry().connection(
+            "modbus_async", host, port,
+            lambda host, port: AsyncModbusClient(host, port, timeout=3))
+
+    def drop_client(self, host: str, port: int) -> None:
+        client = MeterRegistry().remove_connection("modbus_async", host,
+                                                   port)
+        if client is not None and self._loop is not None:
+            asyncio.run_coroutine_threadsafe(client.close(), self._loop)
+
+    def host_limit(self, host: str) -> asyncio.Semaphore:
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(
+                self._host_concurrency)
+        return self._host_limits[host]
+
+    def start(self) -> None:
+        try:
+            super(ModbusEngine, self).start()
+        except RuntimeError:
+            pass
+
+    def run(self) -> None:
+        log.debug("[Modbus Engine] Event loop started")
+        loop = asyncio.new_event_loop()
+        with self._meters_lock:
+            self._loop = loop
+            for meter in self._meters:
+                self._loop.call_soon(self._spawn, meter)
+        self._loop.run_forever()
+
+    def _spawn(self, meter: AsyncModbus) -> None:
+        task = self._loop.create_task(meter.poll())
+        task.add_done_callback(self._on_done)
+        self._tasks[meter] = task
+
+    def _cancel(self, meter: AsyncModbus) -> None:
+        task = self._tasks.pop(meter, None)
+        if task is not None:
+            task.cancel()
+
+    @staticmethod
+    def _on_done(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            log.error(task.exception(), exc_info=task.exception())
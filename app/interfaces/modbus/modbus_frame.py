@@ -1,33 +1,30 @@
-from pyModbusTCP.client import ModbusClient
-import struct
 import logging
 from . import constants as const
+from .register_codec import register_count, unpack
 
 log = logging.getLogger()
 
 
-def dec_to_bin(value) -> str:
-    bin_val = f"{value:b}"
-    bin_val = bin_val.zfill(16)
-    return bin_val
-
-
-def bin_to_double(value) -> float:
-    hx = hex(int(value, 2))
-    return struct.unpack("d", struct.pack("q", int(hx, 16)))[0]
-
-
-def bin_to_float(binary) -> float:
-    return struct.unpack('!f', struct.pack('!I', int(binary, 2)))[0]
+def create_frames(client: object | None = None) -> list:
+    """frames of every tariff and phase mapped in constants"""
+    frames = []
+    for tariff, offsets in enumerate(const.IMPORTED_ACTIVE_ENERGY):
+        for phase in range(len(offsets)):
+            frames.append(ImportedActiveEnergyFrame(client, tariff, phase))
+    for phase in range(len(const.ACTIVE_POWER)):
+        frames.append(ActivePowerFrame(client, phase))
+    return frames
 
 
 class BaseFrame:
-    def __init__(self, client: ModbusClient) -> None:
+    def __init__(self, client: object | None) -> None:
         self._client = client
         self._frame = None
         self._name = None
         self._register_offset = None
         self._register_range = None
+        self._register_type = None
+        self._word_order = "big"
         self._value = None
 
     @property
@@ -46,13 +43,41 @@ class BaseFrame:
     def register_range(self):
         return self._register_range
 
+    @property
+    def register_type(self) -> str:
+        return self._register_type
+
+    @property
+    def word_order(self) -> str:
+        return self._word_order
+
     @property
     def value(self) -> float:
         return self._value
 
+    def read_registers(self) -> None:
+        reg_offset = self._register_offset
+        reg_range = self._register_range
+        if reg_offset is None or reg_range is None:
+            self._value = None
+            return
+        regs = self._client.read_holding_registers(reg_offset, reg_range)
+        self.decode(regs)
+
+    def decode(self, regs: list | None) -> None:
+        if not regs:
+            self._value = None
+            return
+        self.decode_value(unpack(regs, self._register_type,
+                                 self._word_order))
+
+    def decode_value(self, raw: int | float | None) -> None:
+        """sets the value from the raw register value (Wh, W -> kWh, kW)"""
+        self._value = None if raw is None else raw / 1000
+
 
 class EnergyFrame(BaseFrame):
-    def __init__(self, client: ModbusClient, tariff: int = 0,
+    def __init__(self, client: object | None, tariff: int = 0,
                  phase: int = 0) -> None:
         super().__init__(client)
         self._tariff = tariff
@@ -95,25 +120,14 @@ class EnergyFrame(BaseFrame):
         }
         return data
 
-    def read_registers(self) -> None:
-        reg_offset = self._register_offset
-        reg_range = self._register_range
-        if reg_offset is None or reg_range is None:
-            self._value = None
-            return
-        regs = self._client.read_holding_registers(reg_offset, reg_range)
-        bin_val = ""
-        for x in range(len(regs)):
-            bin_val += dec_to_bin(regs[x])
-        self._value = bin_to_double(bin_val) / 1000
-
 
 class ImportedActiveEnergyFrame(EnergyFrame):
-    def __init__(self, client: ModbusClient, tariff: int = 0,
+    def __init__(self, client: object | None, tariff: int = 0,
                  phase: int = 0) -> None:
         super().__init__(client, tariff, phase)
         self._name = "imported_active_energy"
-        self._register_range = 4
+        self._register_type = "float64"
+        self._register_range = register_count(self._register_type)
         self._register_offset = self._get_offset()
 
     def _get_offset(self) -> int:
@@ -124,11 +138,13 @@ class ImportedActiveEnergyFrame(EnergyFrame):
 
 
 class ActivePowerFrame(BaseFrame):
-    def __init__(self, client: ModbusClient, phase: int = 0) -> None:
+    def __init__(self, client: object | None,
+                 phase: int = 0) -> None:
         super().__init__(client)
         self._name = "active_power"
         self._phase = phase
-        self._register_range = 2
+        self._register_type = "float32"
+        self._register_range = register_count(self._register_type)
         self._register_offset = self._get_offset()
 
     @property
@@ -159,15 +175,3 @@ class ActivePowerFrame(BaseFrame):
             "value": self._value
         }
         return data
-
-    def read_registers(self) -> None:
-        reg_offset = self._register_offset
-        reg_range = self._register_range
-        if reg_offset is None or reg_range is None:
-            self._value = None
-            return
-        regs = self._client.read_holding_registers(reg_offset, reg_range)
-        bin_val = ""
-        for x in range(len(regs)):
-            bin_val += dec_to_bin(regs[x])
-        self._value = bin_to_float(bin_val) / 1000
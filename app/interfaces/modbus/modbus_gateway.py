@@ -0,0 +1,81 @@
+from pyModbusTCP.client import ModbusClient
+import threading
+import time
+import logging
+
+log = logging.getLogger()
+
+
+class ModbusGateway:
+    """
+    One Modbus TCP connection per host:port shared by every meter behind
+    it (see MeterRegistry.connection); requests are serialised and
+    addressed by unit id. A lost connection is reopened once for
+    the whole group.
+    """
+
+    _reconnect_interval = 1
+
+    def __init__(self, host: str = 'localhost', port: int = 502) -> None:
+        self._client = None
+        self._lock = threading.Lock()
+        self._last_attempt = 0.0
+        self.host = host
+        self.port = port
+
+    def __str__(self) -> str:
+        return f"ModbusGateway({self.host}:{self.port})"
+
+    def is_open(self) -> bool:
+        return self._client is not None and self._client.is_open()
+
+    def connect(self) -> bool:
+        with self._lock:
+            return self._connect()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+            log.debug(f"[Modbus] Connection to {self} closed")
+
+    def read_holding_registers(self, unit_id: int, address: int,
+                               count: int) -> list | None:
+        with self._lock:
+            if not self._connect():
+                return None
+            self._client.unit_id(unit_id)
+            regs = self._client.read_holding_registers(address, count)
+            if regs is None and not self._client.is_open():
+                log.warning(f"[Modbus] Connection to {self} lost")
+            return regs
+
+    def _create_client(self) -> bool:
+        try:
+            self._client = ModbusClient()
+            self._client.host(self.host)
+            self._client.port(self.port)
+            self._client.timeout(3)
+        except Exception as exception:
+            log.exception(exception)
+            self._client = None
+            return False
+        else:
+            log.debug(f"[Modbus] Client created ({self})")
+            return True
+
+    def _connect(self) -> bool:
+        if self.is_open():
+            return True
+        # meters waiting on the lock do not retry a connection
+        # that has just failed
+        if time.monotonic() - self._last_attempt < self._reconnect_interval:
+            return False
+        self._last_attempt = time.monotonic()
+        if self._client is None and not self._create_client():
+            return False
+        if not self._client.open():
+            return False
+        log.debug(f"[Modbus] Connected to {self.host}:{self.port}")
+        return True
@@ -0,0 +1,113 @@
+import os
+import logging
+from .register_codec import unpack_block
+
+# PAC2200 limit of registers per Read Holding Registers request
+MODBUS_MAX_REGISTERS = int(os.environ.get('MODBUS_MAX_REGISTERS', 125))
+# unused registers allowed between two merged frames
+MODBUS_MAX_GAP = int(os.environ.get('MODBUS_MAX_GAP', 125))
+
+log = logging.getLogger()
+
+
+class ReadBlock:
+    def __init__(self, start: int, count: int, frames: list) -> None:
+        self.start = start
+        self.count = count
+        self.frames = frames
+
+    def __repr__(self) -> str:
+        return f"ReadBlock({self.start}, {self.count})"
+
+    @property
+    def layout(self) -> tuple | None:
+        """
+        ((offset in block, register type), ...) or None when the frames
+        overlap or differ in word order and have to be decoded one by one
+        """
+        layout = []
+        position = 0
+        for frame in self.frames:
+            offset = frame.register_offset - self.start
+            if getattr(frame, "register_type", None) is None or \
+                    offset < position or \
+                    frame.word_order != self.frames[0].word_order:
+                return None
+            layout.append((offset, frame.register_type))
+            position = offset + frame.register_range
+        return tuple(layout)
+
+
+class ReadPlan:
+    """
+    Merges the registers of all frames into the fewest contiguous
+    Read Holding Registers requests and decodes every frame
+    from the blocks read.
+    """
+
+    def __init__(self, frames: list, max_count: int = MODBUS_MAX_REGISTERS,
+                 max_gap: int = MODBUS_MAX_GAP) -> None:
+        self._frames = frames
+        self._blocks = self._plan(frames, max_count, max_gap)
+        self._layouts = [block.layout for block in self._blocks]
+
+    @property
+    def frames(self) -> list:
+        return self._frames
+
+    @property
+    def blocks(self) -> list:
+        return self._blocks
+
+    @staticmethod
+    def _plan(frames: list, max_count: int, max_gap: int) -> list:
+        blocks = []
+        block = None
+        for frame in sorted(frames, key=lambda f: f.register_offset):
+            start = frame.register_offset
+            end = start + frame.register_range
+            if block is not None and \
+                    start - (block.start + block.count) <= max_gap and \
+                    max(end, block.start + block.count) - block.start \
+                    <= max_count:
+                block.count = max(end, block.start + block.count) \
+                    - block.start
+                block.frames.append(frame)
+                continue
+            block = ReadBlock(start, end - start, [frame])
+            blocks.append(block)
+        return blocks
+
+    def read(self, read_registers) -> None:
+        """read_registers(address, count) -> list | None"""
+        self.decode([read_registers(block.start, block.count)
+                     for block in self._blocks])
+
+    def decode(self, blocks_regs: list) -> None:
+        """
+        decodes the frames from the registers read for each block;
+        the frames of a block that failed or came back short are None
+        """
+        for block, layout, regs in zip(self._blocks, self._layouts,
+                                       blocks_regs):
+            if regs and len(regs) < block.count:
+                log.debug(f"[Modbus] {block}: {len(regs)} registers read, "
+                          f"{block.count} expected")
+                regs = None
+            if not regs:
+                for frame in block.frames:
+                    frame.decode(None)
+                continue
+            if layout is not None:
+                try:
+                    values = unpack_block(regs, layout,
+                                          block.frames[0].word_order)
+                except ValueError as exception:
+                    log.debug(f"[Modbus] {block}: {exception}")
+                    values = [None] * len(block.frames)
+                for frame, value in zip(block.frames, values):
+                    frame.decode_value(value)
+                continue
+            for frame in block.frames:
+                offset = frame.register_offset - block.start
+                frame.decode(regs[offset:offset + frame.register_range])
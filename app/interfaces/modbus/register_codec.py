@@ -0,0 +1,71 @@
+import struct
+from functools import lru_cache
+
+# type -> (struct format, size in registers)
+REGISTER_TYPES = {
+    "int16": ("h", 1),
+    "uint16": ("H", 1),
+    "int32": ("i", 2),
+    "uint32": ("I", 2),
+    "float32": ("f", 2),
+    "int64": ("q", 4),
+    "uint64": ("Q", 4),
+    "float64": ("d", 4),
+}
+
+
+def register_count(register_type: str) -> int:
+    return REGISTER_TYPES[register_type][1]
+
+
+def pack_registers(regs: list) -> bytes:
+    """registers -> big endian byte buffer (Modbus byte order)"""
+    return struct.pack(f">{len(regs)}H", *regs)
+
+
+def swap_words(regs: list, size: int) -> list:
+    """reverses the word order of every `size` registers long value"""
+    swapped = []
+    for i in range(0, len(regs), size):
+        swapped += reversed(regs[i:i + size])
+    return swapped
+
+
+@lru_cache(maxsize=None)
+def layout_struct(layout: tuple) -> struct.Struct:
+    """
+    layout: ((register offset, type), ...) sorted by offset;
+    returns Struct unpacking every value of a block in a single call
+    """
+    fmt = ">"
+    position = 0
+    for offset, register_type in layout:
+        code, size = REGISTER_TYPES[register_type]
+        if offset > position:
+            fmt += f"{(offset - position) * 2}x"
+        fmt += code
+        position = offset + size
+    return struct.Struct(fmt)
+
+
+def unpack(regs: list, register_type: str,
+           word_order: str = "big") -> int | float:
+    code, size = REGISTER_TYPES[register_type]
+    if word_order == "little":
+        regs = swap_words(regs[:size], size)
+    return struct.unpack_from(f">{code}", pack_registers(regs[:size]))[0]
+
+
+def unpack_block(regs: list, layout: tuple,
+                 word_order: str = "big") -> tuple:
+    """decodes every value of a block of registers described by layout"""
+    layout_st = layout_struct(layout)
+    if len(regs) * 2 < layout_st.size:
+        raise ValueError(f"{len(regs)} registers read, "
+                         f"{layout_st.size // 2} expected")
+    if word_order == "little":
+        regs = list(regs)
+        for offset, register_type in layout:
+            size = register_count(register_type)
+            regs[offset:offset + size] = reversed(regs[offset:offset + size])
+    return layout_st.unpack_from(pack_registers(regs))
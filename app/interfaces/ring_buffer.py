@@ -0,0 +1,148 @@
+import os
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+
+# minutes of samples kept at full resolution for every channel
+HISTORY_MINUTES = float(os.environ.get('HISTORY_MINUTES', 15))
+
+
+class RingBuffer:
+    """
+    Fixed-capacity buffer of (timestamp, value) samples stored in two
+    preallocated arrays of doubles, 16 bytes per sample. Appending
+    overwrites the oldest sample once the buffer is full.
+
+    Windows are returned as memoryviews into the arrays, so they are
+    only valid until the samples are overwritten by the writer.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self._capacity = capacity
+        self._timestamps = array('d', bytes(8 * capacity))
+        self._values = array('d', bytes(8 * capacity))
+        self._index = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def nbytes(self) -> int:
+        return 16 * self._capacity
+
+    def append(self, timestamp: float, value: float) -> None:
+        index = self._index
+        self._timestamps[index] = timestamp
+        self._values[index] = value
+        self._index = (index + 1) % self._capacity
+        if self._count < self._capacity:
+            self._count += 1
+
+    def latest(self) -> tuple | None:
+        if not self._count:
+            return None
+        index = self._index - 1
+        return self._timestamps[index], self._values[index]
+
+    def window(self, since: float | None = None,
+               until: float | None = None) -> list:
+        """
+        [(timestamps, values), ...] - one or two pairs of memoryviews
+        in chronological order with the samples since <= t <= until
+        """
+        index, count = self._index, self._count
+        if count < self._capacity:
+            ranges = [(0, count)]
+        else:
+            ranges = [(index, self._capacity), (0, index)]
+        timestamps = memoryview(self._timestamps)
+        values = memoryview(self._values)
+        window = []
+        for start, end in ranges:
+            part = timestamps[start:end]
+            low = 0 if since is None else bisect_left(part, since)
+            high = len(part) if until is None else bisect_right(part, until)
+            if low < high:
+                window.append((part[low:high],
+                               values[start + low:start + high]))
+        return window
+
+
+class SampleHistory:
+    """RingBuffer per channel (name, phase, tariff) of one meter"""
+
+    def __init__(self, capacity: int) -> None:
+        self._capacity = capacity
+        self._buffers = {}
+
+    @classmethod
+    def for_interval(cls, interval: float,
+                     minutes: float = HISTORY_MINUTES) -> "SampleHistory":
+        return cls(max(math.ceil(minutes * 60 / interval), 1))
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def channels(self) -> list:
+        return list(self._buffers)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(buffer.nbytes for buffer in self._buffers.values())
+
+    @staticmethod
+    def channel(measurement) -> tuple:
+        return (measurement["name"], measurement["phase"],
+                measurement.get("tariff"))
+
+    def buffer(self, name: str, phase: str,
+               tariff: str | None = None) -> RingBuffer | None:
+        return self._buffers.get((name, phase, tariff))
+
+    def samples(self, since: float | None = None) -> list:
+        """
+        [(channel, timestamps, values), ...] - copies of the samples
+        after `since` (all when None) of every channel
+        """
+        samples = []
+        for key, buffer in list(self._buffers.items()):
+            timestamps, values = [], []
+            for part_timestamps, part_values in buffer.window(since):
+                timestamps.extend(part_timestamps)
+                values.extend(part_values)
+            skip = 0
+            while skip < len(timestamps) and since is not None and \
+                    timestamps[skip] <= since:
+                skip += 1
+            if skip < len(timestamps):
+                samples.append((key, tuple(timestamps[skip:]),
+                                tuple(values[skip:])))
+        return samples
+
+    def extend(self, channel: tuple, timestamps: tuple,
+               values: tuple) -> None:
+        """appends samples of channel (name, phase, tariff) in order"""
+        buffer = self._buffers.get(channel)
+        if buffer is None:
+            buffer = self._buffers[channel] = RingBuffer(self._capacity)
+        for timestamp, value in zip(timestamps, values):
+            buffer.append(timestamp, value)
+
+    def record(self, snapshot) -> None:
+        for measurement in snapshot.values:
+            if measurement["value"] is None:
+                continue
+            key = self.channel(measurement)
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                buffer = self._buffers[key] = RingBuffer(self._capacity)
+            buffer.append(snapshot.acquired_at, measurement["value"])
@@ -0,0 +1,51 @@
+from types import MappingProxyType
+
+GOOD = "good"
+# some values could not be read
+PARTIAL = "partial"
+# nothing could be read
+BAD = "bad"
+
+
+class Snapshot:
+    """
+    Immutable result of one poll of a meter. The poller builds a new
+    snapshot and publishes it by replacing a single reference, so readers
+    in other threads never block it and never see a half-filled one.
+
+    values - tuple of read-only measurement dicts
+    acquired_at - unix time of the poll
+    sequence - number of the poll, incremented by every publish
+    quality - GOOD, PARTIAL or BAD
+    """
+
+    __slots__ = ("values", "acquired_at", "sequence", "quality")
+
+    def __init__(self, values: list, acquired_at: float,
+                 sequence: int = 0) -> None:
+        values = tuple(MappingProxyType(dict(value)) for value in values)
+        present = sum(value["value"] is not None for value in values)
+        if values and present == len(values):
+            quality = GOOD
+        elif present:
+            quality = PARTIAL
+        else:
+            quality = BAD
+        object.__setattr__(self, "values", values)
+        object.__setattr__(self, "acquired_at", acquired_at)
+        object.__setattr__(self, "sequence", sequence)
+        object.__setattr__(self, "quality", quality)
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError("Snapshot is immutable")
+
+    def __repr__(self) -> str:
+        return f"Snapshot(#{self.sequence}, {self.quality}, " \
+               f"{len(self.values)} values)"
+
+    @classmethod
+    def following(cls, previous: "Snapshot | None", values: list,
+                  acquired_at: float) -> "Snapshot":
+        """snapshot numbered after `previous`"""
+        sequence = 0 if previous is None else previous.sequence + 1
+        return cls(values, acquired_at, sequence)
@@ -1,31 +1,56 @@
 from interfaces.modbus.modbus import Modbus
+from interfaces.modbus.modbus_async import AsyncModbus
 from interfaces.mbus.mbus import Mbus
 from models.meter_model import MeterModel
+from meter_registry import MeterRegistry
+from poll_scheduler import PollScheduler
+from config_watcher import ConfigWatcher, diff_models, METER_CONFIG, \
+    CONFIG_WATCH_INTERVAL
+from cluster import Cluster
+from acquisition_barrier import ACQUISITION_DEADLINE
+from singleton import Singleton
+import os
 import threading
 import logging
 
-lock = threading.Lock()
-log = logging.getLogger()
-
-
-class Singleton(type):
-    _instances = {}
+# thread | asyncio
+MODBUS_ENGINE = os.environ.get('MODBUS_ENGINE', 'thread')
 
-    def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
-            with lock:
-                if cls not in cls._instances:
-                    cls._instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
-        return cls._instances[cls]
+log = logging.getLogger()
 
 
 class MeterManager(threading.Thread, metaclass=Singleton):
-    meters = []
+    acquisition_deadline = ACQUISITION_DEADLINE
 
     def __init__(self):
         threading.Thread.__init__(self)
         threading.Thread.daemon = True
-        self.threads = []
+        self.registry = MeterRegistry()
+        self.cluster = Cluster()
+        self.scheduler = PollScheduler()
+        self._watcher = None
+        # models of this instance from the last loaded configuration
+        self._models = {}
+        # meters that failed to start, retried at every config check
+        self._failed = set()
+        self._job = None
+
+    @property
+    def meters(self) -> list:
+        return self.registry.meters
+
+    @property
+    def missed(self) -> int:
+        """polls skipped by the scheduler of this process"""
+        return self.scheduler.missed
+
+    @property
+    def overruns(self) -> int:
+        return self.scheduler.overruns
+
+    def acquire(self, barrier: object) -> object:
+        """reads every meter of this process at once through barrier"""
+        return barrier.acquire(self.meters)
 
     def start(self) -> None:
         try:
@@ -35,37 +60,110 @@ class MeterManager(threading.Thread, metaclass=Singleton):
 
     def run(self) -> None:
         log.debug("Meter Manager proces started")
-        MeterModel.from_yaml("./data/meter.yaml")
-        for meter_model in MeterModel.get_list().values():
-            meter = None
-            if meter_model.interface == "modbus":
-                meter = Modbus.from_model(meter_model)
-            if meter_model.interface == "mbus":
-                meter = Mbus.from_model(meter_model)
+        self._watcher = ConfigWatcher(METER_CONFIG)
+        self._models = self.cluster.share(MeterModel.load_yaml(METER_CONFIG))
+        self.apply(self._models)
+        self._job = self.scheduler.add("config_watcher", self._reload,
+                                       CONFIG_WATCH_INTERVAL)
+        self.scheduler.start()
+
+    def apply(self, models: dict) -> None:
+        """
+        starts, stops or restarts only the pollers of the meters whose
+        entry in the configuration differs from the running one
+        """
+        diff = diff_models(MeterModel.get_list(), models)
+        if not diff:
+            return
+        for meter_id in diff.removed + diff.changed:
+            self._stop_meter(meter_id)
+        for meter_id in diff.updated:
+            MeterModel.register(models[meter_id])
+        self._failed.difference_update(diff.removed)
+        for meter_id in diff.changed + diff.added:
+            if self._start_meter(models[meter_id]):
+                self._failed.discard(meter_id)
+            else:
+                self._failed.add(meter_id)
+        log.info(f"[Meter Manager] Configuration applied: "
+                 f"{len(diff.added)} added, {len(diff.removed)} removed, "
+                 f"{len(diff.changed)} restarted, "
+                 f"{len(diff.updated)} updated")
+
+    def _reload(self) -> None:
+        # both checked every time to keep their change stamps current
+        config_changed = self._watcher.changed()
+        cluster_changed = self.cluster.changed()
+        if config_changed or cluster_changed:
+            log.info(f"[Meter Manager] Configuration or cluster membership "
+                     f"changed, reloading")
             try:
-                meter.start()
-                self.threads.append(meter)
-                MeterManager.meters.append(meter)
+                models = MeterModel.load_yaml(self._watcher.path)
             except Exception as exception:
                 log.exception(exception)
-            else:
-                log.debug(f"[Meter Manager] Meter created ({meter})")
+                log.error("[Meter Manager] Configuration can't be loaded, "
+                          "keeping the running one")
+                return
+            self._models = self.cluster.share(models)
+        elif not self._failed:
+            return
+        self.apply(self._models)
+
+    def _start_meter(self, meter_model: MeterModel) -> bool:
+        """
+        the model is registered only once its meter runs, so a meter that
+        failed to start stays in the diff and is retried
+        """
+        meter = None
+        try:
+            if meter_model.interface == "modbus":
+                if MODBUS_ENGINE == "asyncio":
+                    meter = AsyncModbus.from_model(meter_model)
+                else:
+                    meter = Modbus.from_model(meter_model)
+            if meter_model.interface == "mbus":
+                meter = Mbus.from_model(meter_model)
+            meter.start(self.scheduler)
+            self.registry.add(meter, meter_model.interface)
+        except Exception as exception:
+            log.exception(exception)
+            log.error(f"[Meter Manager] meter_{meter_model.meter_id} "
+                      f"can't be started, retrying at the next "
+                      f"configuration check")
+            if meter is not None:
+                # e.g. leaves the bus cycle of the shared converter
+                self._discard_meter(meter)
+            return False
+        MeterModel.register(meter_model)
+        log.debug(f"[Meter Manager] Meter created ({meter})")
+        return True
+
+    def _stop_meter(self, meter_id: int) -> None:
+        MeterModel.unregister(meter_id)
+        meter = self.registry.remove(meter_id)
+        if meter is None:
+            return
+        if self._discard_meter(meter):
+            log.debug(f"[Meter Manager] Meter stopped ({meter})")
+
+    @staticmethod
+    def _discard_meter(meter: object) -> bool:
+        try:
+            meter.stop()
+        except Exception as exception:
+            log.exception(exception)
+            return False
+        return True
 
     def get_meter_instance_by_address(self, address: int) -> object | None:
-        for thread in self.threads:
-            if thread.address == address:
-                return thread
-        return None
+        meters = self.registry.by_address(address)
+        return meters[0] if meters else None
 
     def get_meter_by_host(self, host: str) -> object | None:
-        for thread in self.threads:
-            if thread.host == host:
-                return thread
-        return None
+        meters = self.registry.by_host(host)
+        return meters[0] if meters else None
 
     def get_meter_by_host_and_address(self, host: str,
                                       address: int) -> object | None:
-        for thread in self.threads:
-            if thread.host == host and thread.address == address:
-                return thread
-        return None
+        meters = self.registry.by_host_and_address(host, address)
+        return meters[0] if meters else None
@@ -0,0 +1,132 @@
+import threading
+from singleton import Singleton
+
+
+class MeterRegistry(metaclass=Singleton):
+    """
+    Running meters indexed by meter_id, host, address, (host, address),
+    (host, port), (host, port, address) and interface, plus the connections shared
+    by the meters of one endpoint. All lookups are dict based.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._by_id = {}
+        self._interfaces = {}
+        self._by_host = {}
+        self._by_unit = {}
+        self._by_host_unit = {}
+        self._by_endpoint = {}
+        self._by_address = {}
+        self._by_interface = {}
+        self._connections = {}
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, meter_id: int) -> bool:
+        return meter_id in self._by_id
+
+    @property
+    def meters(self) -> list:
+        return list(self._by_id.values())
+
+    def add(self, meter: object, interface: str) -> None:
+        with self._lock:
+            if meter.meter_id in self._by_id:
+                raise KeyError(f"meter_{meter.meter_id} already registered")
+            endpoint = (meter.host, meter.port)
+            self._by_id[meter.meter_id] = meter
+            self._interfaces[meter.meter_id] = interface
+            self._by_host.setdefault(meter.host, {})[meter.meter_id] = meter
+            self._by_unit.setdefault(meter.address, {})[meter.meter_id] = \
+                meter
+            self._by_host_unit.setdefault((meter.host, meter.address),
+                                          {})[meter.meter_id] = meter
+            self._by_endpoint.setdefault(endpoint, {})[meter.meter_id] = \
+                meter
+            self._by_address[endpoint + (meter.address,)] = meter
+            self._by_interface.setdefault(interface, {})[meter.meter_id] = \
+                meter
+
+    def remove(self, meter_id: int) -> object | None:
+        with self._lock:
+            meter = self._by_id.pop(meter_id, None)
+            if meter is None:
+                return None
+            interface = self._interfaces.pop(meter_id)
+            endpoint = (meter.host, meter.port)
+            self._discard(self._by_host, meter.host, meter_id)
+            self._discard(self._by_unit, meter.address, meter_id)
+            self._discard(self._by_host_unit, (meter.host, meter.address),
+                          meter_id)
+            self._discard(self._by_endpoint, endpoint, meter_id)
+            self._discard(self._by_interface, interface, meter_id)
+            if self._by_address.get(endpoint + (meter.address,)) is meter:
+                del self._by_address[endpoint + (meter.address,)]
+            return meter
+
+    def get(self, meter_id: int) -> object | None:
+        return self._by_id.get(meter_id)
+
+    def interface(self, meter_id: int) -> str | None:
+        return self._interfaces.get(meter_id)
+
+    def by_host(self, host: str) -> list:
+        return list(self._by_host.get(host, {}).values())
+
+    def by_address(self, address: int | None) -> list:
+        return list(self._by_unit.get(address, {}).values())
+
+    def by_host_and_address(self, host: str, address: int | None) -> list:
+        return list(self._by_host_unit.get((host, address), {}).values())
+
+    def by_endpoint(self, host: str, port: int) -> list:
+        return list(self._by_endpoint.get((host, port), {}).values())
+
+    def by_interface(self, interface: str) -> list:
+        return list(self._by_interface.get(interface, {}).values())
+
+    def find(self, host: str, port: int, address: int | None) \
+            -> object | None:
+        return self._by_address.get((host, port, address))
+
+    def connection(self, kind: str, host: str, port: int, factory) -> object:
+        """
+        connection shared by the meters of host:port, created
+        by factory(host, port) on first use
+        """
+        key = (kind, host, port)
+        connection = self._connections.get(key)
+        if connection is None:
+            with self._lock:
+                connection = self._connections.get(key)
+                if connection is None:
+                    connection = self._connections[key] = factory(host, port)
+        return connection
+
+    def connections(self, kind: str) -> list:
+        return [connection for key, connection
+                in list(self._connections.items()) if key[0] == kind]
+
+    def remove_connection(self, kind: str, host: str,
+                          port: int) -> object | None:
+        with self._lock:
+            return self._connections.pop((kind, host, port), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            for index in (self._by_id, self._interfaces, self._by_host,
+                          self._by_unit, self._by_host_unit,
+                          self._by_endpoint, self._by_address,
+                          self._by_interface, self._connections):
+                index.clear()
+
+    @staticmethod
+    def _discard(index: dict, key, meter_id: int) -> None:
+        group = index.get(key)
+        if group is None:
+            return
+        group.pop(meter_id, None)
+        if not group:
+            del index[key]
@@ -1,30 +1,35 @@
-import os
 from datetime import datetime
-from influxdb_client import InfluxDBClient, Point, WritePrecision
-from influxdb_client.client.write_api import SYNCHRONOUS
-
-INFLUXDB_URL = os.environ.get('INFLUXDB_URL')
-INFLUXDB_TOKEN = os.environ.get('DOCKER_INFLUXDB_INIT_ADMIN_TOKEN')
-INFLUXDB_ORG = os.environ.get('DOCKER_INFLUXDB_INIT_ORG')
-INFLUXDB_BUCKET = os.environ.get('DOCKER_INFLUXDB_INIT_BUCKET')
+from .line_protocol import to_line
 
 
 class ActivePowerModel:
     def __init__(self, meter_id: int, active_power: float | None,
-                 phase: int, date: datetime) -> None:
+                 phase: int, date: datetime,
+                 acquired_at: float | None = None,
+                 spread: float | None = None,
+                 aggregate: object | None = None) -> None:
         self.meter_id = meter_id
         self.active_power = active_power
         self.phase = phase
         self.date = date
+        self.acquired_at = acquired_at
+        self.spread = spread
+        # PowerAggregate of the samples since the previous save
+        self.aggregate = aggregate
+
+    def to_line(self) -> str:
+        fields = {"active_power": self.active_power,
+                  "acquired_at": self.acquired_at,
+                  "acquisition_spread": self.spread}
+        if self.aggregate is not None:
+            fields["active_power_mean"] = self.aggregate.mean
+            fields["active_power_min"] = self.aggregate.minimum
+            fields["active_power_max"] = self.aggregate.maximum
+            fields["sample_count"] = self.aggregate.count
+        return to_line("active_power",
+                       (("meter", f"meter{self.meter_id}"),
+                        ("phase", self.phase)), fields, self.date)
 
-    def save(self) -> None:
-        with InfluxDBClient(url=INFLUXDB_URL, token=INFLUXDB_TOKEN,
-                            org=INFLUXDB_ORG) as client:
-            write_api = client.write_api(write_options=SYNCHRONOUS)
-            point = Point("active_power") \
-                .tag("meter", f"meter{self.meter_id}") \
-                .tag("phase", self.phase) \
-                .field("active_power", self.active_power) \
-                .time(self.date, WritePrecision.NS)
-            write_api.write(INFLUXDB_BUCKET, INFLUXDB_ORG, point)
-            client.close()
+    def to_row(self) -> tuple:
+        return (self.meter_id, "active_power", self.phase, None, self.date,
+                self.active_power)
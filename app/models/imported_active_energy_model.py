@@ -1,32 +1,28 @@
-import os
 from datetime import datetime
-from influxdb_client import InfluxDBClient, Point, WritePrecision
-from influxdb_client.client.write_api import SYNCHRONOUS
-
-INFLUXDB_URL = os.environ.get('INFLUXDB_URL')
-INFLUXDB_TOKEN = os.environ.get('DOCKER_INFLUXDB_INIT_ADMIN_TOKEN')
-INFLUXDB_ORG = os.environ.get('DOCKER_INFLUXDB_INIT_ORG')
-INFLUXDB_BUCKET = os.environ.get('DOCKER_INFLUXDB_INIT_BUCKET')
+from .line_protocol import to_line
 
 
 class ImportedActiveEnergyModel:
     def __init__(self, meter_id: int, imported_active_energy: float | None,
-                 tariff: int, phase: int, date: datetime) -> None:
+                 tariff: int, phase: int, date: datetime,
+                 acquired_at: float | None = None,
+                 spread: float | None = None) -> None:
         self.meter_id = meter_id
         self.imported_active_energy = imported_active_energy
         self.tariff = tariff
         self.phase = phase
         self.date = date
+        self.acquired_at = acquired_at
+        self.spread = spread
+
+    def to_line(self) -> str:
+        return to_line("imported_active_energy",
+                       (("meter", f"meter{self.meter_id}"),
+                        ("phase", self.phase), ("tariff", self.tariff)),
+                       {"imported_active_energy": self.imported_active_energy,
+                        "acquired_at": self.acquired_at,
+                        "acquisition_spread": self.spread}, self.date)
 
-    def save(self) -> None:
-        with InfluxDBClient(url=INFLUXDB_URL, token=INFLUXDB_TOKEN,
-                            org=INFLUXDB_ORG) as client:
-            write_api = client.write_api(write_options=SYNCHRONOUS)
-            point = Point("imported_active_energy") \
-                .tag("meter", f"meter{self.meter_id}") \
-                .tag("tariff", self.tariff) \
-                .tag("phase", self.phase) \
-                .field("imported_active_energy", self.imported_active_energy) \
-                .time(self.date, WritePrecision.NS)
-            write_api.write(INFLUXDB_BUCKET, INFLUXDB_ORG, point)
-            client.close()
+    def to_row(self) -> tuple:
+        return (self.meter_id, "imported_active_energy", self.phase,
+                self.tariff, self.date, self.imported_active_energy)
@@ -0,0 +1,92 @@
+import os
+import time
+import threading
+import logging
+from singleton import Singleton
+
+INFLUXDB_URL = os.environ.get('INFLUXDB_URL')
+INFLUXDB_TOKEN = os.environ.get('DOCKER_INFLUXDB_INIT_ADMIN_TOKEN')
+INFLUXDB_ORG = os.environ.get('DOCKER_INFLUXDB_INIT_ORG')
+INFLUXDB_BUCKET = os.environ.get('DOCKER_INFLUXDB_INIT_BUCKET')
+INFLUXDB_GZIP = os.environ.get('INFLUXDB_GZIP', '0') == '1'
+# narrow: point per measurement, phase and tariff as tags
+# wide: point per meter and measurement family, phases and tariffs as fields
+INFLUXDB_SCHEMA = os.environ.get('INFLUXDB_SCHEMA', 'narrow')
+
+log = logging.getLogger()
+
+
+class InfluxWriter(metaclass=Singleton):
+    """
+    Long-lived InfluxDB writer shared by all models.
+
+    Every write() sends the given records in a single (optionally
+    gzip-compressed) request over the same client.
+    """
+
+    def __init__(self) -> None:
+        self._client = None
+        self._write_api = None
+        self._client_lock = threading.Lock()
+        self._last_latency = None
+        self._last_count = 0
+        self._total_points = 0
+
+    @property
+    def last_latency(self) -> float | None:
+        """duration of the last write in seconds"""
+        return self._last_latency
+
+    @property
+    def last_count(self) -> int:
+        """number of points sent by the last write"""
+        return self._last_count
+
+    @property
+    def total_points(self) -> int:
+        return self._total_points
+
+    def write(self, records, precision: str = "s") -> None:
+        """precision - WritePrecision value, seconds by default"""
+        start = time.perf_counter()
+        with self._client_lock:
+            try:
+                self._write_api_instance().write(INFLUXDB_BUCKET,
+                                                 INFLUXDB_ORG, records,
+                                                 write_precision=precision)
+            except Exception:
+                self._reset()
+                raise
+        self._last_latency = time.perf_counter() - start
+        self._last_count = len(records) if isinstance(records, list) else 1
+        self._total_points += self._last_count
+
+    def close(self) -> None:
+        with self._client_lock:
+            self._reset()
+
+    def _write_api_instance(self):
+        if self._write_api is None:
+            # imported on first write, it takes long and isn't needed
+            # before the first minute is saved
+            from influxdb_client import InfluxDBClient
+            from influxdb_client.client.write_api import SYNCHRONOUS
+            self._client = InfluxDBClient(url=INFLUXDB_URL,
+                                          token=INFLUXDB_TOKEN,
+                                          org=INFLUXDB_ORG,
+                                          enable_gzip=INFLUXDB_GZIP)
+            self._write_api = self._client.write_api(
+                write_options=SYNCHRONOUS)
+            log.debug(f"[Influx Writer] Client created ({INFLUXDB_URL}, "
+                      f"gzip: {INFLUXDB_GZIP})")
+        return self._write_api
+
+    def _reset(self) -> None:
+        if self._client is not None:
+            try:
+                self._write_api.close()
+                self._client.close()
+            except Exception as exception:
+                log.debug(exception)
+        self._client = None
+        self._write_api = None
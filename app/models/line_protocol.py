@@ -0,0 +1,66 @@
+import math
+import calendar
+from datetime import datetime
+from functools import lru_cache
+
+_MEASUREMENT_ESCAPE = str.maketrans({",": r"\,", " ": r"\ ",
+                                     "\n": r"\n"})
+_KEY_ESCAPE = str.maketrans({",": r"\,", "=": r"\=", " ": r"\ ",
+                             "\n": r"\n"})
+_STRING_ESCAPE = str.maketrans({'"': r'\"', "\\": r"\\"})
+
+
+@lru_cache(maxsize=4096)
+def tag_prefix(measurement: str, tags: tuple) -> str:
+    """
+    'measurement,tag=value,...' for ((tag, value), ...); tags are
+    sorted like influxdb_client.Point does and cached, since the same
+    meter/phase/tariff combinations repeat every tick
+    """
+    prefix = measurement.translate(_MEASUREMENT_ESCAPE)
+    for key, value in sorted(tags):
+        if value is None or value == "":
+            continue
+        prefix += f",{key.translate(_KEY_ESCAPE)}=" \
+                  f"{str(value).translate(_KEY_ESCAPE)}"
+    return prefix
+
+
+def format_field(key: str, value) -> str | None:
+    key = key.translate(_KEY_ESCAPE)
+    if isinstance(value, bool):
+        return f"{key}={'true' if value else 'false'}"
+    if isinstance(value, int):
+        return f"{key}={value}i"
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return None
+        text = str(value)
+        return f"{key}={text[:-2] if text.endswith('.0') else text}"
+    if isinstance(value, str):
+        return f'{key}="{value.translate(_STRING_ESCAPE)}"'
+    return None
+
+
+def timestamp(date: datetime) -> int:
+    """seconds since the epoch; naive dates are UTC as in Point"""
+    if date.tzinfo is None:
+        return calendar.timegm(date.timetuple())
+    return int(date.timestamp())
+
+
+def to_line(measurement: str, tags: tuple, fields: dict,
+            date: datetime) -> str:
+    """
+    one line of line protocol with second precision; '' when
+    no field has a value
+    """
+    formatted = [field for field in (format_field(key, value)
+                                     for key, value in fields.items()
+                                     if value is not None)
+                 if field is not None]
+    if not formatted:
+        return ""
+    return f"{tag_prefix(measurement, tags)} {','.join(formatted)} " \
+           f"{timestamp(date)}"
+
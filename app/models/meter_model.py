@@ -1,5 +1,4 @@
-import yaml
-from yaml.loader import SafeLoader
+from .write_policy import WritePolicy
 
 
 class MeterModel:
@@ -7,11 +6,21 @@ class MeterModel:
 
     @classmethod
     def from_yaml(cls, path: str) -> object:
+        cls._list.update(cls.load_yaml(path))
+
+    @classmethod
+    def load_yaml(cls, path: str) -> dict:
+        """{meter_id: MeterModel} of the file, without registering them"""
+        # imported here, only the config loader needs it
+        import yaml
+        from yaml.loader import SafeLoader
         with open(path) as file:
             meters = yaml.load(file, Loader=SafeLoader)
-        for meter in meters:
+        models = {}
+        for meter in meters or []:
             meter_model = MeterModel.from_dict(meter)
-            cls._list[meter_model.meter_id] = meter_model
+            models[meter_model.meter_id] = meter_model
+        return models
 
     @classmethod
     def from_dict(cls, dictionary: dict) -> object:
@@ -21,8 +30,13 @@ class MeterModel:
         port = dictionary['port']
         address = dictionary['address']
         interface = dictionary['interface']
+        interval = dictionary.get('interval')
+        policies = {measurement: WritePolicy.from_dict(policy)
+                    for measurement, policy
+                    in (dictionary.get('policies') or {}).items()}
         return cls(meter_id=meter_id, name=name, host=host, port=port,
-                   address=address, interface=interface)
+                   address=address, interface=interface, interval=interval,
+                   policies=policies, config=dictionary)
 
     @classmethod
     def get_meter(cls, meter_id: int) -> object | None:
@@ -37,14 +51,28 @@ class MeterModel:
     def get_list(cls) -> dict:
         return cls._list
 
+    @classmethod
+    def register(cls, model: object) -> None:
+        cls._list[model.meter_id] = model
+
+    @classmethod
+    def unregister(cls, meter_id: int) -> None:
+        cls._list.pop(meter_id, None)
+
     def __init__(self, meter_id: int, name: str, host: str, port: int,
-                 address: int | None, interface: str) -> None:
+                 address: int | None, interface: str,
+                 interval: float | None = None,
+                 policies: dict | None = None,
+                 config: dict | None = None) -> None:
         self._meter_id = meter_id
         self._name = name
         self._host = host
         self._port = port
         self._address = address
         self._interface = interface
+        self._interval = interval
+        self._policies = policies or {}
+        self._config = config or {}
 
     @property
     def meter_id(self):
@@ -69,3 +97,18 @@ class MeterModel:
     @property
     def interface(self):
         return self._interface
+
+    @property
+    def interval(self):
+        """polling interval in seconds; None = default of the interface"""
+        return self._interval
+
+    @property
+    def policies(self) -> dict:
+        """{measurement name: WritePolicy}"""
+        return self._policies
+
+    @property
+    def config(self) -> dict:
+        """entry of meter.yaml the model was created from"""
+        return self._config
@@ -0,0 +1,13 @@
+from .line_protocol import to_line
+
+
+class RollupModel:
+    def __init__(self, rollup: object) -> None:
+        self.rollup = rollup
+
+    def to_line(self) -> str:
+        rollup = self.rollup
+        return to_line(rollup.measurement,
+                       (("meter", f"meter{rollup.meter_id}"),
+                        ("phase", rollup.phase), ("tariff", rollup.tariff)),
+                       rollup.fields, rollup.date)
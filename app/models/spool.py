@@ -0,0 +1,241 @@
+import os
+import time
+import threading
+import logging
+
+SPOOL_DIR = os.environ.get('SPOOL_DIR', './data/spool')
+SPOOL_MAX_BYTES = int(os.environ.get('SPOOL_MAX_BYTES', 256 * 1024 * 1024))
+SPOOL_SEGMENT_BYTES = int(os.environ.get('SPOOL_SEGMENT_BYTES',
+                                         4 * 1024 * 1024))
+# always | interval | never
+SPOOL_FSYNC = os.environ.get('SPOOL_FSYNC', 'always')
+SPOOL_FSYNC_INTERVAL = float(os.environ.get('SPOOL_FSYNC_INTERVAL', 1))
+# the active segment is sealed after this many seconds without appends
+SPOOL_SEAL_IDLE = float(os.environ.get('SPOOL_SEAL_IDLE', 300))
+
+log = logging.getLogger()
+
+
+class SpoolBatch:
+    def __init__(self, segment_id: int, offset: int, lines: list,
+                 eof: bool) -> None:
+        self.segment_id = segment_id
+        self.offset = offset
+        self.lines = lines
+        self.eof = eof
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+
+class Spool:
+    """
+    Bounded, append-only spool of line protocol records.
+
+    Records are appended to the active segment file; segments are sealed
+    when they reach the segment size or stay idle. The active segment is
+    read up to its last complete record without sealing it. The read
+    position is persisted in the offset file so that a restart resumes
+    where the last committed batch ended. When the spool grows over its
+    limit the oldest sealed segments are dropped.
+    """
+
+    _suffix = ".seg"
+    _offset_file = "offset"
+    # records the database refused, kept for a manual replay
+    _rejected_file = "rejected"
+
+    def __init__(self, path: str = SPOOL_DIR,
+                 max_bytes: int = SPOOL_MAX_BYTES,
+                 segment_bytes: int = SPOOL_SEGMENT_BYTES,
+                 fsync: str = SPOOL_FSYNC,
+                 fsync_interval: float = SPOOL_FSYNC_INTERVAL,
+                 seal_idle: float = SPOOL_SEAL_IDLE) -> None:
+        self._path = path
+        self._max_bytes = max_bytes
+        self._segment_bytes = segment_bytes
+        self._fsync = fsync
+        self._fsync_interval = fsync_interval
+        self._seal_idle = seal_idle
+        self._lock = threading.Lock()
+        self._active = None
+        self._active_id = None
+        self._last_fsync = 0.0
+        self._last_append = 0.0
+        self._sizes = {}
+        self._appended_records = 0
+        self._dropped_bytes = 0
+        self._dropped_segments = 0
+        self._rejected_records = 0
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name.endswith(self._suffix):
+                segment_id = int(name[:-len(self._suffix)])
+                self._sizes[segment_id] = os.path.getsize(
+                    self._segment_path(segment_id))
+        self._read_id, self._read_offset = self._load_offset()
+
+    def __str__(self) -> str:
+        return f"Spool({self._path})"
+
+    @property
+    def size(self) -> int:
+        """bytes waiting in the spool"""
+        size = sum(self._sizes.values())
+        if self._read_id in self._sizes:
+            size -= self._read_offset
+        return size
+
+    @property
+    def segments(self) -> int:
+        return len(self._sizes)
+
+    @property
+    def appended_records(self) -> int:
+        return self._appended_records
+
+    @property
+    def dropped_bytes(self) -> int:
+        return self._dropped_bytes
+
+    @property
+    def dropped_segments(self) -> int:
+        return self._dropped_segments
+
+    @property
+    def rejected_records(self) -> int:
+        return self._rejected_records
+
+    def append(self, lines: list) -> None:
+        if not lines:
+            return
+        payload = ("\n".join(lines) + "\n").encode()
+        with self._lock:
+            if self._active is None:
+                self._open_segment()
+            self._active.write(payload)
+            self._active.flush()
+            self._sync()
+            self._sizes[self._active_id] += len(payload)
+            self._appended_records += len(lines)
+            self._last_append = time.monotonic()
+            if self._sizes[self._active_id] >= self._segment_bytes:
+                self._seal()
+            self._enforce_limit()
+
+    def read_batch(self, max_records: int) -> SpoolBatch | None:
+        with self._lock:
+            if not self._sizes:
+                return None
+            segment_id = min(self._sizes)
+            offset = self._read_offset if segment_id == self._read_id else 0
+            active = segment_id == self._active_id
+            if active and time.monotonic() - self._last_append >= \
+                    self._seal_idle:
+                self._seal()
+                active = False
+            if active and self._sizes[segment_id] <= offset:
+                return None
+        lines = []
+        try:
+            with open(self._segment_path(segment_id), "rb") as file:
+                file.seek(offset)
+                while len(lines) < max_records:
+                    line = file.readline()
+                    if not line.endswith(b"\n"):
+                        # EOF or a record torn by a crash
+                        break
+                    offset = file.tell()
+                    lines.append(line[:-1].decode())
+                # the active segment is still written, it is never done
+                eof = not active and not file.readline()
+        except FileNotFoundError:
+            # the segment was dropped by the size limit
+            return None
+        return SpoolBatch(segment_id, offset, lines, eof)
+
+    def commit(self, batch: SpoolBatch) -> None:
+        with self._lock:
+            if batch.segment_id not in self._sizes:
+                # the segment was dropped while the batch was in flight
+                return
+            if batch.eof:
+                self._remove_segment(batch.segment_id)
+                self._read_id, self._read_offset = batch.segment_id + 1, 0
+            else:
+                self._read_id, self._read_offset = batch.segment_id, \
+                    batch.offset
+            self._save_offset()
+
+    def set_aside(self, batch: SpoolBatch) -> None:
+        """copies the records of a batch to the rejected file"""
+        if batch.lines:
+            with open(os.path.join(self._path, self._rejected_file),
+                      "a") as file:
+                file.write("\n".join(batch.lines) + "\n")
+            self._rejected_records += len(batch)
+
+    def close(self) -> None:
+        with self._lock:
+            self._seal()
+
+    def _open_segment(self) -> None:
+        self._active_id = max(self._sizes, default=self._read_id) + 1
+        self._active = open(self._segment_path(self._active_id), "ab")
+        self._sizes[self._active_id] = 0
+
+    def _seal(self) -> None:
+        if self._active is None:
+            return
+        self._active.flush()
+        os.fsync(self._active.fileno())
+        self._active.close()
+        self._active = None
+        self._active_id = None
+
+    def _sync(self) -> None:
+        if self._fsync == "always":
+            os.fsync(self._active.fileno())
+        elif self._fsync == "interval":
+            now = time.monotonic()
+            if now - self._last_fsync >= self._fsync_interval:
+                os.fsync(self._active.fileno())
+                self._last_fsync = now
+
+    def _enforce_limit(self) -> None:
+        while sum(self._sizes.values()) > self._max_bytes:
+            segment_id = min(self._sizes)
+            if segment_id == self._active_id:
+                return
+            size = self._sizes[segment_id]
+            self._remove_segment(segment_id)
+            self._dropped_bytes += size
+            self._dropped_segments += 1
+            log.error(f"[Spool] Limit of {self._max_bytes} bytes exceeded. "
+                      f"Dropped segment {segment_id} ({size} bytes)")
+
+    def _remove_segment(self, segment_id: int) -> None:
+        try:
+            os.remove(self._segment_path(segment_id))
+        except FileNotFoundError:
+            pass
+        del self._sizes[segment_id]
+
+    def _segment_path(self, segment_id: int) -> str:
+        return os.path.join(self._path, f"{segment_id:012d}{self._suffix}")
+
+    def _load_offset(self) -> tuple:
+        try:
+            with open(os.path.join(self._path, self._offset_file)) as file:
+                segment_id, offset = file.read().split()
+        except (FileNotFoundError, ValueError):
+            return min(self._sizes, default=1) - 1, 0
+        return int(segment_id), int(offset)
+
+    def _save_offset(self) -> None:
+        path = os.path.join(self._path, self._offset_file)
+        with open(path + ".tmp", "w") as file:
+            file.write(f"{self._read_id} {self._read_offset}")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(path + ".tmp", path)
@@ -0,0 +1,111 @@
+import os
+import threading
+import logging
+from .spool import Spool
+from .influx_writer import InfluxWriter
+
+SPOOL_BATCH_SIZE = int(os.environ.get('SPOOL_BATCH_SIZE', 5000))
+SPOOL_RETRY_MAX = float(os.environ.get('SPOOL_RETRY_MAX', 60))
+
+log = logging.getLogger()
+
+
+class SpoolDrainer(threading.Thread):
+    """
+    Replays the spool to InfluxDB in large batches.
+
+    A batch is committed only after a successful write, so an unreachable
+    database leaves the records in the spool and the write is retried
+    with an exponential backoff. A batch the database rejects (HTTP 4xx
+    other than 401, 403 and 429) would never succeed, it is set aside.
+    """
+
+    _idle_interval = 1
+
+    def __init__(self, spool: Spool, writer: InfluxWriter,
+                 batch_size: int = SPOOL_BATCH_SIZE) -> None:
+        threading.Thread.__init__(self)
+        threading.Thread.daemon = True
+        self._spool = spool
+        self._writer = writer
+        self._batch_size = batch_size
+        self._backoff = 0
+        self._sent_records = 0
+        self._failures = 0
+        self._last_error = None
+        self._wake = threading.Event()
+
+    @property
+    def sent_records(self) -> int:
+        return self._sent_records
+
+    @property
+    def failures(self) -> int:
+        """consecutive failed writes"""
+        return self._failures
+
+    @property
+    def last_error(self) -> str | None:
+        return self._last_error
+
+    def start(self) -> None:
+        try:
+            super(SpoolDrainer, self).start()
+        except RuntimeError:
+            pass
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def run(self) -> None:
+        log.debug(f"[Spool Drainer] Draining {self._spool}")
+        while True:
+            if not self.drain_once():
+                self._wake.wait(self._backoff or self._idle_interval)
+                self._wake.clear()
+
+    def drain_once(self) -> bool:
+        """sends one batch; returns False when there is nothing to send"""
+        batch = self._spool.read_batch(self._batch_size)
+        if batch is None:
+            return False
+        sent = len(batch)
+        if batch.lines:
+            try:
+                self._writer.write(batch.lines)
+            except Exception as exception:
+                if not self._rejected(exception):
+                    self._on_failure(exception)
+                    return False
+                log.error(f"[Spool Drainer] {len(batch)} records rejected, "
+                          f"set aside ({exception})")
+                self._spool.set_aside(batch)
+                sent = 0
+        self._spool.commit(batch)
+        self._sent_records += sent
+        if self._failures:
+            log.warning(f"[Spool Drainer] Database reachable again "
+                        f"after {self._failures} failed writes")
+        self._failures = 0
+        self._backoff = 0
+        return True
+
+    @staticmethod
+    def _rejected(exception: Exception) -> bool:
+        """
+        client errors of the InfluxDB API (e.g. 400 for a rejected line
+        or a partial write, 422); authentication and rate limits are
+        retried like connection errors
+        """
+        status = getattr(exception, "status", None)
+        return isinstance(status, int) and 400 <= status < 500 and \
+            status not in (401, 403, 429)
+
+    def _on_failure(self, exception: Exception) -> None:
+        self._failures += 1
+        self._last_error = str(exception)
+        self._backoff = min(max(self._backoff * 2, 1), SPOOL_RETRY_MAX)
+        log.debug(exception)
+        log.warning(f"[Spool Drainer] Write failed, "
+                    f"{self._spool.size} bytes spooled. "
+                    f"Retrying in {self._backoff:.0f} s")
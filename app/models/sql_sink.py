@@ -0,0 +1,203 @@
+import os
+import json
+import queue
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+
+MARIADB_HOST = os.environ.get('MARIADB_HOST')
+MARIADB_PORT = int(os.environ.get('MARIADB_PORT', 3306))
+MARIADB_USER = os.environ.get('MARIADB_USER')
+MARIADB_PASSWORD = os.environ.get('MARIADB_PASSWORD')
+MARIADB_DATABASE = os.environ.get('MARIADB_DATABASE')
+MARIADB_POOL_SIZE = int(os.environ.get('MARIADB_POOL_SIZE', 2))
+# seconds to connect, read or write before the attempt fails
+MARIADB_TIMEOUT = int(os.environ.get('MARIADB_TIMEOUT', 10))
+# rows waiting for the database, replayed like the InfluxDB spool
+SQL_SPOOL_DIR = os.environ.get('SQL_SPOOL_DIR', './data/sql_spool')
+
+# insert statement and placeholder of each supported database
+DIALECTS = {
+    "mariadb": ("INSERT IGNORE INTO", "%s"),
+    "sqlite": ("INSERT OR IGNORE INTO", "?"),
+}
+
+log = logging.getLogger()
+
+
+def encode_row(row: tuple) -> str:
+    """one spool line of a row, JSON with the date in ISO 8601"""
+    meter_id, name, phase, tariff, date, value = row
+    return json.dumps([meter_id, name, phase, tariff, date.isoformat(),
+                       value])
+
+
+def decode_row(line: str) -> tuple:
+    meter_id, name, phase, tariff, date, value = json.loads(line)
+    return (meter_id, name, phase, tariff, datetime.fromisoformat(date),
+            value)
+
+
+class ConnectionPool:
+    """
+    Up to `size` DB-API connections opened on demand and reused; a
+    connection that raised an error is closed instead of returned
+    """
+
+    def __init__(self, connect, size: int = MARIADB_POOL_SIZE,
+                 timeout: float = MARIADB_TIMEOUT) -> None:
+        self._connect = connect
+        self._timeout = timeout
+        self._idle = queue.LifoQueue()
+        # one token per connection that may still be opened
+        self._tokens = queue.Queue()
+        for _ in range(size):
+            self._tokens.put(None)
+
+    @property
+    def idle(self) -> int:
+        return self._idle.qsize()
+
+    @contextmanager
+    def connection(self):
+        connection = self._acquire()
+        try:
+            yield connection
+        except Exception:
+            self._discard(connection)
+            raise
+        else:
+            self._idle.put(connection)
+
+    def close(self) -> None:
+        while not self._idle.empty():
+            self._discard(self._idle.get_nowait())
+
+    def _acquire(self) -> object:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            self._tokens.get(timeout=self._timeout)
+        except queue.Empty:
+            # every connection is in use, wait for one to be returned
+            return self._idle.get(timeout=self._timeout)
+        try:
+            return self._connect()
+        except Exception:
+            self._tokens.put(None)
+            raise
+
+    def _discard(self, connection: object) -> None:
+        try:
+            connection.close()
+        except Exception as exception:
+            log.debug(exception)
+        self._tokens.put(None)
+
+
+class SqlSink:
+    """
+    Relational copy of the minute readings for billing: every tick is
+    inserted with one executemany in one transaction. Rows already
+    stored are ignored, so a retried tick does not fail on duplicates.
+    """
+
+    _table = "meter_readings"
+
+    def __init__(self, connect, dialect: str = "mariadb",
+                 pool_size: int = MARIADB_POOL_SIZE,
+                 timeout: float = MARIADB_TIMEOUT) -> None:
+        """timeout - seconds to wait for a free connection of the pool"""
+        self._pool = ConnectionPool(connect, pool_size, timeout)
+        self._insert, placeholder = DIALECTS[dialect]
+        self._statement = \
+            f"{self._insert} {self._table} " \
+            f"(meter_id, name, phase, tariff, date, value) " \
+            f"VALUES ({', '.join([placeholder] * 6)})"
+        self._written = 0
+
+    @classmethod
+    def mariadb(cls) -> object | None:
+        """sink configured by MARIADB_*; None when MARIADB_HOST is unset"""
+        if not MARIADB_HOST:
+            return None
+        try:
+            import pymysql
+        except ImportError:
+            log.error("[SQL Sink] PyMySQL is not installed")
+            return None
+
+        def connect():
+            return pymysql.connect(host=MARIADB_HOST, port=MARIADB_PORT,
+                                   user=MARIADB_USER,
+                                   password=MARIADB_PASSWORD,
+                                   database=MARIADB_DATABASE,
+                                   connect_timeout=MARIADB_TIMEOUT,
+                                   read_timeout=MARIADB_TIMEOUT,
+                                   write_timeout=MARIADB_TIMEOUT,
+                                   autocommit=False)
+        return cls(connect, "mariadb")
+
+    @property
+    def written(self) -> int:
+        return self._written
+
+    def create_table(self) -> None:
+        with self._pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table} ("
+                f"meter_id INT NOT NULL, "
+                f"name VARCHAR(64) NOT NULL, "
+                f"phase VARCHAR(16) NOT NULL, "
+                f"tariff VARCHAR(16) NOT NULL DEFAULT '', "
+                f"date DATETIME NOT NULL, "
+                f"value DOUBLE NOT NULL, "
+                f"PRIMARY KEY (meter_id, name, phase, tariff, date))")
+            connection.commit()
+
+    def write(self, rows: list) -> None:
+        """rows: [(meter_id, name, phase, tariff, date, value), ...]"""
+        if not rows:
+            return
+        rows = [(meter_id, name, phase, tariff or "",
+                 date.strftime("%Y-%m-%d %H:%M:%S"), value)
+                for meter_id, name, phase, tariff, date, value in rows]
+        with self._pool.connection() as connection:
+            try:
+                connection.cursor().executemany(self._statement, rows)
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+        self._written += len(rows)
+
+    def close(self) -> None:
+        self._pool.close()
+
+
+class SqlSpoolWriter:
+    """
+    Writes batches of spooled rows (see encode_row) to a SqlSink, so
+    SpoolDrainer replays them with the same retries as InfluxDB; the
+    table is created before the first batch
+    """
+
+    def __init__(self, sink: SqlSink) -> None:
+        self._sink = sink
+        self._table_created = False
+
+    def write(self, lines: list) -> None:
+        if not self._table_created:
+            self._sink.create_table()
+            self._table_created = True
+        rows = []
+        for line in lines:
+            try:
+                rows.append(decode_row(line))
+            except ValueError as exception:
+                # a torn record would block the spool forever
+                log.error(f"[SQL Sink] Spooled row dropped ({exception})")
+        self._sink.write(rows)
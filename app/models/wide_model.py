@@ -0,0 +1,81 @@
+from datetime import datetime
+from .active_power_model import ActivePowerModel
+from .imported_active_energy_model import ImportedActiveEnergyModel
+from .line_protocol import to_line
+
+PHASE_FIELDS = {"total": "total", "phase_1": "l1", "phase_2": "l2",
+                "phase_3": "l3"}
+TARIFF_PREFIXES = {None: "", "total": "", "tariff_1": "t1_",
+                   "tariff_2": "t2_"}
+
+
+def _max(value: float | None, other: float | None) -> float | None:
+    if value is None:
+        return other
+    return value if other is None else max(value, other)
+
+
+class WideModel:
+    """
+    One point per meter and measurement family with phases and tariffs
+    as fields (total, l1, t1_total, t2_l3, ...) instead of tags
+    """
+
+    def __init__(self, measurement: str, meter_id: int,
+                 date: datetime) -> None:
+        self.measurement = measurement
+        self.meter_id = meter_id
+        self.date = date
+        self.fields = {}
+        self.acquired_at = None
+        self.spread = None
+
+    @staticmethod
+    def field_name(phase: str, tariff: str | None = None) -> str:
+        return TARIFF_PREFIXES.get(tariff, f"{tariff}_") \
+            + PHASE_FIELDS.get(phase, phase)
+
+    @classmethod
+    def group(cls, models: list) -> list:
+        """wide models built from the narrow models of one tick"""
+        wide_models = {}
+        for model in models:
+            if isinstance(model, ImportedActiveEnergyModel):
+                measurement = "imported_active_energy"
+            elif isinstance(model, ActivePowerModel):
+                measurement = "active_power"
+            else:
+                continue
+            key = (measurement, model.meter_id)
+            if key not in wide_models:
+                wide_models[key] = cls(measurement, model.meter_id,
+                                       model.date)
+            wide_models[key].add(model)
+        return list(wide_models.values())
+
+    def add(self, model: object) -> None:
+        # the narrow models of a meter come from one snapshot; the latest
+        # read is kept should they differ
+        self.acquired_at = _max(self.acquired_at, model.acquired_at)
+        self.spread = _max(self.spread, model.spread)
+        if isinstance(model, ImportedActiveEnergyModel):
+            name = self.field_name(model.phase, model.tariff)
+            self.fields[name] = model.imported_active_energy
+            return
+        name = self.field_name(model.phase)
+        self.fields[name] = model.active_power
+        aggregate = model.aggregate
+        if aggregate is None:
+            return
+        self.fields[f"{name}_mean"] = aggregate.mean
+        self.fields[f"{name}_min"] = aggregate.minimum
+        self.fields[f"{name}_max"] = aggregate.maximum
+        self.fields["sample_count"] = max(
+            self.fields.get("sample_count", 0), aggregate.count)
+
+    def to_line(self) -> str:
+        fields = dict(self.fields, acquired_at=self.acquired_at,
+                      acquisition_spread=self.spread)
+        return to_line(self.measurement,
+                       (("meter", f"meter{self.meter_id}"),),
+                       fields, self.date)
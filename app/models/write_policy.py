@@ -0,0 +1,76 @@
+class WritePolicy:
+    """
+    Decides when a new value of a series is worth writing.
+
+    deadband - minimum absolute change
+    relative_deadband - minimum change as a fraction of the last
+    written value
+    on_change - write only when the value changed at all
+    heartbeat - seconds after which a value is written regardless
+
+    Without deadbands and on_change every value is written.
+    """
+
+    def __init__(self, deadband: float = 0, relative_deadband: float = 0,
+                 on_change: bool = False,
+                 heartbeat: float | None = None) -> None:
+        self.deadband = deadband
+        self.relative_deadband = relative_deadband
+        self.on_change = on_change
+        self.heartbeat = heartbeat
+
+    def __repr__(self) -> str:
+        return f"WritePolicy(deadband={self.deadband}, " \
+               f"relative_deadband={self.relative_deadband}, " \
+               f"on_change={self.on_change}, heartbeat={self.heartbeat})"
+
+    @classmethod
+    def from_dict(cls, dictionary: dict) -> object:
+        return cls(deadband=dictionary.get('deadband', 0),
+                   relative_deadband=dictionary.get('relative_deadband', 0),
+                   on_change=dictionary.get('on_change', False),
+                   heartbeat=dictionary.get('heartbeat'))
+
+    @property
+    def filters(self) -> bool:
+        return self.on_change or self.deadband > 0 \
+            or self.relative_deadband > 0
+
+    def changed(self, last: float, value: float) -> bool:
+        threshold = max(self.deadband, self.relative_deadband * abs(last))
+        return abs(value - last) > threshold
+
+
+class WriteFilter:
+    """last written value and time of every series"""
+
+    def __init__(self) -> None:
+        self._last = {}
+        self._written = 0
+        self._suppressed = 0
+
+    @property
+    def written(self) -> int:
+        return self._written
+
+    @property
+    def suppressed(self) -> int:
+        return self._suppressed
+
+    def should_write(self, policy: WritePolicy | None, key: tuple,
+                     value: float, date, extremes: tuple = ()) -> bool:
+        """
+        extremes - e.g. mean, min and max of the samples of the minute;
+        the value is written when any of them leaves the deadband too
+        """
+        last = self._last.get(key)
+        if policy is None or not policy.filters or last is None or \
+                any(policy.changed(last[0], other)
+                    for other in (value, *extremes)) or \
+                (policy.heartbeat is not None and
+                 (date - last[1]).total_seconds() >= policy.heartbeat):
+            self._last[key] = (value, date)
+            self._written += 1
+            return True
+        self._suppressed += 1
+        return False
@@ -0,0 +1,160 @@
+import os
+import time
+import heapq
+import random
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from singleton import Singleton
+
+POLL_WORKERS = int(os.environ.get('POLL_WORKERS', 32))
+# the first deadline of a job is delayed by up to this part of its interval
+POLL_JITTER = float(os.environ.get('POLL_JITTER', 0.1))
+
+log = logging.getLogger()
+
+
+class Job:
+    """
+    missed - deadlines skipped because the previous run was still going
+    or the job started later than its next deadline
+    overruns - runs that took longer than the interval
+    """
+
+    __slots__ = ("name", "function", "interval", "deadline", "running",
+                 "cancelled", "runs", "missed", "overruns", "last_duration",
+                 "max_lateness")
+
+    def __init__(self, name: str, function, interval: float,
+                 deadline: float) -> None:
+        self.name = name
+        self.function = function
+        self.interval = interval
+        self.deadline = deadline
+        self.running = False
+        self.cancelled = False
+        self.runs = 0
+        self.missed = 0
+        self.overruns = 0
+        self.last_duration = None
+        self.max_lateness = 0.0
+
+    def __lt__(self, other) -> bool:
+        return self.deadline < other.deadline
+
+    def __repr__(self) -> str:
+        return f"Job({self.name}, every {self.interval} s)"
+
+
+class PollScheduler(threading.Thread, metaclass=Singleton):
+    """
+    Runs every polling job on a bounded worker pool at deadlines taken
+    from a heap ordered by the monotonic clock. A job never runs twice
+    at the same time; deadlines passed while it is still running are
+    counted as missed and the job continues at its next future deadline,
+    so the period does not drift.
+    """
+
+    def __init__(self, workers: int = POLL_WORKERS) -> None:
+        threading.Thread.__init__(self)
+        threading.Thread.daemon = True
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix="poll")
+        self._condition = threading.Condition()
+        self._heap = []
+        self._jobs = []
+        # monotonic time the first job was run (startup instrumentation)
+        self.first_run = None
+
+    @property
+    def jobs(self) -> list:
+        return self._jobs
+
+    @property
+    def missed(self) -> int:
+        return sum(job.missed for job in self._jobs)
+
+    @property
+    def overruns(self) -> int:
+        return sum(job.overruns for job in self._jobs)
+
+    def add(self, name: str, function, interval: float, align: bool = False,
+            jitter: float = POLL_JITTER) -> Job:
+        """
+        align - the first run is at the next multiple of the interval
+        on the wall clock (e.g. full minute)
+        """
+        delay = random.uniform(0, jitter * interval)
+        if align:
+            delay = interval - time.time() % interval
+        job = Job(name, function, interval, time.monotonic() + delay)
+        with self._condition:
+            self._jobs.append(job)
+            heapq.heappush(self._heap, job)
+            self._condition.notify()
+        log.debug(f"[Poll Scheduler] {job} added")
+        return job
+
+    def cancel(self, job: Job) -> None:
+        with self._condition:
+            job.cancelled = True
+            if job in self._jobs:
+                self._jobs.remove(job)
+
+    def start(self) -> None:
+        try:
+            super(PollScheduler, self).start()
+        except RuntimeError:
+            pass
+
+    def run(self) -> None:
+        log.debug("[Poll Scheduler] Started")
+        while True:
+            with self._condition:
+                while not self._heap:
+                    self._condition.wait()
+                job = self._heap[0]
+                delay = job.deadline - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                heapq.heappop(self._heap)
+                if job.cancelled:
+                    continue
+                deadline = job.deadline
+                if job.running:
+                    job.missed += 1
+                    log.warning(f"[Poll Scheduler] {job.name} missed its "
+                                f"deadline, previous run still in progress")
+                else:
+                    job.running = True
+                    self._executor.submit(self._execute, job, deadline)
+                self._reschedule(job)
+
+    def _reschedule(self, job: Job) -> None:
+        job.deadline += job.interval
+        now = time.monotonic()
+        if job.deadline <= now:
+            skipped = int((now - job.deadline) // job.interval) + 1
+            job.missed += skipped
+            job.deadline += skipped * job.interval
+        heapq.heappush(self._heap, job)
+
+    def _execute(self, job: Job, deadline: float) -> None:
+        start = time.monotonic()
+        if self.first_run is None:
+            self.first_run = start
+        job.max_lateness = max(job.max_lateness, start - deadline)
+        try:
+            job.function()
+        except Exception as exception:
+            log.exception(exception)
+        finally:
+            job.running = False
+        job.runs += 1
+        job.last_duration = time.monotonic() - start
+        if job.last_duration > job.interval:
+            job.overruns += 1
+            log.warning(f"[Poll Scheduler] {job.name} overran its "
+                        f"interval of {job.interval} s "
+                        f"({job.last_duration:.2f} s)")
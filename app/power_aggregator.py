@@ -0,0 +1,56 @@
+import math
+
+ACTIVE_POWER = "active_power"
+
+
+class PowerAggregate:
+    __slots__ = ("mean", "minimum", "maximum", "last", "count")
+
+    def __init__(self, mean: float, minimum: float, maximum: float,
+                 last: float, count: int) -> None:
+        self.mean = mean
+        self.minimum = minimum
+        self.maximum = maximum
+        self.last = last
+        self.count = count
+
+    def __repr__(self) -> str:
+        return f"PowerAggregate(mean={self.mean}, min={self.minimum}, " \
+               f"max={self.maximum}, last={self.last}, n={self.count})"
+
+
+def aggregate_window(buffer, since: float | None = None,
+                     until: float | None = None) -> PowerAggregate | None:
+    """
+    statistics of the samples of a RingBuffer in since < t <= until,
+    computed by the C builtins directly on the memoryviews of the window
+    """
+    window = buffer.window(since, until)
+    if window and since is not None and window[0][0][0] == since:
+        # the sample at `since` belongs to the previous window
+        first_timestamps, first_values = window[0]
+        window[0] = (first_timestamps[1:], first_values[1:])
+    parts = [values for _, values in window if len(values)]
+    if not parts:
+        return None
+    count = sum(len(values) for values in parts)
+    return PowerAggregate(
+        mean=math.fsum(math.fsum(values) for values in parts) / count,
+        minimum=min(min(values) for values in parts),
+        maximum=max(max(values) for values in parts),
+        last=parts[-1][-1],
+        count=count)
+
+
+def aggregate_power(history, since: float | None = None,
+                    until: float | None = None) -> dict:
+    """{phase: PowerAggregate} of the active power channels of a meter"""
+    aggregates = {}
+    for name, phase, tariff in history.channels:
+        if name != ACTIVE_POWER:
+            continue
+        aggregate = aggregate_window(history.buffer(name, phase, tariff),
+                                     since, until)
+        if aggregate is not None:
+            aggregates[phase] = aggregate
+    return aggregates
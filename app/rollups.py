@@ -0,0 +1,201 @@
+import os
+import json
+import math
+import logging
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+ROLLUP_STATE = os.environ.get('ROLLUP_STATE', './data/rollups.json')
+# suffix of the measurement: window length in seconds
+ROLLUP_RESOLUTIONS = {"15m": 900, "1h": 3600, "1d": 86400}
+
+log = logging.getLogger()
+
+
+def aware(date: datetime) -> datetime:
+    """naive dates are local time, as written by DatabaseScheduler"""
+    return date if date.tzinfo is not None else date.astimezone()
+
+
+def _localize(wall: datetime, tz) -> datetime:
+    """naive wall time in the zone of an aware date"""
+    if isinstance(tz, ZoneInfo):
+        return wall.replace(tzinfo=tz)
+    # fixed offset of datetime.astimezone(), the offset of the system
+    # zone at `wall` may differ
+    return wall.astimezone()
+
+
+def window(date: datetime, seconds: int) -> tuple:
+    """
+    (start, end] of the window containing `date` as aware datetimes.
+    Windows shorter than a day are aligned in UTC and always last
+    `seconds`; days follow the local midnight, so a day at a DST change
+    is 23 or 25 hours long and days never overlap.
+    """
+    date = aware(date)
+    if seconds < 86400:
+        end = math.ceil(date.timestamp() / seconds) * seconds
+        return datetime.fromtimestamp(end - seconds, timezone.utc), \
+            datetime.fromtimestamp(end, timezone.utc)
+    days = seconds // 86400
+    epoch = datetime(1970, 1, 1)
+    elapsed = (date.replace(tzinfo=None) - epoch) / timedelta(days=1)
+    end = epoch + timedelta(days=math.ceil(elapsed / days) * days)
+    return _localize(end - timedelta(days=days), date.tzinfo), \
+        _localize(end, date.tzinfo)
+
+
+class Rollup:
+    """reduced values of one closed window, stamped with its start"""
+
+    __slots__ = ("measurement", "meter_id", "phase", "tariff", "date",
+                 "fields")
+
+    def __init__(self, measurement: str, meter_id: int, phase: str,
+                 tariff: str | None, date: datetime, fields: dict) -> None:
+        self.measurement = measurement
+        self.meter_id = meter_id
+        self.phase = phase
+        self.tariff = tariff
+        self.date = date
+        self.fields = fields
+
+    def __repr__(self) -> str:
+        return f"Rollup({self.measurement}, meter{self.meter_id}, " \
+               f"{self.date}, {self.fields})"
+
+
+class Rollups:
+    """
+    Incremental 15 min / 1 h / 1 day rollups of the minute points:
+    energy deltas and power mean/min/max per window. The partial state
+    of the open windows and the energy at the end of the last closed
+    ones is persisted after every minute, so a restart continues
+    the windows instead of losing them. The energy delta of a window
+    starts from the end of the previous one or, for the first window
+    of a resolution, from the last reading before it.
+    """
+
+    def __init__(self, path: str = ROLLUP_STATE,
+                 resolutions: dict = ROLLUP_RESOLUTIONS) -> None:
+        self._path = path
+        self._resolutions = resolutions
+        # {resolution: {key: state}}
+        self._windows = {suffix: {} for suffix in resolutions}
+        # {key: energy at the end of the last closed window}
+        self._baselines = {suffix: {} for suffix in resolutions}
+        # {key: last energy reading}
+        self._readings = {}
+        # windows closed out of order, returned by the next close()
+        self._pending = []
+        self._load()
+
+    @property
+    def open_windows(self) -> int:
+        return sum(len(windows) for windows in self._windows.values())
+
+    def add_power(self, meter_id: int, phase: str, date: datetime,
+                  mean: float, minimum: float, maximum: float,
+                  count: int = 1) -> None:
+        key = f"active_power|{meter_id}|{phase}|"
+        for suffix, seconds in self._resolutions.items():
+            state = self._state(suffix, key, date, seconds)
+            state.setdefault("sum", 0.0)
+            state["sum"] += mean * count
+            state["count"] = state.get("count", 0) + count
+            state["min"] = min(state.get("min", minimum), minimum)
+            state["max"] = max(state.get("max", maximum), maximum)
+
+    def add_energy(self, meter_id: int, tariff: str, phase: str,
+                   date: datetime, value: float) -> None:
+        key = f"imported_active_energy|{meter_id}|{phase}|{tariff}"
+        previous = self._readings.get(key, value)
+        for suffix, seconds in self._resolutions.items():
+            state = self._state(suffix, key, date, seconds)
+            state.setdefault("first", previous)
+            state["last"] = value
+        self._readings[key] = value
+
+    def close(self, date: datetime) -> list:
+        """returns the rollups of the windows ending at or before `date`"""
+        rollups, self._pending = self._pending, []
+        date = aware(date)
+        for suffix in self._resolutions:
+            windows = self._windows[suffix]
+            for key in [key for key, state in windows.items()
+                        if aware(datetime.fromisoformat(state["end"]))
+                        <= date]:
+                rollups.append(self._reduce(suffix, key, windows.pop(key)))
+        self._save()
+        return rollups
+
+    def _state(self, suffix: str, key: str, date: datetime,
+               seconds: int) -> dict:
+        start, end = window(date, seconds)
+        windows = self._windows[suffix]
+        state = windows.get(key)
+        if state is not None and \
+                aware(datetime.fromisoformat(state["end"])) != end:
+            # the window was left open, e.g. by a restart
+            log.warning(f"[Rollups] Window {suffix} of {key} ending "
+                        f"{state['end']} closed incomplete")
+            self._pending.append(self._reduce(suffix, key, state))
+            state = None
+        if state is None:
+            state = windows[key] = {"start": start.isoformat(),
+                                    "end": end.isoformat(),
+                                    "naive": date.tzinfo is None}
+        return state
+
+    def _reduce(self, suffix: str, key: str, state: dict) -> Rollup:
+        name, meter_id, phase, tariff = key.split("|")
+        if "start" in state:
+            start = datetime.fromisoformat(state["start"])
+        else:
+            # state saved before the windows were zone-aware
+            start = aware(datetime.fromisoformat(state["end"])) \
+                - timedelta(seconds=state["seconds"])
+        if state.get("naive", True):
+            # stamped like the minute points it is computed from
+            start = start.astimezone().replace(tzinfo=None)
+        if name == "active_power":
+            fields = {"mean": state["sum"] / state["count"],
+                      "min": state["min"], "max": state["max"],
+                      "sample_count": state["count"]}
+        else:
+            baselines = self._baselines[suffix]
+            baseline = baselines.get(key, state["first"])
+            baselines[key] = state["last"]
+            fields = {"delta": state["last"] - baseline,
+                      "last": state["last"]}
+        return Rollup(f"{name}_{suffix}", int(meter_id), phase,
+                      tariff or None, start, fields)
+
+    def _load(self) -> None:
+        try:
+            with open(self._path) as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exception:
+            log.exception(exception)
+            log.error("[Rollups] State can't be loaded, starting empty")
+            return
+        for suffix in self._resolutions:
+            self._windows[suffix] = state["windows"].get(suffix, {})
+            self._baselines[suffix] = state["baselines"].get(suffix, {})
+        self._readings = state.get("readings", {})
+
+    def _save(self) -> None:
+        state = {"windows": self._windows, "baselines": self._baselines,
+                 "readings": self._readings}
+        try:
+            with open(self._path + ".tmp", "w") as file:
+                json.dump(state, file)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(self._path + ".tmp", self._path)
+        except OSError as exception:
+            log.exception(exception)
+            log.error("[Rollups] State can't be saved")
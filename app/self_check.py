@@ -0,0 +1,92 @@
+import logging
+from interfaces.mbus.mbus_frame import MbusFrame, SendInitFrame, \
+    RequestUserData2Frame
+from interfaces.modbus.modbus_frame import create_frames
+from interfaces.modbus.read_plan import ReadPlan
+
+log = logging.getLogger()
+
+# RSP_UD of meter 7, the same telegram test_mbus_frame is built on
+MBUS_TELEGRAM = bytes.fromhex(
+    "68 45 45 68 08 07 72 57 28 01 00 87 05 04 02 10 00 00 00 06 A8 FF 01 "
+    "00 00 00 00 00 00 06 A8 FF 02 4D 90 02 00 00 00 06 A8 FF 03 00 00 00 "
+    "00 00 00 06 A8 FF 00 4D 90 02 00 00 00 86 00 82 FF 80 FF 00 A8 ED B1 "
+    "03 00 00 0F F9 16")
+MBUS_ADDRESS = 7
+MBUS_DATA = [
+    {"name": "active_power", "phase": "phase_1", "value": 0.0},
+    {"name": "active_power", "phase": "phase_2", "value": 0.168013},
+    {"name": "active_power", "phase": "phase_3", "value": 0.0},
+    {"name": "active_power", "phase": "total", "value": 0.168013},
+    {"name": "imported_active_energy", "phase": "total", "tariff": "total",
+     "value": 6199.236}]
+# SND_NKE and REQ_UD2 of meter 7
+MBUS_TELEGRAMS = {SendInitFrame: bytes.fromhex("1040074716"),
+                  RequestUserData2Frame: bytes.fromhex("107b078216")}
+
+# {register: value} of the Modbus map, big endian words;
+# 6199236 Wh as float64 and 168013 W as float32
+MODBUS_REGISTERS = {885: 16727, 886: 42481, 887: 0, 888: 0,
+                    65: 18468, 66: 4928}
+MODBUS_BLOCKS = [(25, 42), (801, 124), (925, 4)]
+MODBUS_DATA = [
+    {"name": "imported_active_energy", "phase": "phase_2",
+     "tariff": "tariff_2", "value": 6199.236},
+    {"name": "active_power", "phase": "total", "value": 168.013}]
+
+
+class SelfCheckError(Exception):
+    pass
+
+
+def _expect(name: str, value, expected) -> None:
+    if value != expected:
+        raise SelfCheckError(f"{name}: {value!r} != {expected!r}")
+
+
+def _rounded(data: list) -> list:
+    # float noise of the decoders is not a failure
+    return [{k: round(v, 6) if isinstance(v, float) else v
+             for k, v in item.items()} for item in data]
+
+
+def check_mbus_decoding() -> None:
+    frame = MbusFrame(MBUS_TELEGRAM)
+    _expect("M-Bus address", frame.address, MBUS_ADDRESS)
+    _expect("M-Bus data", _rounded(frame.export_data()), MBUS_DATA)
+
+
+def check_mbus_encoding() -> None:
+    for frame_class, telegram in MBUS_TELEGRAMS.items():
+        _expect(frame_class.__name__, frame_class(MBUS_ADDRESS).frame,
+                telegram)
+
+
+def check_modbus_decoding() -> None:
+    plan = ReadPlan(create_frames())
+    blocks = [(block.start, block.count) for block in plan.blocks]
+    _expect("Modbus read blocks", blocks, MODBUS_BLOCKS)
+    plan.decode([[MODBUS_REGISTERS.get(register, 0)
+                  for register in range(start, start + count)]
+                 for start, count in blocks])
+    data = [frame.export() for frame in plan.frames
+            if frame.export()["value"]]
+    _expect("Modbus data", _rounded(data), MODBUS_DATA)
+
+
+CHECKS = (check_mbus_decoding, check_mbus_encoding, check_modbus_decoding)
+
+
+def run_self_check() -> list:
+    """
+    decodes and encodes the golden vectors in this process;
+    returns the failures, empty when everything matches
+    """
+    failures = []
+    for check in CHECKS:
+        try:
+            check()
+        except Exception as exception:
+            failures.append(f"{check.__name__}: {exception!r}")
+            log.error(f"[Self Check] {check.__name__} failed: {exception}")
+    return failures
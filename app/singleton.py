@@ -0,0 +1,16 @@
+import threading
+
+# reentrant: a singleton may create other singletons in its __init__
+lock = threading.RLock()
+
+
+class Singleton(type):
+    _instances = {}
+
+    def __call__(cls, *args, **kwargs):
+        if cls not in cls._instances:
+            with lock:
+                if cls not in cls._instances:
+                    cls._instances[cls] = super(Singleton, cls)\
+                        .__call__(*args, **kwargs)
+        return cls._instances[cls]
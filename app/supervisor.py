@@ -0,0 +1,351 @@
+import os
+import time
+import threading
+import logging
+import multiprocessing
+from acquisition_barrier import Acquisition, ACQUISITION_DEADLINE
+from meter_registry import MeterRegistry
+from poll_scheduler import PollScheduler
+from config_watcher import METER_CONFIG
+from models.meter_model import MeterModel
+from cluster import Cluster
+from singleton import Singleton
+from interfaces.snapshot import Snapshot, BAD
+from interfaces.ring_buffer import SampleHistory
+from interfaces.mbus.mbus_socket import MBUS_POLL_INTERVAL
+
+# worker processes polling the meters; 0 or 1 polls in this process
+COLLECTOR_WORKERS = int(os.environ.get('COLLECTOR_WORKERS', 0))
+# seconds between snapshot batches sent by a worker
+FORWARD_INTERVAL = float(os.environ.get('FORWARD_INTERVAL', 1))
+# default polling interval of each interface, as in the pollers
+DEFAULT_INTERVALS = {"modbus": 1, "mbus": MBUS_POLL_INTERVAL}
+# seconds the supervisor waits for a worker beyond its own deadline
+ACQUIRE_MARGIN = float(os.environ.get('ACQUIRE_MARGIN', 1))
+
+log = logging.getLogger()
+
+
+def partition(models: dict, workers: int) -> list:
+    """
+    [{meter_id: MeterModel}, ...] - meters grouped by host, so every
+    converter and gateway is polled by one worker, hosts spread
+    over the workers by their number of meters
+    """
+    hosts = {}
+    for model in models.values():
+        hosts.setdefault(model.host, []).append(model)
+    parts = [{} for _ in range(workers)]
+    for host in sorted(hosts, key=lambda host: (-len(hosts[host]), host)):
+        part = min(parts, key=len)
+        for model in hosts[host]:
+            part[model.meter_id] = model
+    return parts
+
+
+def compact(meter: object, since: float | None = None) -> tuple:
+    """
+    last snapshot of a meter and every sample of its history after
+    `since` as plain tuples to send over the pipe:
+    (meter_id, sequence, acquired_at, ((name, phase, tariff, value), ...),
+    (((name, phase, tariff), timestamps, values), ...))
+    """
+    snapshot = meter.snapshot
+    return (meter.meter_id, snapshot.sequence, snapshot.acquired_at,
+            tuple((value["name"], value["phase"], value.get("tariff"),
+                   value["value"]) for value in snapshot.values),
+            tuple(meter.history.samples(since)))
+
+
+class RemoteMeter:
+    """meter polled by a worker process, mirrored in the supervisor"""
+
+    def __init__(self, model: MeterModel, worker: object) -> None:
+        self.meter_id = model.meter_id
+        self.name = model.name
+        self.host = model.host
+        self.port = model.port
+        self.address = model.address
+        self.interval = model.interval \
+            or DEFAULT_INTERVALS.get(model.interface, 1)
+        self.acquired_at = None
+        self.snapshot = None
+        self.history = SampleHistory.for_interval(self.interval)
+        self._worker = worker
+
+    def __str__(self) -> str:
+        return f"RemoteMeter({self.host}:{self.port} [{self.address}])"
+
+    @property
+    def data(self) -> tuple:
+        snapshot = self.snapshot
+        return () if snapshot is None else snapshot.values
+
+    def update(self, sequence: int, acquired_at: float, values: tuple,
+               samples: tuple | None = None) -> None:
+        """
+        samples - every sample polled since the previous update, so the
+        history is kept at full resolution; the snapshot alone otherwise
+        """
+        snapshot = Snapshot(
+            [{"name": name, "phase": phase, "tariff": tariff, "value": value}
+             if tariff is not None else
+             {"name": name, "phase": phase, "value": value}
+             for name, phase, tariff, value in values],
+            acquired_at, sequence)
+        self.snapshot = snapshot
+        if samples is None:
+            self.history.record(snapshot)
+        else:
+            for channel, timestamps, channel_values in samples:
+                self.history.extend(tuple(channel), timestamps,
+                                    channel_values)
+        if snapshot.quality != BAD:
+            self.acquired_at = snapshot.acquired_at
+
+    def acquire(self, since: float) -> None:
+        self._worker.acquire(since)
+
+    def start(self, scheduler: object | None = None) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+class WorkerHandle:
+    """worker process and the supervisor end of its pipe"""
+
+    def __init__(self, index: int, models: dict) -> None:
+        self.index = index
+        self.models = models
+        self.meters = {meter_id: RemoteMeter(model, self)
+                       for meter_id, model in models.items()}
+        self.process = None
+        self._connection = None
+        self._send_lock = threading.Lock()
+        self._acquire_lock = threading.Lock()
+        self._acquired = threading.Event()
+        # `since` of the last acquisition requested from the worker
+        self._requested_since = 0.0
+        # time.monotonic() the reply to that acquisition is waited until
+        self._deadline = 0.0
+        # counters of the poll scheduler of the worker
+        self.missed = 0
+        self.overruns = 0
+
+    def __str__(self) -> str:
+        return f"Worker {self.index} ({len(self.models)} meters)"
+
+    def spawn(self) -> None:
+        context = multiprocessing.get_context("spawn")
+        connection, child = context.Pipe()
+        configs = [model.config for model in self.models.values()]
+        self.process = context.Process(target=run_worker,
+                                       args=(child, configs),
+                                       name=f"collector-{self.index}",
+                                       daemon=True)
+        self.process.start()
+        child.close()
+        self._connection = connection
+        threading.Thread(target=self._receive, args=(connection,),
+                         daemon=True).start()
+        log.info(f"[Supervisor] {self} started (pid {self.process.pid})")
+
+    def request(self, since: float,
+                timeout: float = ACQUISITION_DEADLINE + ACQUIRE_MARGIN
+                ) -> None:
+        """
+        one acquisition per worker for all of its meters; it is requested
+        once even if the worker is dead or misses the timeout
+        """
+        with self._acquire_lock:
+            if self._requested_since >= since:
+                return
+            self._requested_since = since
+            self._deadline = time.monotonic() + timeout
+            self._acquired.clear()
+        self._send(("acquire", since))
+
+    def wait(self) -> bool:
+        """waits for the requested acquisition until its deadline"""
+        return self._acquired.wait(
+            max(0.0, self._deadline - time.monotonic()))
+
+    def acquire(self, since: float,
+                timeout: float = ACQUISITION_DEADLINE + ACQUIRE_MARGIN
+                ) -> None:
+        self.request(since, timeout)
+        self.wait()
+
+    def _send(self, message: tuple) -> None:
+        with self._send_lock:
+            try:
+                self._connection.send(message)
+            except (OSError, ValueError) as exception:
+                log.debug(exception)
+
+    def _receive(self, connection) -> None:
+        while True:
+            try:
+                kind, payload = connection.recv()
+            except (EOFError, OSError):
+                log.warning(f"[Supervisor] {self} disconnected")
+                return
+            if kind == "snapshots":
+                for meter_id, *snapshot in payload:
+                    meter = self.meters.get(meter_id)
+                    if meter is not None:
+                        meter.update(*snapshot)
+            elif kind == "stats":
+                self.missed, self.overruns = payload
+            elif kind == "acquired" and payload >= self._requested_since:
+                # a late reply to an earlier acquisition is ignored
+                self._acquired.set()
+
+
+class Supervisor(metaclass=Singleton):
+    """
+    Polls the meters in worker processes, partitioned by host, and
+    mirrors their snapshots as RemoteMeters in the registry of this
+    process, where the single writer (DatabaseScheduler) saves them.
+    Stands in for MeterManager.
+    """
+
+    _monitor_interval = 5
+    # the barrier of a worker itself takes up to ACQUISITION_DEADLINE
+    acquisition_deadline = ACQUISITION_DEADLINE + ACQUIRE_MARGIN \
+        if ACQUISITION_DEADLINE > 0 else 0
+
+    def __init__(self, workers: int = COLLECTOR_WORKERS,
+                 path: str = METER_CONFIG) -> None:
+        self.registry = MeterRegistry()
+        self._workers_count = workers
+        self._path = path
+        self._workers = []
+        self.scheduler = PollScheduler()
+        self._job = None
+
+    @property
+    def meters(self) -> list:
+        return self.registry.meters
+
+    @property
+    def workers(self) -> list:
+        return self._workers
+
+    @property
+    def missed(self) -> int:
+        """polls skipped by the workers and by the monitor"""
+        return self.scheduler.missed + sum(worker.missed
+                                           for worker in self._workers)
+
+    @property
+    def overruns(self) -> int:
+        return self.scheduler.overruns + sum(worker.overruns
+                                             for worker in self._workers)
+
+    def acquire(self, barrier: object) -> Acquisition:
+        """
+        requests the acquisition from every worker at once, then waits
+        for all of them against the deadline of the barrier
+        """
+        started = time.time()
+        for worker in self._workers:
+            worker.request(started, barrier.deadline)
+        meters = []
+        late = []
+        for worker in self._workers:
+            meters.extend(worker.meters.values())
+            if not worker.wait():
+                late.extend(worker.meters.values())
+                log.warning(f"[Supervisor] {worker} missed the deadline "
+                            f"of {barrier.deadline} s")
+        return Acquisition(started, meters, late)
+
+    def start(self) -> None:
+        if self._workers:
+            return
+        models = Cluster().share(MeterModel.load_yaml(self._path))
+        for index, part in enumerate(partition(models,
+                                               self._workers_count)):
+            worker = WorkerHandle(index, part)
+            for meter_id, meter in worker.meters.items():
+                MeterModel.register(part[meter_id])
+                self.registry.add(meter, part[meter_id].interface)
+            worker.spawn()
+            self._workers.append(worker)
+        self._job = self.scheduler.add("supervisor", self._monitor,
+                                       self._monitor_interval)
+        self.scheduler.start()
+
+    def _monitor(self) -> None:
+        for worker in self._workers:
+            if not worker.process.is_alive():
+                log.error(f"[Supervisor] {worker} exited with code "
+                          f"{worker.process.exitcode}, restarting")
+                worker.spawn()
+
+
+def run_worker(connection, configs: list) -> None:
+    """entry point of a worker process"""
+    from log_formatter import log_setup
+    from meter_manager import MeterManager
+    from acquisition_barrier import AcquisitionBarrier
+    log_setup()
+    manager = MeterManager()
+    manager.apply({model.meter_id: model for model in
+                   (MeterModel.from_dict(config) for config in configs)})
+    barrier = AcquisitionBarrier()
+    send_lock = threading.Lock()
+    sent = {}
+    # {meter_id: timestamp of the last sample forwarded}
+    forwarded = {}
+    stats = [None]
+
+    def forward() -> None:
+        with send_lock:
+            batch = []
+            for meter in manager.meters:
+                snapshot = meter.snapshot
+                if snapshot is None or sent.get(meter.meter_id) == \
+                        snapshot.sequence:
+                    continue
+                sent[meter.meter_id] = snapshot.sequence
+                # every sample since the last batch, not only the latest
+                message = compact(meter, forwarded.get(meter.meter_id))
+                for _, timestamps, _ in message[4]:
+                    forwarded[meter.meter_id] = max(
+                        forwarded.get(meter.meter_id, timestamps[-1]),
+                        timestamps[-1])
+                batch.append(message)
+            if batch:
+                connection.send(("snapshots", batch))
+            counters = (manager.missed, manager.overruns)
+            if counters != stats[0]:
+                stats[0] = counters
+                connection.send(("stats", counters))
+
+    manager.scheduler.add("forward", forward, FORWARD_INTERVAL)
+    manager.scheduler.start()
+    while True:
+        try:
+            kind, payload = connection.recv()
+        except (EOFError, OSError):
+            # the supervisor is gone
+            return
+        if kind == "acquire":
+            # requests queued while the worker was busy are stale,
+            # only the newest acquisition is run
+            while connection.poll():
+                try:
+                    kind, payload = connection.recv()
+                except (EOFError, OSError):
+                    return
+            start = time.monotonic()
+            barrier.acquire(manager.meters)
+            forward()
+            with send_lock:
+                connection.send(("acquired", payload))
+            log.debug(f"[Worker] Acquisition took "
+                      f"{time.monotonic() - start:.3f} s")
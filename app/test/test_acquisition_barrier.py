@@ -0,0 +1,45 @@
+import time
+import unittest
+from acquisition_barrier import AcquisitionBarrier
+
+
+class _Meter:
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.acquired_at = None
+        self.reads = 0
+
+    def acquire(self, since: float) -> None:
+        time.sleep(self.delay)
+        self.reads += 1
+        self.acquired_at = time.time()
+
+
+class TestAcquisitionBarrier(unittest.TestCase):
+
+    def test_meters_read_in_parallel(self) -> None:
+        meters = [_Meter(0.1) for _ in range(8)]
+        start = time.monotonic()
+        acquisition = AcquisitionBarrier(deadline=1).acquire(meters)
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(len(acquisition.fresh), 8)
+        self.assertEqual(acquisition.late, [])
+        self.assertLess(acquisition.spread, 0.1)
+
+    def test_deadline(self) -> None:
+        fast, slow = _Meter(0), _Meter(0.5)
+        acquisition = AcquisitionBarrier(deadline=0.1).acquire([fast, slow])
+        self.assertEqual(acquisition.late, [slow])
+        self.assertEqual(acquisition.fresh, [fast.acquired_at])
+        self.assertEqual(acquisition.spread, 0)
+
+    def test_failed_read_logs_traceback(self) -> None:
+        meter = _Meter(0)
+        meter.acquire = lambda since: 1 / 0
+        with self.assertLogs(level="ERROR") as logs:
+            AcquisitionBarrier(deadline=1).acquire([meter])
+        self.assertIn("ZeroDivisionError", logs.output[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
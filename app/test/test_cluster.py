@@ -0,0 +1,60 @@
+import os
+import shutil
+import tempfile
+import unittest
+import multiprocessing
+from cluster import Cluster, HashRing
+
+HOSTS = [f"192.168.{i // 250}.{i % 250}" for i in range(1000)]
+
+
+def owned_hosts(instance: int, size: int) -> list:
+    cluster = Cluster(instance=instance, size=size, members_file=None,
+                      member=None)
+    return [host for host in HOSTS if cluster.owns(host)]
+
+
+class TestCluster(unittest.TestCase):
+
+    def test_instances_in_processes_cover_all_hosts_once(self) -> None:
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(3) as pool:
+            shares = pool.starmap(owned_hosts, [(i, 3) for i in range(3)])
+        self.assertEqual(sorted(sum(shares, [])), sorted(HOSTS))
+        for share in shares:
+            self.assertGreater(len(share), 200)
+        self.assertEqual(shares[0], owned_hosts(0, 3))
+
+    def test_minimal_movement(self) -> None:
+        before = HashRing(["a", "b", "c"])
+        after = HashRing(["a", "b", "c", "d"])
+        moved = [host for host in HOSTS
+                 if before.owner(host) != after.owner(host)]
+        # only keys taken over by the new member move
+        self.assertTrue(all(after.owner(host) == "d" for host in moved))
+        self.assertLess(len(moved), len(HOSTS) / 2)
+
+    def test_members_file(self) -> None:
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "members")
+            with open(path, "w") as file:
+                file.write("# collectors\nnorth\nsouth\n")
+            cluster = Cluster(members_file=path, member="north")
+            self.assertEqual(cluster.members, ["north", "south"])
+            self.assertFalse(cluster.changed())
+            with open(path, "w") as file:
+                file.write("north\n")
+            self.assertTrue(cluster.changed())
+            self.assertTrue(all(cluster.owns(host) for host in HOSTS))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_disabled(self) -> None:
+        cluster = Cluster(size=1, members_file=None)
+        self.assertFalse(cluster.enabled)
+        self.assertTrue(cluster.owns("any"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import shutil
+import tempfile
+import unittest
+from config_watcher import ConfigWatcher, diff_models
+from models.meter_model import MeterModel
+
+
+def model(meter_id: int, **changes) -> MeterModel:
+    config = {"id": meter_id, "name": f"meter_{meter_id}",
+              "host": "10.0.0.1", "port": 502, "address": meter_id,
+              "interface": "modbus"}
+    config.update(changes)
+    return MeterModel.from_dict(config)
+
+
+class TestConfigWatcher(unittest.TestCase):
+
+    def test_diff(self) -> None:
+        old = {1: model(1), 2: model(2), 3: model(3), 4: model(4)}
+        new = {1: model(1), 2: model(2, interval=5),
+               3: model(3, policies={"active_power": {"deadband": 1}}),
+               5: model(5)}
+        diff = diff_models(old, new)
+        self.assertEqual(diff.added, [5])
+        self.assertEqual(diff.removed, [4])
+        self.assertEqual(diff.changed, [2])
+        self.assertEqual(diff.updated, [3])
+        self.assertFalse(diff_models(old, dict(old)))
+
+    def test_watcher(self) -> None:
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "meter.yaml")
+            with open(path, "w") as file:
+                file.write("---\n")
+            watcher = ConfigWatcher(path)
+            self.assertFalse(watcher.changed())
+            with open(path, "a") as file:
+                file.write("- id: 1\n")
+            self.assertTrue(watcher.changed())
+            self.assertFalse(watcher.changed())
+            os.remove(path)
+            self.assertFalse(watcher.changed())
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
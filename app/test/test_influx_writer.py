@@ -0,0 +1,63 @@
+import sys
+import types
+import unittest
+from unittest.mock import MagicMock, patch
+from models import influx_writer
+from models.influx_writer import InfluxWriter
+
+
+class TestInfluxWriter(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.writer = InfluxWriter()
+        self.writer.close()
+        self.client_class = MagicMock()
+        self.write_api = self.client_class.return_value.write_api\
+            .return_value
+        client_module = types.ModuleType("influxdb_client")
+        client_module.InfluxDBClient = self.client_class
+        write_api_module = types.ModuleType("influxdb_client.client.write_api")
+        write_api_module.SYNCHRONOUS = "synchronous"
+        self.modules = patch.dict(sys.modules, {
+            "influxdb_client": client_module,
+            "influxdb_client.client": types.ModuleType(
+                "influxdb_client.client"),
+            "influxdb_client.client.write_api": write_api_module})
+        self.modules.start()
+
+    def tearDown(self) -> None:
+        self.writer.close()
+        self.modules.stop()
+
+    def test_batch_is_one_request(self) -> None:
+        lines = ["a v=1 60", "a v=2 60", "a v=3 60"]
+        self.writer.write(lines)
+        self.write_api.write.assert_called_once()
+        self.assertEqual(self.write_api.write.call_args.args[2], lines)
+        self.assertEqual(self.writer.last_count, 3)
+        self.assertIsNotNone(self.writer.last_latency)
+
+    def test_client_is_reused(self) -> None:
+        total = self.writer.total_points
+        self.writer.write(["a v=1 60"])
+        self.writer.write(["a v=2 120", "a v=3 180"])
+        self.client_class.assert_called_once()
+        self.assertEqual(self.writer.last_count, 2)
+        self.assertEqual(self.writer.total_points, total + 3)
+
+    def test_gzip_flag(self) -> None:
+        with patch.object(influx_writer, "INFLUXDB_GZIP", True):
+            self.writer.write(["a v=1 60"])
+        self.assertTrue(
+            self.client_class.call_args.kwargs["enable_gzip"])
+        self.client_class.return_value.write_api.assert_called_once_with(
+            write_options="synchronous")
+
+    def test_failed_write_resets_client(self) -> None:
+        self.write_api.write.side_effect = OSError("unreachable")
+        with self.assertRaises(OSError):
+            self.writer.write(["a v=1 60"])
+        self.client_class.return_value.close.assert_called_once()
+        self.write_api.write.side_effect = None
+        self.writer.write(["a v=1 60"])
+        self.assertEqual(self.client_class.call_count, 2)
@@ -0,0 +1,37 @@
+import unittest
+from datetime import datetime, timezone
+from models.line_protocol import to_line, tag_prefix
+
+
+class TestLineProtocol(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.date = datetime(2024, 3, 1, 12, 0)
+
+    def test_line(self) -> None:
+        line = to_line("active_power",
+                       (("phase", "phase_1"), ("meter", "meter1")),
+                       {"active_power": 168.013, "sample_count": 60,
+                        "acquired_at": None}, self.date)
+        self.assertEqual(line, "active_power,meter=meter1,phase=phase_1 "
+                               "active_power=168.013,sample_count=60i "
+                               "1709294400")
+
+    def test_whole_float_and_aware_date(self) -> None:
+        date = datetime(2024, 3, 1, 12, 0, tzinfo=timezone.utc)
+        self.assertEqual(to_line("e", (), {"v": 5.0}, date),
+                         "e v=5 1709294400")
+
+    def test_escaping(self) -> None:
+        self.assertEqual(tag_prefix("my measurement", (("a b", "c,d=e"),)),
+                         r"my\ measurement,a\ b=c\,d\=e")
+        self.assertEqual(to_line("m", (("t", None),), {"s": 'say "hi"'},
+                                 self.date),
+                         r'm s="say \"hi\"" 1709294400')
+
+    def test_no_fields(self) -> None:
+        self.assertEqual(to_line("m", (), {"v": None}, self.date), "")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from interfaces.mbus.mbus_frame import str_to_bytes
+from interfaces.mbus.mbus_framer import MbusFramer
+
+
+class TestMbusFramer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.long_frame = str_to_bytes(
+            "68 45 45 68 08 07 72 57 28 01 00 87 05 04 02 10 "
+            "00 00 00 06 A8 FF 01 00 00 00 00 00 00 06 A8 FF "
+            "02 4D 90 02 00 00 00 06 A8 FF 03 00 00 00 00 00 "
+            "00 06 A8 FF 00 4D 90 02 00 00 00 86 00 82 FF 80 "
+            "FF 00 A8 ED B1 03 00 00 0F F9 16")
+        cls.short_frame = str_to_bytes("10 7B 07 82 16")
+
+    def test_complete_frames(self) -> None:
+        framer = MbusFramer()
+        frames = framer.feed(b"\xE5" + self.short_frame + self.long_frame)
+        self.assertEqual(frames, [b"\xE5", self.short_frame,
+                                  self.long_frame])
+        self.assertEqual(framer.pending, 0)
+
+    def test_frame_split_across_chunks(self) -> None:
+        framer = MbusFramer()
+        self.assertEqual(framer.feed(self.long_frame[:3]), [])
+        self.assertEqual(framer.feed(self.long_frame[3:40]), [])
+        self.assertEqual(framer.pending, 40)
+        self.assertEqual(framer.feed(self.long_frame[40:]),
+                         [self.long_frame])
+
+    def test_byte_by_byte(self) -> None:
+        framer = MbusFramer()
+        frames = []
+        for i in range(len(self.long_frame)):
+            frames += framer.feed(self.long_frame[i:i + 1])
+        self.assertEqual(frames, [self.long_frame])
+
+    def test_resynchronisation_after_garbage(self) -> None:
+        framer = MbusFramer()
+        frames = framer.feed(b"\x00\x68\x01\x68\x10\x7B" + self.long_frame)
+        self.assertEqual(frames, [self.long_frame])
+        self.assertEqual(framer.discarded, 6)
+
+    def test_wrong_checksum_is_skipped(self) -> None:
+        corrupted = bytearray(self.long_frame)
+        corrupted[20] ^= 0x01
+        framer = MbusFramer()
+        frames = framer.feed(bytes(corrupted) + self.long_frame)
+        self.assertEqual(frames, [self.long_frame])
+
+    def test_buffer_is_bounded(self) -> None:
+        framer = MbusFramer()
+        for _ in range(100):
+            framer.feed(bytes(range(0x20, 0x60)))
+        self.assertEqual(framer.pending, 0)
+        framer.feed(self.long_frame[:-1])
+        self.assertLessEqual(framer.pending, 261)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from interfaces.mbus.mbus_frame import str_to_bytes
+from interfaces.mbus.mbus_records import decode_records, MbusRecordError
+
+
+class TestMbusRecords(unittest.TestCase):
+
+    def test_energy_record(self) -> None:
+        record = decode_records(str_to_bytes("86 10 82 FF 80 FF 02 "
+                                             "A8 ED B1 03 00 00"))[0]
+        self.assertEqual(record.tariff, 1)
+        self.assertEqual(record.vife, (0xFF, 0x80, 0xFF, 0x02))
+        self.assertEqual(record.name, "energy")
+        self.assertEqual(record.unit, "Wh")
+        self.assertEqual(record.exponent, -1)
+        self.assertEqual(record.value, 61992360)
+        self.assertEqual(record.end, 13)
+
+    def test_signed_power_record(self) -> None:
+        record = decode_records(str_to_bytes("06 A8 FF 01 "
+                                             "FF FF FF FF FF FF"))[0]
+        self.assertEqual(record.name, "power")
+        self.assertEqual(record.value, -1)
+
+    def test_bcd_and_storage(self) -> None:
+        record = decode_records(str_to_bytes("CC 01 13 78 56 34 12"))[0]
+        self.assertEqual(record.storage, 3)
+        self.assertEqual(record.value, 12345678)
+        self.assertEqual(record.name, "volume")
+
+    def test_unknown_records_are_skipped_by_length(self) -> None:
+        records = decode_records(str_to_bytes("2F 04 FD 17 01 02 03 04 "
+                                              "02 2B 10 00 0F 01 02"))
+        self.assertEqual([r.start for r in records], [1, 8])
+        self.assertIsNone(records[0].name)
+        self.assertEqual(records[1].value, 16)
+
+    def test_truncated_record(self) -> None:
+        with self.assertRaises(MbusRecordError):
+            decode_records(str_to_bytes("06 A8 FF 01 00 00"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import time
+import socket
+import selectors
+import threading
+import unittest
+from interfaces.ring_buffer import SampleHistory
+from interfaces.mbus.mbus_socket import MbusSocket, response_timeout
+from interfaces.mbus.mbus_framer import ACK, LONG_START, \
+    MAX_TELEGRAM_LENGTH
+from self_check import MBUS_TELEGRAM, MBUS_TELEGRAMS, MBUS_ADDRESS
+
+
+class _Meter:
+    def __init__(self, address: int, answers: bool = True) -> None:
+        self.address = address
+        self.interval = 30
+        self.answers = answers
+        self.acquired_at = None
+
+
+class _Socket(MbusSocket):
+    """bus without a converter; meters answer at once or never"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._connected = True
+        self.requests = []
+
+    def _request(self, meter: object) -> None:
+        self.requests.append(meter.address)
+        if meter.answers:
+            meter.acquired_at = time.time()
+
+
+class TestMbusSocket(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.socket = _Socket()
+        self.meters = [_Meter(1), _Meter(2, answers=False), _Meter(3)]
+        for meter in self.meters:
+            self.socket.append(meter)
+
+    def tearDown(self) -> None:
+        self.socket.close()
+
+    def test_acquire_reads_all_meters_once(self) -> None:
+        since = time.time()
+        for meter in self.meters:
+            self.socket.acquire(since)
+        self.assertEqual(self.socket.requests, [1, 2, 3])
+
+    def test_dead_meter_is_asked_again_next_acquisition(self) -> None:
+        self.socket.acquire(time.time())
+        time.sleep(0.01)
+        self.socket.acquire(time.time())
+        self.assertEqual(self.socket.requests, [1, 2, 3, 1, 2, 3])
+
+    def test_meters_read_since_are_not_forced(self) -> None:
+        since = time.time()
+        for meter in self.meters:
+            meter.acquired_at = since
+        self.socket.acquire(since)
+        self.assertEqual(self.socket.requests, [])
+
+
+class _BusMeter:
+    def __init__(self, address: int) -> None:
+        self.address = address
+        self.interval = 30
+        self.acquired_at = None
+        self.snapshot = None
+        self.history = SampleHistory.for_interval(self.interval)
+
+
+class _Converter(threading.Thread):
+    """
+    converter end of a socketpair: answers SND_NKE with an ACK and
+    REQ_UD2 with the RSP_UD of meter 7 in two writes
+    """
+
+    def __init__(self, connection: socket.socket,
+                 answers: bool = True) -> None:
+        super().__init__(daemon=True)
+        self.connection = connection
+        self.answers = answers
+        self.requests = []
+
+    def run(self) -> None:
+        try:
+            while True:
+                request = self.connection.recv(5)
+                if not request:
+                    return
+                self.requests.append(request)
+                if not self.answers:
+                    continue
+                if request[1] == 0x40:
+                    self.connection.sendall(bytes([ACK]))
+                else:
+                    self.connection.sendall(MBUS_TELEGRAM[:20])
+                    time.sleep(0.05)
+                    self.connection.sendall(MBUS_TELEGRAM[20:])
+        except OSError:
+            return
+
+
+class TestMbusSocketEngine(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.socket = MbusSocket()
+        self.meter = _BusMeter(MBUS_ADDRESS)
+        self.socket.append(self.meter)
+        client, self.peer = socket.socketpair()
+        self.socket._socket.close()
+        self.socket._socket = client
+        self.socket._selector.register(client, selectors.EVENT_READ)
+        self.socket._connected = True
+
+    def tearDown(self) -> None:
+        if self.socket._connected:
+            self.socket.close()
+        self.peer.close()
+
+    def test_cycle_ends_with_the_telegram(self) -> None:
+        converter = _Converter(self.peer)
+        converter.start()
+        start = time.monotonic()
+        self.socket.acquire(time.time())
+        # far below the timeouts of the ACK and the RSP_UD
+        self.assertLess(time.monotonic() - start,
+                        response_timeout(MAX_TELEGRAM_LENGTH) / 3)
+        self.assertEqual(converter.requests,
+                         list(MBUS_TELEGRAMS.values()))
+        self.assertIsNotNone(self.meter.acquired_at)
+        self.assertEqual(self.meter.snapshot.values[-1]["name"],
+                         "imported_active_energy")
+
+    def test_receive_timeout(self) -> None:
+        start = time.monotonic()
+        self.assertIsNone(self.socket.receive(ACK, 0.1))
+        self.assertGreaterEqual(time.monotonic() - start, 0.1)
+
+    def test_late_telegram_is_dispatched(self) -> None:
+        # RSP_UD of a request that timed out, then the expected ACK
+        self.peer.sendall(MBUS_TELEGRAM + bytes([ACK]))
+        self.assertEqual(self.socket.receive(ACK, 1), bytes([ACK]))
+        self.assertIsNotNone(self.meter.snapshot)
+        self.meter.snapshot = None
+        self.peer.sendall(MBUS_TELEGRAM)
+        time.sleep(0.05)
+        self.socket._discard_input()
+        self.assertIsNotNone(self.meter.snapshot)
+        self.assertIsNone(self.socket.receive(LONG_START, 0))
+
+    def test_connection_closed_by_the_converter(self) -> None:
+        self.peer.close()
+        self.socket.acquire(time.time())
+        self.assertFalse(self.socket._connected)
+        self.assertIsNone(self.meter.acquired_at)
+
+
+if __name__ == '__main__':
+    unittest.main()
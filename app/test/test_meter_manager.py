@@ -0,0 +1,138 @@
+import sys
+import types
+import unittest
+from unittest.mock import patch
+from meter_registry import MeterRegistry
+from models.meter_model import MeterModel
+
+try:
+    import meter_manager
+except ImportError:
+    # the meters are replaced by _StubMeter in every test anyway
+    client_module = types.ModuleType("pyModbusTCP.client")
+    client_module.ModbusClient = object
+    with patch.dict(sys.modules, {
+            "pyModbusTCP": types.ModuleType("pyModbusTCP"),
+            "pyModbusTCP.client": client_module}):
+        import meter_manager
+
+
+def model(meter_id: int, **changes) -> MeterModel:
+    config = {"id": meter_id, "name": f"meter_{meter_id}",
+              "host": "10.0.0.1", "port": 502, "address": meter_id,
+              "interface": "modbus"}
+    config.update(changes)
+    return MeterModel.from_dict(config)
+
+
+class _StubMeter:
+    """poller without a bus; meters in `failing` can't be started"""
+
+    failing = set()
+    started = []
+    stopped = []
+
+    def __init__(self, meter_model: MeterModel) -> None:
+        self.meter_id = meter_model.meter_id
+        self.name = meter_model.name
+        self.host = meter_model.host
+        self.port = meter_model.port
+        self.address = meter_model.address
+
+    @classmethod
+    def from_model(cls, meter_model: MeterModel) -> object:
+        return cls(meter_model)
+
+    def start(self, scheduler: object) -> None:
+        if self.meter_id in _StubMeter.failing:
+            raise ConnectionError(f"meter_{self.meter_id} unreachable")
+        _StubMeter.started.append(self.meter_id)
+
+    def stop(self) -> None:
+        _StubMeter.stopped.append(self.meter_id)
+
+
+class _Watcher:
+    """meter.yaml that never changes"""
+
+    path = "meter.yaml"
+
+    def changed(self) -> bool:
+        return False
+
+
+class TestMeterManager(unittest.TestCase):
+
+    def setUp(self) -> None:
+        _StubMeter.failing = set()
+        _StubMeter.started = []
+        _StubMeter.stopped = []
+        self.meter = patch.object(meter_manager, "Modbus", _StubMeter)
+        self.meter.start()
+        self.models = patch.object(MeterModel, "_list", {})
+        self.models.start()
+        self.registry = MeterRegistry()
+        self.registry.clear()
+        self.manager = meter_manager.MeterManager()
+        self.manager._models = {}
+        self.manager._failed = set()
+        self.manager._watcher = _Watcher()
+        self.cluster = patch.object(self.manager.cluster, "changed",
+                                    return_value=False)
+        self.cluster.start()
+
+    def tearDown(self) -> None:
+        self.cluster.stop()
+        self.registry.clear()
+        self.models.stop()
+        self.meter.stop()
+
+    def test_apply_starts_only_the_differences(self) -> None:
+        self.manager.apply({1: model(1), 2: model(2), 3: model(3)})
+        self.assertEqual(_StubMeter.started, [1, 2, 3])
+        first = self.registry.get(3)
+        policies = {"active_power": {"deadband": 1}}
+        self.manager.apply({2: model(2, interval=5),
+                            3: model(3, policies=policies), 4: model(4)})
+        self.assertEqual(_StubMeter.stopped, [1, 2])
+        self.assertEqual(_StubMeter.started, [1, 2, 3, 2, 4])
+        self.assertEqual(sorted(meter.meter_id
+                                for meter in self.manager.meters), [2, 3, 4])
+        # a policy-only update keeps the poller running
+        self.assertIs(self.registry.get(3), first)
+        self.assertEqual(MeterModel.get_list()[3].policies["active_power"]
+                         .deadband, 1)
+        self.assertEqual(MeterModel.get_list()[2].interval, 5)
+
+    def test_failed_start_is_retried(self) -> None:
+        _StubMeter.failing = {2}
+        self.manager._models = {1: model(1), 2: model(2)}
+        self.manager.apply(self.manager._models)
+        self.assertEqual(_StubMeter.started, [1])
+        # e.g. leaves the bus cycle of the shared converter
+        self.assertEqual(_StubMeter.stopped, [2])
+        self.assertNotIn(2, MeterModel.get_list())
+        self.assertNotIn(2, self.registry)
+        self.assertEqual(self.manager._failed, {2})
+        self.manager._reload()
+        self.assertEqual(_StubMeter.started, [1])
+        _StubMeter.failing = set()
+        self.manager._reload()
+        self.assertEqual(_StubMeter.started, [1, 2])
+        self.assertIn(2, self.registry)
+        self.assertEqual(self.manager._failed, set())
+        self.manager._reload()
+        self.assertEqual(_StubMeter.started, [1, 2])
+
+    def test_reload_of_a_changed_config(self) -> None:
+        self.manager.apply({1: model(1)})
+        self.manager._watcher.changed = lambda: True
+        with patch.object(MeterModel, "load_yaml",
+                          return_value={1: model(1), 5: model(5)}):
+            self.manager._reload()
+        self.assertEqual(_StubMeter.started, [1, 5])
+        self.assertEqual(sorted(self.manager._models), [1, 5])
+
+
+if __name__ == '__main__':
+    unittest.main()
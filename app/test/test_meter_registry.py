@@ -0,0 +1,75 @@
+import unittest
+from meter_registry import MeterRegistry
+
+
+class _Meter:
+    def __init__(self, meter_id: int, host: str, port: int,
+                 address: int | None) -> None:
+        self.meter_id = meter_id
+        self.host = host
+        self.port = port
+        self.address = address
+
+
+class TestMeterRegistry(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.registry = MeterRegistry()
+        self.registry.clear()
+        self.first = _Meter(1, "10.0.0.1", 502, 1)
+        self.second = _Meter(2, "10.0.0.1", 502, 2)
+        self.third = _Meter(3, "10.0.0.2", 10001, 1)
+        self.registry.add(self.first, "modbus")
+        self.registry.add(self.second, "modbus")
+        self.registry.add(self.third, "mbus")
+
+    def tearDown(self) -> None:
+        self.registry.clear()
+
+    def test_indexes(self) -> None:
+        self.assertEqual(len(self.registry), 3)
+        self.assertIs(self.registry.get(2), self.second)
+        self.assertIs(self.registry.find("10.0.0.1", 502, 2), self.second)
+        self.assertEqual(self.registry.by_endpoint("10.0.0.1", 502),
+                         [self.first, self.second])
+        self.assertEqual(self.registry.by_interface("mbus"), [self.third])
+        self.assertEqual(self.registry.by_address(1),
+                         [self.first, self.third])
+        self.assertEqual(self.registry.interface(3), "mbus")
+        self.assertEqual(self.registry.by_host_and_address("10.0.0.1", 2),
+                         [self.second])
+        self.assertEqual(self.registry.by_host_and_address("10.0.0.2", 2),
+                         [])
+
+    def test_duplicate_id(self) -> None:
+        with self.assertRaises(KeyError):
+            self.registry.add(_Meter(1, "10.0.0.9", 502, 9), "modbus")
+
+    def test_remove(self) -> None:
+        self.assertIs(self.registry.remove(2), self.second)
+        self.assertIsNone(self.registry.get(2))
+        self.assertIsNone(self.registry.find("10.0.0.1", 502, 2))
+        self.assertEqual(self.registry.by_host_and_address("10.0.0.1", 2),
+                         [])
+        self.assertEqual(self.registry.by_endpoint("10.0.0.1", 502),
+                         [self.first])
+        self.registry.remove(3)
+        self.assertEqual(self.registry.by_interface("mbus"), [])
+        self.assertIsNone(self.registry.remove(3))
+
+    def test_connection_shared_per_endpoint(self) -> None:
+        created = []
+
+        def factory(host: str, port: int) -> tuple:
+            created.append((host, port))
+            return host, port
+        first = self.registry.connection("mbus", "10.0.0.2", 10001, factory)
+        second = self.registry.connection("mbus", "10.0.0.2", 10001,
+                                          factory)
+        self.assertIs(first, second)
+        self.assertEqual(created, [("10.0.0.2", 10001)])
+        self.assertEqual(self.registry.connections("mbus"), [first])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,202 @@
+import asyncio
+import struct
+import unittest
+from unittest.mock import AsyncMock
+from interfaces.modbus.modbus_async import AsyncModbusClient, AsyncModbus
+from meter_registry import MeterRegistry
+
+
+class _FakeGateway:
+    """
+    Answers Read Holding Registers with register = unit id * 1000 + address;
+    responses are sent in reverse order of the requests of each batch;
+    addresses from 2000 get a byte count larger than the data sent
+    """
+
+    def __init__(self, batch: int = 1, split: bool = False) -> None:
+        self.batch = batch
+        # every response is sent in two TCP writes, header and PDU
+        self.split = split
+        self.connections = 0
+        self.requests = []
+        self.server = None
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._handle,
+                                                 '127.0.0.1', 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer) -> None:
+        self.connections += 1
+        try:
+            while True:
+                responses = []
+                for _ in range(self.batch):
+                    request = await reader.readexactly(12)
+                    self.requests.append(request)
+                    responses.append(self._response(request))
+                for response in reversed(responses):
+                    if self.split:
+                        writer.write(response[:7])
+                        await writer.drain()
+                        await asyncio.sleep(0.01)
+                        response = response[7:]
+                    writer.write(response)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    @staticmethod
+    def _response(request: bytes) -> bytes:
+        transaction_id, _, _, unit_id, _, address, count = \
+            struct.unpack(">HHHBBHH", request)
+        if address >= 2000:
+            pdu = struct.pack(">BBH", 3, count * 2, 1)
+        elif address >= 1000:
+            pdu = struct.pack(">BB", 0x83, 2)
+        else:
+            regs = [unit_id * 1000 + address + i for i in range(count)]
+            pdu = struct.pack(f">BB{count}H", 3, count * 2, *regs)
+        return struct.pack(">HHHB", transaction_id, 0, len(pdu) + 1,
+                           unit_id) + pdu
+
+
+class TestAsyncModbusClient(unittest.IsolatedAsyncioTestCase):
+
+    async def test_request_mbap_framing(self) -> None:
+        gateway = _FakeGateway()
+        port = await gateway.start()
+        client = AsyncModbusClient('127.0.0.1', port)
+        await client.ensure_open()
+        await client.read_holding_registers(801, 124, 7)
+        await client.read_holding_registers(25, 42, 7)
+        # transaction id, protocol 0, length 6, unit id, function 0x03,
+        # start address, register count
+        self.assertEqual(gateway.requests, [
+            bytes.fromhex("0001 0000 0006 07 03 0321 007c"),
+            bytes.fromhex("0002 0000 0006 07 03 0019 002a")])
+        await client.close()
+        await gateway.stop()
+
+    async def test_read_holding_registers_reply(self) -> None:
+        gateway = _FakeGateway(split=True)
+        port = await gateway.start()
+        client = AsyncModbusClient('127.0.0.1', port)
+        await client.ensure_open()
+        # byte count 2 * 3, registers in big endian
+        self.assertEqual(
+            _FakeGateway._response(bytes.fromhex(
+                "0005 0000 0006 01 03 0002 0003")),
+            bytes.fromhex("0005 0000 0009 01 03 06 03ea 03eb 03ec"))
+        self.assertEqual(await client.read_holding_registers(2, 3, 1),
+                         [1002, 1003, 1004])
+        await client.close()
+        await gateway.stop()
+
+    async def test_read_with_unit_id(self) -> None:
+        gateway = _FakeGateway()
+        port = await gateway.start()
+        client = AsyncModbusClient('127.0.0.1', port)
+        self.assertTrue(await client.ensure_open())
+        self.assertEqual(await client.read_holding_registers(25, 2, 3),
+                         [3025, 3026])
+        self.assertEqual(await client.read_holding_registers(801, 1, 7),
+                         [7801])
+        await client.close()
+        await gateway.stop()
+
+    async def test_exception_response(self) -> None:
+        gateway = _FakeGateway()
+        port = await gateway.start()
+        client = AsyncModbusClient('127.0.0.1', port)
+        await client.ensure_open()
+        self.assertIsNone(await client.read_holding_registers(1000, 2))
+        self.assertTrue(client.is_open())
+        await client.close()
+        await gateway.stop()
+
+    async def test_malformed_response(self) -> None:
+        gateway = _FakeGateway()
+        port = await gateway.start()
+        client = AsyncModbusClient('127.0.0.1', port)
+        await client.ensure_open()
+        self.assertIsNone(await client.read_holding_registers(2000, 4))
+        self.assertEqual(await client.read_holding_registers(25, 1, 1),
+                         [1025])
+        await client.close()
+        await gateway.stop()
+
+    async def test_pipelined_responses_matched_by_transaction(self) -> None:
+        gateway = _FakeGateway(batch=4)
+        port = await gateway.start()
+        client = AsyncModbusClient('127.0.0.1', port, window=4)
+        await client.ensure_open()
+        results = await asyncio.gather(*[
+            client.read_holding_registers(100, 1, unit_id)
+            for unit_id in range(1, 9)])
+        self.assertEqual(results, [[unit_id * 1000 + 100]
+                                   for unit_id in range(1, 9)])
+        self.assertEqual(gateway.connections, 1)
+        self.assertEqual(client.in_flight, 0)
+        await client.close()
+        await gateway.stop()
+
+    async def test_timeout_closes_connection(self) -> None:
+        gateway = _FakeGateway(batch=2)
+        port = await gateway.start()
+        client = AsyncModbusClient('127.0.0.1', port, timeout=0.1)
+        await client.ensure_open()
+        self.assertIsNone(await client.read_holding_registers(100, 1))
+        self.assertFalse(client.is_open())
+        await gateway.stop()
+
+
+class TestAsyncModbusPoll(unittest.IsolatedAsyncioTestCase):
+
+    async def test_poll_survives_errors(self) -> None:
+        gateway = _FakeGateway()
+        port = await gateway.start()
+        meter = AsyncModbus(1, host="127.0.0.1", port=port, address=1,
+                            interval=0.05)
+        meter._get_data = AsyncMock(side_effect=struct.error("short"))
+        task = asyncio.create_task(meter.poll())
+        await asyncio.sleep(0.3)
+        self.assertFalse(task.done())
+        self.assertGreater(meter._get_data.await_count, 1)
+        task.cancel()
+        meter._engine.remove(meter)
+        await meter._engine.client("127.0.0.1", port).close()
+        MeterRegistry().remove_connection("modbus_async", "127.0.0.1", port)
+        await gateway.stop()
+
+
+class TestAsyncModbus(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.registry = MeterRegistry()
+        self.registry.clear()
+
+    def tearDown(self) -> None:
+        self.registry.clear()
+
+    def test_client_dropped_with_last_meter(self) -> None:
+        first = AsyncModbus(1, host="10.0.0.5", port=502, address=1)
+        second = AsyncModbus(2, host="10.0.0.5", port=502, address=2)
+        self.registry.add(first, "modbus")
+        self.registry.add(second, "modbus")
+        client = first._engine.client("10.0.0.5", 502)
+        self.assertIs(second._engine.client("10.0.0.5", 502), client)
+        self.registry.remove(1)
+        first.stop()
+        self.assertEqual(self.registry.connections("modbus_async"), [client])
+        self.registry.remove(2)
+        second.stop()
+        self.assertEqual(self.registry.connections("modbus_async"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
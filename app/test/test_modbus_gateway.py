@@ -0,0 +1,144 @@
+import sys
+import time
+import types
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from meter_registry import MeterRegistry
+
+
+class _FakeClient:
+    """
+    pyModbusTCP ModbusClient answering with register =
+    unit id * 1000 + address; `reachable` is shared by every client
+    """
+
+    instances = []
+    reachable = True
+
+    def __init__(self) -> None:
+        self.opens = 0
+        self.units = []
+        self._unit_id = 1
+        self._open = False
+        _FakeClient.instances.append(self)
+
+    def host(self, host: str) -> None:
+        self._host = host
+
+    def port(self, port: int) -> None:
+        self._port = port
+
+    def timeout(self, timeout: float) -> None:
+        self._timeout = timeout
+
+    def unit_id(self, unit_id: int) -> None:
+        self._unit_id = unit_id
+
+    def open(self) -> bool:
+        self.opens += 1
+        self._open = _FakeClient.reachable
+        return self._open
+
+    def is_open(self) -> bool:
+        return self._open
+
+    def close(self) -> None:
+        self._open = False
+
+    def read_holding_registers(self, address: int,
+                               count: int) -> list | None:
+        if not self._open or not _FakeClient.reachable:
+            self._open = False
+            return None
+        # a slow gateway, so the requests of the meters overlap
+        time.sleep(0.01)
+        self.units.append(self._unit_id)
+        return [self._unit_id * 1000 + address + i for i in range(count)]
+
+
+try:
+    from interfaces.modbus import modbus_gateway
+except ImportError:
+    # pyModbusTCP is replaced by _FakeClient in every test anyway
+    client_module = types.ModuleType("pyModbusTCP.client")
+    client_module.ModbusClient = _FakeClient
+    with patch.dict(sys.modules, {
+            "pyModbusTCP": types.ModuleType("pyModbusTCP"),
+            "pyModbusTCP.client": client_module}):
+        from interfaces.modbus import modbus_gateway
+
+
+class TestModbusGateway(unittest.TestCase):
+
+    def setUp(self) -> None:
+        _FakeClient.instances = []
+        _FakeClient.reachable = True
+        self.client = patch.object(modbus_gateway, "ModbusClient",
+                                   _FakeClient)
+        self.client.start()
+        self.registry = MeterRegistry()
+        self.registry.clear()
+
+    def tearDown(self) -> None:
+        self.registry.clear()
+        self.client.stop()
+
+    def _gateway(self) -> object:
+        return self.registry.connection("modbus", "10.0.0.9", 502,
+                                        modbus_gateway.ModbusGateway)
+
+    def test_unit_id_set_per_request(self) -> None:
+        gateway = self._gateway()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(
+                lambda unit_id: gateway.read_holding_registers(
+                    unit_id, 25, 2), range(1, 9)))
+        self.assertEqual(results, [[unit_id * 1000 + 25,
+                                    unit_id * 1000 + 26]
+                                   for unit_id in range(1, 9)])
+        self.assertEqual(sorted(_FakeClient.instances[0].units),
+                         list(range(1, 9)))
+
+    def test_one_connection_for_all_meters(self) -> None:
+        gateways = [self._gateway() for _ in range(10)]
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            for unit_id, gateway in enumerate(gateways, 1):
+                executor.submit(gateway.read_holding_registers,
+                                unit_id, 801, 1)
+        self.assertEqual(len({id(gateway) for gateway in gateways}), 1)
+        self.assertEqual(len(_FakeClient.instances), 1)
+        self.assertEqual(_FakeClient.instances[0].opens, 1)
+        self.assertEqual(len(_FakeClient.instances[0].units), 10)
+
+    def test_one_reconnect_after_a_loss(self) -> None:
+        gateway = self._gateway()
+        self.assertIsNotNone(gateway.read_holding_registers(1, 25, 1))
+        _FakeClient.reachable = False
+        self.assertIsNone(gateway.read_holding_registers(1, 25, 1))
+        self.assertFalse(gateway.is_open())
+        # the first connection was opened long ago
+        gateway._last_attempt -= gateway._reconnect_interval
+        barrier = threading.Barrier(10)
+
+        def read(unit_id: int) -> list | None:
+            barrier.wait()
+            return gateway.read_holding_registers(unit_id, 25, 1)
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            results = list(executor.map(read, range(1, 11)))
+        self.assertEqual(results, [None] * 10)
+        client = _FakeClient.instances[0]
+        # one attempt for the whole group within the reconnect interval
+        self.assertEqual(client.opens, 2)
+        _FakeClient.reachable = True
+        self.assertIsNone(gateway.read_holding_registers(1, 25, 1))
+        gateway._last_attempt -= gateway._reconnect_interval
+        self.assertEqual(gateway.read_holding_registers(1, 25, 1), [1025])
+        self.assertEqual(client.opens, 3)
+        self.assertEqual(len(_FakeClient.instances), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
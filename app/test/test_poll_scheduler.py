@@ -0,0 +1,39 @@
+import time
+import unittest
+from poll_scheduler import PollScheduler, Job
+
+
+class TestPollScheduler(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.scheduler = PollScheduler()
+        self.scheduler.start()
+
+    def test_periodic_runs(self) -> None:
+        runs = []
+        job = self.scheduler.add("fast", lambda: runs.append(1), 0.05,
+                                 jitter=0)
+        time.sleep(0.32)
+        self.scheduler.cancel(job)
+        self.assertGreaterEqual(len(runs), 5)
+        self.assertEqual(job.missed, 0)
+        self.assertNotIn(job, self.scheduler.jobs)
+
+    def test_overrun_is_counted(self) -> None:
+        job = self.scheduler.add("slow", lambda: time.sleep(0.12), 0.05,
+                                 jitter=0)
+        time.sleep(0.4)
+        self.scheduler.cancel(job)
+        self.assertGreaterEqual(job.overruns, 1)
+        self.assertGreaterEqual(job.missed, 2)
+
+    def test_reschedule_skips_past_deadlines(self) -> None:
+        job = Job("late", None, 1, time.monotonic() - 3.5)
+        self.scheduler._reschedule(job)
+        self.scheduler.cancel(job)
+        self.assertEqual(job.missed, 3)
+        self.assertGreater(job.deadline, time.monotonic())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from interfaces.ring_buffer import RingBuffer, SampleHistory
+from interfaces.snapshot import Snapshot
+from power_aggregator import aggregate_window, aggregate_power
+
+
+class TestPowerAggregator(unittest.TestCase):
+
+    def test_aggregate_wrapped_window(self) -> None:
+        buffer = RingBuffer(4)
+        for second, value in enumerate([9.0, 9.0, 1.0, 5.0, 0.0, 2.0]):
+            buffer.append(float(second), value)
+        aggregate = aggregate_window(buffer)
+        self.assertEqual(aggregate.count, 4)
+        self.assertEqual(aggregate.mean, 2.0)
+        self.assertEqual((aggregate.minimum, aggregate.maximum), (0.0, 5.0))
+        self.assertEqual(aggregate.last, 2.0)
+
+    def test_window_excludes_start(self) -> None:
+        buffer = RingBuffer(10)
+        for second in range(6):
+            buffer.append(float(second), float(second))
+        aggregate = aggregate_window(buffer, 2.0, 4.0)
+        self.assertEqual(aggregate.count, 2)
+        self.assertEqual(aggregate.mean, 3.5)
+        self.assertIsNone(aggregate_window(buffer, 5.0, 9.0))
+
+    def test_aggregate_power_per_phase(self) -> None:
+        history = SampleHistory(10)
+        for second in range(3):
+            history.record(Snapshot([
+                {"name": "active_power", "phase": "L1",
+                 "value": float(second)},
+                {"name": "active_power", "phase": "L2", "value": 1.0},
+                {"name": "imported_active_energy", "phase": "L1",
+                 "tariff": "tariff_1", "value": 5.0}], float(second)))
+        aggregates = aggregate_power(history)
+        self.assertEqual(sorted(aggregates), ["L1", "L2"])
+        self.assertEqual(aggregates["L1"].mean, 1.0)
+        self.assertEqual(aggregates["L2"].count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from interfaces.modbus.read_plan import ReadPlan
+from interfaces.modbus.modbus_frame import create_frames
+
+
+class _Frame:
+    def __init__(self, offset: int, size: int) -> None:
+        self.register_offset = offset
+        self.register_range = size
+        self.regs = None
+
+    def decode(self, regs: list | None) -> None:
+        self.regs = regs
+
+
+class TestReadPlan(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        energy = [801, 841, 881, 921, 805, 845, 885, 925]
+        power = [65, 25, 27, 29]
+        cls.frames = [_Frame(offset, 4) for offset in energy] + \
+                     [_Frame(offset, 2) for offset in power]
+
+    def test_blocks(self) -> None:
+        plan = ReadPlan(self.frames, max_count=125)
+        blocks = [(block.start, block.count) for block in plan.blocks]
+        self.assertEqual(blocks, [(25, 42), (801, 124), (925, 4)])
+
+    def test_max_gap(self) -> None:
+        plan = ReadPlan(self.frames, max_count=125, max_gap=0)
+        blocks = [(block.start, block.count) for block in plan.blocks]
+        self.assertEqual(blocks[:3], [(25, 6), (65, 2), (801, 8)])
+
+    def test_decode_slices_frames(self) -> None:
+        plan = ReadPlan(self.frames, max_count=125)
+        plan.read(lambda start, count: list(range(start, start + count)))
+        for frame in self.frames:
+            self.assertEqual(frame.regs[0], frame.register_offset)
+            self.assertEqual(len(frame.regs), frame.register_range)
+
+    def test_failed_block(self) -> None:
+        plan = ReadPlan(self.frames, max_count=125)
+        plan.decode([[0] * 42, None, [0] * 4])
+        self.assertIsNone(self.frames[0].regs)
+        self.assertEqual(self.frames[-1].regs, [0, 0])
+
+    def test_short_block(self) -> None:
+        plan = ReadPlan(self.frames, max_count=125)
+        plan.decode([[0] * 42, [0] * 100, [0] * 4])
+        self.assertIsNone(self.frames[0].regs)
+        self.assertEqual(self.frames[-1].regs, [0, 0])
+
+    def test_short_block_of_typed_frames(self) -> None:
+        frames = create_frames()
+        plan = ReadPlan(frames)
+        plan.decode([[0] * 42, [0] * 124, [0] * 4])
+        plan.decode([[0] * 42, [0] * 10, [0] * 4])
+        values = {frame.register_offset: frame.export()["value"]
+                  for frame in frames}
+        self.assertIsNone(values[801])
+        self.assertIsNone(values[885])
+        self.assertEqual(values[925], 0.0)
+        self.assertEqual(values[25], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
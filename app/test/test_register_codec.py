@@ -0,0 +1,49 @@
+import struct
+import unittest
+from interfaces.modbus.register_codec import unpack, unpack_block, \
+    pack_registers
+from interfaces.modbus.modbus_frame import ImportedActiveEnergyFrame, \
+    ActivePowerFrame
+
+
+def to_registers(fmt: str, *values) -> list:
+    data = struct.pack(fmt, *values)
+    return list(struct.unpack(f">{len(data) // 2}H", data))
+
+
+class TestRegisterCodec(unittest.TestCase):
+
+    def test_pack_registers(self) -> None:
+        self.assertEqual(pack_registers([0x1234, 0xABCD]),
+                         b"\x12\x34\xAB\xCD")
+
+    def test_unpack_types(self) -> None:
+        self.assertEqual(unpack(to_registers(">d", 6199.236), "float64"),
+                         6199.236)
+        self.assertEqual(unpack(to_registers(">f", 0.5), "float32"), 0.5)
+        self.assertEqual(unpack(to_registers(">i", -2), "int32"), -2)
+        self.assertEqual(unpack([0xFFFF], "uint16"), 0xFFFF)
+
+    def test_unpack_little_word_order(self) -> None:
+        regs = to_registers(">f", 0.5)
+        self.assertEqual(unpack(regs[::-1], "float32", "little"), 0.5)
+
+    def test_unpack_block(self) -> None:
+        regs = to_registers(">f", 1.5) + [0, 0] + to_registers(">d", 2.5)
+        layout = ((0, "float32"), (4, "float64"))
+        self.assertEqual(unpack_block(regs, layout), (1.5, 2.5))
+
+    def test_frames_decode(self) -> None:
+        energy = ImportedActiveEnergyFrame(None, tariff=1, phase=2)
+        energy.decode(to_registers(">d", 6199236.0))
+        power = ActivePowerFrame(None, phase=0)
+        power.decode(to_registers(">f", 168013.0))
+        self.assertEqual(energy.register_offset, 885)
+        self.assertEqual(energy.value, 6199.236)
+        self.assertEqual(power.value, 168.013)
+        power.decode(None)
+        self.assertIsNone(power.value)
+
+
+if __name__ == '__main__':
+    unittest.main()
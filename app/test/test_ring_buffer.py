@@ -0,0 +1,55 @@
+import unittest
+from interfaces.ring_buffer import RingBuffer, SampleHistory
+from interfaces.snapshot import Snapshot
+
+
+def flatten(window: list) -> list:
+    return [(t, v) for timestamps, values in window
+            for t, v in zip(timestamps, values)]
+
+
+class TestRingBuffer(unittest.TestCase):
+
+    def test_window_before_wrap(self) -> None:
+        buffer = RingBuffer(5)
+        for i in range(3):
+            buffer.append(float(i), i * 10.0)
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual(flatten(buffer.window()),
+                         [(0.0, 0.0), (1.0, 10.0), (2.0, 20.0)])
+        self.assertEqual(buffer.latest(), (2.0, 20.0))
+
+    def test_window_after_wrap(self) -> None:
+        buffer = RingBuffer(4)
+        for i in range(10):
+            buffer.append(float(i), float(i))
+        self.assertEqual(len(buffer), 4)
+        self.assertEqual(buffer.nbytes, 64)
+        self.assertEqual([t for t, _ in flatten(buffer.window())],
+                         [6.0, 7.0, 8.0, 9.0])
+        self.assertEqual([t for t, _ in flatten(buffer.window(7, 8.5))],
+                         [7.0, 8.0])
+        self.assertEqual(buffer.window(20), [])
+
+    def test_window_is_a_view(self) -> None:
+        buffer = RingBuffer(3)
+        buffer.append(1.0, 1.0)
+        timestamps, values = buffer.window()[0]
+        self.assertIsInstance(values, memoryview)
+
+    def test_history_channels(self) -> None:
+        history = SampleHistory.for_interval(1, minutes=1)
+        self.assertEqual(history.capacity, 60)
+        for second in range(3):
+            history.record(Snapshot([
+                {"name": "active_power", "phase": "L1",
+                 "value": float(second)},
+                {"name": "imported_active_energy", "phase": "L1",
+                 "tariff": "tariff_1", "value": None}], float(second)))
+        self.assertEqual(history.channels, [("active_power", "L1", None)])
+        buffer = history.buffer("active_power", "L1")
+        self.assertEqual(len(buffer), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from rollups import Rollups, window
+
+WARSAW = ZoneInfo("Europe/Warsaw")
+
+
+class TestRollups(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "rollups.json")
+        self.start = datetime(2024, 3, 1, 12, 0)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def _feed(self, rollups: Rollups, minutes: range) -> list:
+        closed = []
+        for minute in minutes:
+            date = self.start + timedelta(minutes=minute)
+            rollups.add_energy(1, "tariff_1", "L1", date, 100.0 + minute)
+            rollups.add_power(1, "L1", date, float(minute), 0.0,
+                              float(minute) * 2, 60)
+            closed += rollups.close(date)
+        return closed
+
+    def test_window(self) -> None:
+        start = datetime(2024, 3, 1, 12, 0, tzinfo=WARSAW)
+        self.assertEqual(window(start, 900)[1], start)
+        self.assertEqual(window(start + timedelta(minutes=1), 900),
+                         (start, start + timedelta(minutes=15)))
+        self.assertEqual(window(start, 86400),
+                         (datetime(2024, 3, 1, tzinfo=WARSAW),
+                          datetime(2024, 3, 2, tzinfo=WARSAW)))
+
+    def test_days_at_dst_changes(self) -> None:
+        for day, hours in ((datetime(2024, 3, 31, 12, tzinfo=WARSAW), 23),
+                           (datetime(2024, 10, 27, 12, tzinfo=WARSAW), 25)):
+            start, end = window(day, 86400)
+            self.assertEqual(end.timestamp() - start.timestamp(),
+                             hours * 3600)
+            self.assertEqual(window(end + timedelta(minutes=1), 86400)[0],
+                             end)
+
+    def test_hours_at_dst_change(self) -> None:
+        rollups = Rollups(self.path, {"1h": 3600})
+        # 01:00 CEST to 04:00 CET, 02:00-03:00 local time twice
+        first = datetime(2024, 10, 26, 23, 1, tzinfo=timezone.utc)
+        closed = []
+        for minute in range(240):
+            date = (first + timedelta(minutes=minute)).astimezone(WARSAW)
+            rollups.add_power(1, "L1", date, 1.0, 1.0, 1.0)
+            closed += rollups.close(date)
+        self.assertEqual([r.fields["sample_count"] for r in closed],
+                         [60, 60, 60, 60])
+        self.assertEqual([(b.date - a.date) for a, b in
+                          zip(closed, closed[1:])],
+                         [timedelta(hours=1)] * 3)
+
+    def test_first_window_starts_from_last_reading(self) -> None:
+        self._feed(Rollups(self.path, {"15m": 900}), range(0, 8))
+        rollups = Rollups(self.path, {"15m": 900, "1h": 3600})
+        closed = self._feed(rollups, range(8, 61))
+        hourly = [r for r in closed
+                  if r.measurement == "imported_active_energy_1h"]
+        self.assertEqual(hourly[0].fields["delta"], 53.0)
+
+    def test_quarter_hour(self) -> None:
+        rollups = Rollups(self.path, {"15m": 900})
+        closed = self._feed(rollups, range(0, 31))
+        energy = [r for r in closed
+                  if r.measurement == "imported_active_energy_15m"]
+        power = [r for r in closed if r.measurement == "active_power_15m"]
+        self.assertEqual([r.date for r in energy],
+                         [self.start - timedelta(minutes=15), self.start,
+                          self.start + timedelta(minutes=15)])
+        self.assertEqual(energy[1].fields["delta"], 15.0)
+        self.assertEqual(energy[2].fields["last"], 130.0)
+        self.assertEqual(power[1].fields["mean"], 8.0)
+        self.assertEqual(power[1].fields["max"], 30.0)
+        self.assertEqual(power[1].fields["sample_count"], 900)
+
+    def test_state_survives_restart(self) -> None:
+        self._feed(Rollups(self.path, {"15m": 900}), range(0, 8))
+        closed = self._feed(Rollups(self.path, {"15m": 900}), range(8, 16))
+        energy = [r for r in closed
+                  if r.measurement == "imported_active_energy_15m"]
+        self.assertEqual(energy[0].fields["delta"], 15.0)
+        self.assertEqual(energy[0].tariff, "tariff_1")
+
+
+if __name__ == '__main__':
+    unittest.main()
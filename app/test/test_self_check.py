@@ -0,0 +1,29 @@
+import unittest
+from unittest.mock import patch
+import self_check
+from self_check import run_self_check, SelfCheckError
+
+
+class TestSelfCheck(unittest.TestCase):
+
+    def test_golden_vectors_pass(self) -> None:
+        self.assertEqual(run_self_check(), [])
+
+    def test_mismatch_is_reported(self) -> None:
+        with patch.object(self_check, "MBUS_ADDRESS", 8), \
+                self.assertLogs(level="ERROR"):
+            failures = run_self_check()
+        self.assertEqual(len(failures), 2)
+        self.assertTrue(failures[0].startswith("check_mbus_decoding"))
+
+    def test_corrupted_telegram_is_reported(self) -> None:
+        telegram = self_check.MBUS_TELEGRAM[:-2] + b"\x00\x16"
+        with patch.object(self_check, "MBUS_TELEGRAM", telegram), \
+                self.assertLogs(level="ERROR"):
+            failures = run_self_check()
+        self.assertEqual(len(failures), 1)
+        self.assertIn("ChecksumError", failures[0])
+
+    def test_expect(self) -> None:
+        with self.assertRaises(SelfCheckError):
+            self_check._expect("value", 1, 2)
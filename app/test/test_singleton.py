@@ -0,0 +1,23 @@
+import unittest
+from singleton import Singleton
+
+
+class _Inner(metaclass=Singleton):
+    pass
+
+
+class _Outer(metaclass=Singleton):
+    def __init__(self) -> None:
+        self.inner = _Inner()
+
+
+class TestSingleton(unittest.TestCase):
+
+    def test_nested_singletons(self) -> None:
+        outer = _Outer()
+        self.assertIs(outer, _Outer())
+        self.assertIs(outer.inner, _Inner())
+
+
+if __name__ == '__main__':
+    unittest.main()
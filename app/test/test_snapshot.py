@@ -0,0 +1,35 @@
+import unittest
+from interfaces.snapshot import Snapshot, GOOD, PARTIAL, BAD
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def test_quality(self) -> None:
+        good = Snapshot([{"name": "a", "value": 1.0}], 0)
+        partial = Snapshot([{"name": "a", "value": 1.0},
+                            {"name": "b", "value": None}], 0)
+        bad = Snapshot([{"name": "a", "value": None}], 0)
+        self.assertEqual(good.quality, GOOD)
+        self.assertEqual(partial.quality, PARTIAL)
+        self.assertEqual(bad.quality, BAD)
+        self.assertEqual(Snapshot([], 0).quality, BAD)
+
+    def test_immutable(self) -> None:
+        values = [{"name": "a", "value": 1.0}]
+        snapshot = Snapshot(values, 10.0)
+        values[0]["value"] = 2.0
+        with self.assertRaises(AttributeError):
+            snapshot.quality = BAD
+        with self.assertRaises(TypeError):
+            snapshot.values[0]["value"] = 3.0
+        self.assertIsInstance(snapshot.values, tuple)
+        self.assertEqual(snapshot.values[0]["value"], 1.0)
+
+    def test_sequence(self) -> None:
+        first = Snapshot.following(None, [], 1.0)
+        second = Snapshot.following(first, [], 2.0)
+        self.assertEqual((first.sequence, second.sequence), (0, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import os
+import tempfile
+import unittest
+from models.spool import Spool
+from models.spool_drainer import SpoolDrainer
+
+
+class _ApiError(Exception):
+    def __init__(self, status: int) -> None:
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+class _Writer:
+    def __init__(self, *errors) -> None:
+        self.errors = list(errors)
+        self.written = []
+
+    def write(self, lines: list) -> None:
+        if self.errors:
+            raise self.errors.pop(0)
+        self.written.extend(lines)
+
+
+class TestSpool(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_read_appended_records(self) -> None:
+        spool = Spool(self.path, fsync="never")
+        spool.append(["a v=1 60", "a v=2 60"])
+        spool.append(["a v=3 120"])
+        spool.close()
+        batch = spool.read_batch(10)
+        self.assertEqual(batch.lines, ["a v=1 60", "a v=2 60", "a v=3 120"])
+        self.assertTrue(batch.eof)
+
+    def test_batch_is_repeated_until_committed(self) -> None:
+        spool = Spool(self.path, fsync="never")
+        spool.append(["a v=1 60", "a v=2 60", "a v=3 60"])
+        first = spool.read_batch(2)
+        self.assertEqual(spool.read_batch(2).lines, first.lines)
+        spool.commit(first)
+        second = spool.read_batch(2)
+        self.assertEqual(second.lines, ["a v=3 60"])
+        spool.commit(second)
+        self.assertIsNone(spool.read_batch(2))
+        self.assertEqual(spool.size, 0)
+
+    def test_resume_after_restart(self) -> None:
+        spool = Spool(self.path, fsync="never")
+        spool.append(["a v=1 60", "a v=2 60"])
+        spool.commit(spool.read_batch(1))
+        spool.append(["a v=3 120"])
+        spool.close()
+        restarted = Spool(self.path, fsync="never")
+        lines = []
+        while (batch := restarted.read_batch(10)) is not None:
+            lines += batch.lines
+            restarted.commit(batch)
+        self.assertEqual(lines, ["a v=2 60", "a v=3 120"])
+
+    def test_active_segment_is_read_without_sealing(self) -> None:
+        spool = Spool(self.path, fsync="never")
+        for i in range(3):
+            spool.append([f"a v={i} 60"])
+            batch = spool.read_batch(10)
+            self.assertEqual(batch.lines, [f"a v={i} 60"])
+            self.assertFalse(batch.eof)
+            spool.commit(batch)
+            self.assertIsNone(spool.read_batch(10))
+        self.assertEqual(spool.segments, 1)
+        self.assertEqual(spool.size, 0)
+
+    def test_idle_segment_is_sealed(self) -> None:
+        spool = Spool(self.path, fsync="never", seal_idle=0)
+        spool.append(["a v=1 60"])
+        batch = spool.read_batch(10)
+        self.assertTrue(batch.eof)
+        spool.commit(batch)
+        spool.append(["a v=2 120"])
+        self.assertEqual(spool.segments, 1)
+        self.assertEqual(spool.read_batch(10).lines, ["a v=2 120"])
+
+    def test_torn_record_is_skipped(self) -> None:
+        spool = Spool(self.path, fsync="never")
+        spool.append(["a v=1 60"])
+        spool.close()
+        with open(os.path.join(self.path, "000000000001.seg"), "ab") as file:
+            file.write(b"a v=2")
+        batch = Spool(self.path, fsync="never").read_batch(10)
+        self.assertEqual(batch.lines, ["a v=1 60"])
+
+    def test_oldest_segment_dropped_over_limit(self) -> None:
+        spool = Spool(self.path, max_bytes=30, segment_bytes=9,
+                      fsync="never")
+        for i in range(4):
+            spool.append([f"a v={i} 60"])
+        self.assertEqual(spool.dropped_segments, 1)
+        self.assertEqual(spool.read_batch(10).lines, ["a v=1 60"])
+
+
+class TestSpoolDrainer(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.spool = Spool(self.directory.name, fsync="never")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_rejected_batch_is_set_aside(self) -> None:
+        self.spool.append(["a v=1 60"])
+        self.spool.append(["a v=\"x\" 120"])
+        self.spool.close()
+        drainer = SpoolDrainer(self.spool, _Writer(_ApiError(400)),
+                               batch_size=1)
+        self.assertTrue(drainer.drain_once())
+        self.assertEqual(drainer.failures, 0)
+        self.assertTrue(drainer.drain_once())
+        self.assertEqual(drainer.sent_records, 1)
+        self.assertEqual(self.spool.rejected_records, 1)
+        with open(os.path.join(self.directory.name, "rejected")) as file:
+            self.assertEqual(file.read(), "a v=1 60\n")
+        self.assertIsNone(self.spool.read_batch(1))
+
+    def test_server_errors_are_retried(self) -> None:
+        self.spool.append(["a v=1 60"])
+        writer = _Writer(_ApiError(503), _ApiError(429), OSError("down"))
+        drainer = SpoolDrainer(self.spool, writer)
+        for failures in range(1, 4):
+            self.assertFalse(drainer.drain_once())
+            self.assertEqual(drainer.failures, failures)
+        self.assertTrue(drainer.drain_once())
+        self.assertEqual(writer.written, ["a v=1 60"])
+        self.assertEqual(self.spool.rejected_records, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
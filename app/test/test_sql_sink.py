@@ -0,0 +1,118 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+from models.sql_sink import SqlSink, SqlSpoolWriter, ConnectionPool, \
+    encode_row, decode_row, MARIADB_TIMEOUT
+from models.spool import Spool
+from models.spool_drainer import SpoolDrainer
+
+
+class TestSqlSink(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "meters.db")
+        self.connections = 0
+        self.sink = SqlSink(self._connect, "sqlite", pool_size=2)
+        self.sink.create_table()
+        self.date = datetime(2024, 3, 1, 12, 0)
+
+    def tearDown(self) -> None:
+        self.sink.close()
+        shutil.rmtree(self.directory)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.connections += 1
+        return sqlite3.connect(self.path, check_same_thread=False)
+
+    def _count(self) -> int:
+        with sqlite3.connect(self.path) as connection:
+            return connection.execute(
+                "SELECT COUNT(*) FROM meter_readings").fetchone()[0]
+
+    def test_write_and_ignore_duplicates(self) -> None:
+        rows = [(1, "imported_active_energy", "total", "tariff_1",
+                 self.date, 6199.236),
+                (1, "active_power", "phase_1", None, self.date, 168.013)]
+        self.sink.write(rows)
+        self.sink.write(rows)
+        self.assertEqual(self._count(), 2)
+        self.assertEqual(self.sink.written, 4)
+        self.assertEqual(self.connections, 1)
+
+    def test_tick_is_one_transaction(self) -> None:
+        rows = [(1, "active_power", "total", None, self.date, 1.0),
+                (2, "active_power", "total", None, self.date, object())]
+        with self.assertRaises(sqlite3.Error):
+            self.sink.write(rows)
+        self.assertEqual(self._count(), 0)
+
+    def test_pool_limit(self) -> None:
+        pool = ConnectionPool(self._connect, size=1, timeout=0.1)
+        with pool.connection():
+            acquired = []
+            thread = threading.Thread(
+                target=lambda: acquired.append(self._try_acquire(pool)))
+            thread.start()
+            thread.join()
+        self.assertEqual(acquired, [False])
+        with pool.connection():
+            pass
+        self.assertEqual(pool.idle, 1)
+        pool.close()
+
+    def test_pool_waits_up_to_the_sink_timeout(self) -> None:
+        sink = SqlSink(self._connect, "sqlite", pool_size=1, timeout=0.1)
+        with sink._pool.connection():
+            acquired = []
+            thread = threading.Thread(
+                target=lambda: acquired.append(
+                    self._try_acquire(sink._pool)))
+            thread.start()
+            thread.join(1)
+        self.assertEqual(acquired, [False])
+        self.assertEqual(self.sink._pool._timeout, MARIADB_TIMEOUT)
+        sink.close()
+
+    def test_row_encoding(self) -> None:
+        row = (1, "imported_active_energy", "total", "tariff_1", self.date,
+               6199.236)
+        self.assertEqual(decode_row(encode_row(row)), row)
+
+    def test_spooled_rows_survive_a_failed_write(self) -> None:
+        down = [True]
+
+        def connect() -> sqlite3.Connection:
+            if down[0]:
+                raise sqlite3.OperationalError("database is down")
+            return self._connect()
+
+        spool = Spool(os.path.join(self.directory, "spool"), fsync="never")
+        drainer = SpoolDrainer(spool, SqlSpoolWriter(SqlSink(connect,
+                                                             "sqlite")))
+        spool.append([encode_row((1, "active_power", "total", None,
+                                  self.date, 1.0))])
+        with self.assertLogs(level="WARNING"):
+            self.assertFalse(drainer.drain_once())
+        self.assertEqual(drainer.failures, 1)
+        down[0] = False
+        with self.assertLogs(level="WARNING"):
+            self.assertTrue(drainer.drain_once())
+        self.assertEqual(self._count(), 1)
+        self.assertEqual(spool.size, 0)
+
+    @staticmethod
+    def _try_acquire(pool: ConnectionPool) -> bool:
+        try:
+            with pool.connection():
+                return True
+        except Exception:
+            return False
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import time
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from models.meter_model import MeterModel
+from interfaces.snapshot import GOOD
+from acquisition_barrier import AcquisitionBarrier
+from supervisor import partition, compact, RemoteMeter, WorkerHandle, \
+    Supervisor
+
+
+def model(meter_id: int, host: str) -> MeterModel:
+    return MeterModel.from_dict({"id": meter_id, "name": f"m{meter_id}",
+                                 "host": host, "port": 502,
+                                 "address": meter_id,
+                                 "interface": "modbus"})
+
+
+class TestSupervisor(unittest.TestCase):
+
+    def test_partition_keeps_hosts_together(self) -> None:
+        models = {}
+        for meter_id, host in enumerate(["a", "a", "a", "b", "b", "c",
+                                         "d"], 1):
+            models[meter_id] = model(meter_id, host)
+        parts = partition(models, 2)
+        hosts = [{m.host for m in part.values()} for part in parts]
+        self.assertEqual(sum(len(part) for part in parts), 7)
+        self.assertTrue(hosts[0].isdisjoint(hosts[1]))
+        self.assertEqual(sorted(len(part) for part in parts), [3, 4])
+        self.assertEqual(parts, partition(models, 2))
+
+    def test_remote_meter_mirrors_snapshots(self) -> None:
+        remote = RemoteMeter(model(1, "a"), None)
+        remote.update(4, 100.0, (("active_power", "total", None, 1.5),
+                                 ("imported_active_energy", "total",
+                                  "tariff_1", 10.0)))
+        self.assertEqual(remote.snapshot.sequence, 4)
+        self.assertEqual(remote.snapshot.quality, GOOD)
+        self.assertEqual(remote.acquired_at, 100.0)
+        self.assertNotIn("tariff", remote.data[0])
+        self.assertEqual(len(remote.history.buffer("active_power",
+                                                   "total")), 1)
+        self.assertEqual(compact(remote)[3][1],
+                         ("imported_active_energy", "total", "tariff_1",
+                          10.0))
+
+    def test_every_sample_is_forwarded(self) -> None:
+        worker = RemoteMeter(model(1, "a"), None)
+        for sequence in range(1, 4):
+            worker.update(sequence, 100.0 + sequence,
+                          (("active_power", "total", None, sequence),))
+        remote = RemoteMeter(model(1, "a"), None)
+        remote.update(*compact(worker)[1:])
+        worker.update(4, 104.0, (("active_power", "total", None, 4),))
+        message = compact(worker, 103.0)
+        self.assertEqual(message[4][0][1], (104.0,))
+        remote.update(*message[1:])
+        buffer = remote.history.buffer("active_power", "total")
+        self.assertEqual(len(buffer), 4)
+        self.assertEqual(remote.snapshot.sequence, 4)
+
+    def test_dead_worker_is_asked_once(self) -> None:
+        sent = []
+
+        class _Connection:
+            def send(self, message: tuple) -> None:
+                sent.append(message)
+
+        worker = WorkerHandle(0, {meter_id: model(meter_id, "a")
+                                  for meter_id in range(1, 6)})
+        worker._connection = _Connection()
+        since = time.time()
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            for _ in worker.meters:
+                executor.submit(worker.acquire, since, 0.3)
+        self.assertLess(time.monotonic() - start, 0.6)
+        self.assertEqual(sent, [("acquire", since)])
+
+    def test_workers_are_asked_at_once(self) -> None:
+        sent = {}
+        workers = []
+        for index in range(4):
+            worker = WorkerHandle(index, {
+                meter_id: model(meter_id, str(index))
+                for meter_id in range(index * 10, index * 10 + 10)})
+
+            def _send(message: tuple, worker=worker) -> None:
+                sent[worker.index] = time.monotonic()
+                # every worker replies after 0.3 s
+                threading.Timer(0.3, worker._acquired.set).start()
+
+            worker._send = _send
+            workers.append(worker)
+        supervisor = Supervisor()
+        supervisor._workers = workers
+        try:
+            start = time.monotonic()
+            acquisition = supervisor.acquire(AcquisitionBarrier(0.5, 1))
+        finally:
+            supervisor._workers = []
+        self.assertLess(time.monotonic() - start, 0.45)
+        self.assertLess(max(sent.values()) - min(sent.values()), 0.1)
+        self.assertEqual(len(sent), 4)
+        self.assertEqual(acquisition.late, [])
+        self.assertEqual(len(acquisition.timestamps), 40)
+
+    def test_worker_counters(self) -> None:
+        class _Connection:
+            def __init__(self) -> None:
+                self.messages = [("stats", (3, 1)), ("stats", (5, 2))]
+
+            def recv(self) -> tuple:
+                if not self.messages:
+                    raise EOFError
+                return self.messages.pop(0)
+
+        workers = [WorkerHandle(index, {}) for index in range(2)]
+        for worker in workers:
+            worker._receive(_Connection())
+        supervisor = Supervisor()
+        supervisor._workers = workers
+        try:
+            self.assertEqual(supervisor.missed,
+                             supervisor.scheduler.missed + 10)
+            self.assertEqual(supervisor.overruns,
+                             supervisor.scheduler.overruns + 4)
+        finally:
+            supervisor._workers = []
+
+    def test_silent_worker_is_late(self) -> None:
+        worker = WorkerHandle(0, {1: model(1, "a")})
+        worker._send = lambda message: None
+        supervisor = Supervisor()
+        supervisor._workers = [worker]
+        try:
+            acquisition = supervisor.acquire(AcquisitionBarrier(0.1, 1))
+        finally:
+            supervisor._workers = []
+        self.assertEqual(acquisition.late, list(worker.meters.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+from datetime import datetime
+from power_aggregator import PowerAggregate
+from models.active_power_model import ActivePowerModel
+from models.imported_active_energy_model import ImportedActiveEnergyModel
+from models.wide_model import WideModel
+
+
+class TestWideModel(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.date = datetime(2024, 3, 1, 12, 0)
+
+    def _power(self, meter_id: int, phase: str, value: float,
+               count: int | None = None, acquired_at: float = 100.0,
+               spread: float | None = None) -> ActivePowerModel:
+        aggregate = None if count is None else \
+            PowerAggregate(value, value - 1, value + 1, value, count)
+        return ActivePowerModel(meter_id, value, phase, self.date,
+                                acquired_at=acquired_at, spread=spread,
+                                aggregate=aggregate)
+
+    def _energy(self, meter_id: int, tariff: str, phase: str,
+                value: float) -> ImportedActiveEnergyModel:
+        return ImportedActiveEnergyModel(meter_id, value, tariff, phase,
+                                         self.date, acquired_at=100.0)
+
+    def test_field_names(self) -> None:
+        self.assertEqual(WideModel.field_name("total"), "total")
+        self.assertEqual(WideModel.field_name("phase_2"), "l2")
+        self.assertEqual(WideModel.field_name("total", "total"), "total")
+        self.assertEqual(WideModel.field_name("phase_1", "tariff_1"),
+                         "t1_l1")
+        self.assertEqual(WideModel.field_name("phase_3", "tariff_2"),
+                         "t2_l3")
+
+    def test_group_by_meter_and_family(self) -> None:
+        wide_models = WideModel.group([
+            self._power(1, "total", 3.0), self._power(1, "phase_1", 1.0),
+            self._energy(1, "total", "total", 10.0),
+            self._energy(1, "tariff_1", "phase_3", 4.0),
+            self._power(2, "phase_3", 2.0)])
+        fields = {(model.measurement, model.meter_id): model.fields
+                  for model in wide_models}
+        self.assertEqual(fields, {
+            ("active_power", 1): {"total": 3.0, "l1": 1.0},
+            ("imported_active_energy", 1): {"total": 10.0, "t1_l3": 4.0},
+            ("active_power", 2): {"l3": 2.0}})
+
+    def test_sample_count_across_phases(self) -> None:
+        wide_model, = WideModel.group([
+            self._power(1, "phase_1", 1.0, count=60),
+            self._power(1, "phase_2", 2.0, count=58),
+            self._power(1, "phase_3", 3.0)])
+        self.assertEqual(wide_model.fields["sample_count"], 60)
+        self.assertEqual(wide_model.fields["l2_mean"], 2.0)
+        self.assertEqual(wide_model.fields["l1_min"], 0.0)
+        self.assertNotIn("l3_mean", wide_model.fields)
+
+    def test_latest_acquisition_is_kept(self) -> None:
+        wide_model, = WideModel.group([
+            self._power(1, "phase_1", 1.0, acquired_at=101.0, spread=0.5),
+            self._power(1, "phase_2", 2.0, acquired_at=100.0),
+            self._power(1, "phase_3", 3.0, acquired_at=None, spread=0.2)])
+        self.assertEqual(wide_model.acquired_at, 101.0)
+        self.assertEqual(wide_model.spread, 0.5)
+        self.assertIn("acquired_at=101", wide_model.to_line())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+from datetime import datetime, timedelta
+from models.write_policy import WritePolicy, WriteFilter
+
+
+class TestWritePolicy(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.date = datetime(2024, 3, 1, 12, 0)
+        self.filter = WriteFilter()
+
+    def _written(self, policy: WritePolicy, values: list) -> list:
+        return [value for minute, value in enumerate(values)
+                if self.filter.should_write(
+                    policy, "key", value,
+                    self.date + timedelta(minutes=minute))]
+
+    def test_no_policy_writes_everything(self) -> None:
+        self.assertEqual(self._written(None, [1, 1, 1]), [1, 1, 1])
+
+    def test_on_change(self) -> None:
+        policy = WritePolicy(on_change=True)
+        self.assertEqual(self._written(policy, [1, 1, 2, 2, 1]), [1, 2, 1])
+        self.assertEqual(self.filter.suppressed, 2)
+
+    def test_deadbands(self) -> None:
+        absolute = WritePolicy(deadband=0.5)
+        self.assertEqual(self._written(absolute, [1, 1.4, 1.6, 1.7]),
+                         [1, 1.6])
+        self.filter = WriteFilter()
+        relative = WritePolicy(relative_deadband=0.1)
+        self.assertEqual(self._written(relative, [100, 109, 111, 120]),
+                         [100, 111])
+
+    def test_extremes_leaving_the_deadband(self) -> None:
+        policy = WritePolicy(deadband=0.5)
+        minutes = [(1, ()), (1, (1, 1, 1)), (1, (2.2, 0.9, 9)),
+                   (1.1, (1.1, 1, 1.2))]
+        written = [value for minute, (value, extremes) in enumerate(minutes)
+                   if self.filter.should_write(
+                       policy, "key", value,
+                       self.date + timedelta(minutes=minute), extremes)]
+        self.assertEqual(written, [1, 1])
+        self.assertEqual(self.filter.suppressed, 2)
+
+    def test_heartbeat(self) -> None:
+        policy = WritePolicy.from_dict({"on_change": True, "heartbeat": 180})
+        self.assertEqual(self._written(policy, [5] * 7), [5, 5, 5])
+
+
+if __name__ == '__main__':
+    unittest.main()